@@ -1,19 +1,39 @@
 # Import necessary libraries for the Streamlit app, API calls, and environment variables.
+# Heavy optional dependencies (pandas/plotly, pyttsx3, speech_recognition,
+# deep_translator) are imported on first use inside the functions that need them,
+# so a cold start only pays for what the first render actually shows.
+# Run benchmarks/bench_startup.py to check the startup budget.
 import streamlit as st
-import json
 import os
 import requests
 import time
+import uuid
 import urllib.parse
-import pyttsx3
-import speech_recognition as sr
-import threading
-from deep_translator import GoogleTranslator
+import sqlite3
+import hmac
+import math
+from functools import partial
 from datetime import datetime, timedelta
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from translation_cache import PerThreadTranslators, TranslationCache
+from i18n import load_catalog
+import gemini
+from http_client import HttpClient
+from conversation_context import ConversationContext
+from storage import Storage, user_key
+from tts import TTSWorker
+from audio_cache import AudioCache, AudioRenderer, mime_type
+from voice_capture import VoiceCapture
+from sentiment import CRISIS, SentimentDetector
+from mood_analytics import MoodSeries, build_mood_figure
+import transcript
+import export
+from chat_jobs import ChatJobExecutor, JobQueueFull, request_key
+from rate_limit import DuplicateFilter, RateLimiter, idempotency_key
+from sessions import SessionRegistry, trim_oldest
+from telemetry import SpanFileExporter, Telemetry
+from memory_index import PINNED_MEMORIES, MemoryIndex, extract_memories, goal_line, journal_line, memory_line, sentence_embedder
+from verses import detect_emotion, load_verses
+from model_router import ModelRouter
 
 # =========================================================================
 # === API Key Handling and Configuration ===
@@ -30,66 +50,61 @@ if not api_key:
 # =========================================================================
 # === Text-to-Speech and Speech-to-Text Functionality ===
 # =========================================================================
-engine = pyttsx3.init()
-# Get a list of available voices and find a male and female voice
-voices = engine.getProperty('voices')
-male_voice = next((v.id for v in voices if 'male' in v.name.lower()), None)
-female_voice = next((v.id for v in voices if 'female' in v.name.lower()), None)
-# Set a default voice
-if female_voice:
-    engine.setProperty('voice', female_voice)
-elif male_voice:
-    engine.setProperty('voice', male_voice)
-
-def speak_all_thread(text, voice_type, rate, pitch):
-    """Function to run TTS in a separate thread."""
-    engine_thread = pyttsx3.init()
-    
-    if voice_type == "Male" and male_voice:
-        engine_thread.setProperty('voice', male_voice)
-    elif voice_type == "Female" and female_voice:
-        engine_thread.setProperty('voice', female_voice)
-    
-    engine_thread.setProperty('rate', rate)
-    
-    engine_thread.say(text)
-    engine_thread.runAndWait()
+# "browser" renders speech to cached audio files played with st.audio, so remote
+# users can hear it; "server" plays it on the server's own speakers.
+TTS_MODE = os.getenv("FEELEASE_TTS_MODE", "browser")
+
+@st.cache_resource
+def get_tts_worker():
+    """One persistent TTS engine thread per process; pyttsx3 is imported on first use."""
+    return TTSWorker()
 
-def speak_all(text, voice_type="Female", rate=130, pitch=100):
-    """Starts the TTS in a new thread to prevent UI blocking."""
+@st.cache_resource
+def get_audio_renderer():
+    """One synthesized-audio cache per process; fixed texts are pre-rendered in the background."""
+    renderer = AudioRenderer(get_tts_worker(), AudioCache())
+    renderer.prerender([
+        (text, language, "Female", 130, 100)
+        for language in language_codes
+        for text in (tr(CRISIS_MESSAGE, language), tr("How can I help you?", language))
+    ])
+    return renderer
+
+def speak_all(text, voice_type="Female", rate=130, pitch=100, language="English"):
+    """Speaks the text, either through the browser (cached audio file) or the server's TTS worker."""
     # Ensure it's treated as a string, not list of characters
     if isinstance(text, list):
         combined_text = " ".join(text)   # join if it's a list
     else:
         combined_text = str(text)        # otherwise just keep it as string
-    
-    tts_thread = threading.Thread(target=speak_all_thread, args=(combined_text, voice_type, rate, pitch))
-    tts_thread.start()
+
+    # Browser mode times synthesis (or the cache lookup); server mode only queues the speech
+    with get_telemetry().span(f"tts.{TTS_MODE}", language=language, chars=len(combined_text)) as span:
+        if TTS_MODE == "browser":
+            st.session_state.reply_audio = get_audio_renderer().render(combined_text, language, voice_type, rate, pitch)
+            ok = st.session_state.reply_audio is not None
+        else:
+            ok = get_tts_worker().speak(combined_text, voice_type, rate, pitch)
+        if not ok:
+            span.attrs["error"] = "unavailable"
+    if not ok:
+        st.warning("Text-to-speech is not available on this server.")
 
 def stop_speaking():
-    """Stops the currently speaking TTS."""
-    engine.stop()
+    """Stops the current speech and anything queued behind it."""
+    if TTS_MODE == "browser":
+        st.session_state.reply_audio = None
+    else:
+        get_tts_worker().stop()
 
 
-def recognize_voice():
-    """Function to listen to the user's microphone and convert speech to text."""
-    r = sr.Recognizer()
-    with sr.Microphone() as source:
-        st.info("🎙️ Listening...")
-        # Adjust for ambient noise for better recognition
-        r.adjust_for_ambient_noise(source)
-        try:
-            audio = r.listen(source, phrase_time_limit=5)
-            st.info("👂 Recognizing...")
-            text = r.recognize_google(audio)
-            st.success(f"You said: {text}")
-            return text
-        except sr.UnknownValueError:
-            st.warning("Sorry, I could not understand what you said.")
-            return ""
-        except sr.RequestError as e:
-            st.error(f"Could not request results from Google Speech Recognition service; {e}")
-            return ""
+# Speech recognition backend: "google" (web API), "sphinx" or "whisper" (offline)
+STT_ENGINE = os.getenv("FEELEASE_STT_ENGINE", "google")
+
+@st.cache_resource
+def get_voice_capture():
+    """One voice capture pool per process, so ambient calibration happens only once."""
+    return VoiceCapture(engine=STT_ENGINE)
 
 # =========================================================================
 # === Streamlit App UI and Logic ===
@@ -98,12 +113,29 @@ def recognize_voice():
 # Set the page title and the overall layout of the app.
 st.set_page_config(page_title="🧠 Mindful Bot", layout="centered")
 
+# === Instrumentation ===
+# Timing spans for the hot paths, aggregated per process. Set FEELEASE_SPANS_FILE
+# to also append every span to a local file, as flat JSON lines or as OTLP/JSON
+# (FEELEASE_SPANS_FORMAT=jsonl|otlp). With FEELEASE_ADMIN_TOKEN set, opening the
+# app with ?admin=<token> shows a performance panel in the sidebar.
+SPANS_FILE = os.getenv("FEELEASE_SPANS_FILE")
+SPANS_FORMAT = os.getenv("FEELEASE_SPANS_FORMAT", "jsonl")
+ADMIN_TOKEN = os.getenv("FEELEASE_ADMIN_TOKEN")
+
+@st.cache_resource
+def get_telemetry():
+    """One span aggregator per process, shared by every session and worker thread."""
+    return Telemetry(SpanFileExporter(SPANS_FILE, SPANS_FORMAT) if SPANS_FILE else None)
+
+# Ended at the bottom of the script; runs cut short by st.rerun() or st.stop() are not recorded.
+script_span = get_telemetry().start("script.run")
+
 # Display the main title and a subheader.
 st.title("🧠 Mindful Bot")
 st.subheader("Your supportive AI companion.")
 
-# Define the API endpoint URL for the Gemini model.
-API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash-preview-05-20:generateContent?key={api_key}"
+# Stream replies token-by-token via streamGenerateContent. Set FEELEASE_STREAMING=0 to disable.
+STREAM_RESPONSES = os.getenv("FEELEASE_STREAMING", "1") != "0"
 
 # Define the core instructions for the bot's behavior.
 SYSTEM_PROMPT = """You are a supportive and empathetic AI assistant designed to provide general information and comfort related to mental well-being.
@@ -133,12 +165,7 @@ If a user expresses thoughts of self-harm or suicide, your first and most import
 After providing this initial support, you should then provide the list of resources.
 
 ### Religious Guidance and Comfort:
-If a user has specified their faith, you can provide a relevant and comforting verse from their religious text. For example:
-- **Hinduism:** The Bhagavad Gita, the Upanishads.
-- **Christianity:** The Bible (e.g., Psalms, Proverbs).
-- **Jainism:** The Tattvartha Sutra.
-- **Buddhism:** The Dhammapada.
-Ensure the verse is always positive, uplifting, and aligned with mental well-being, and never prescriptive or judgmental.
+When the user has specified their faith, the app shows them a comforting verse from their tradition next to your reply. Do not quote scripture yourself; you may gently acknowledge their faith.
 
 ### Mental Health Resources:
 * **Psychiatrist/Therapist:** You can find a mental health professional by searching on websites like Vandrevala Foundation or the Indian Association of Clinical Psychologists. These sites often have directories of licensed practitioners.
@@ -158,10 +185,41 @@ Ensure the verse is always positive, uplifting, and aligned with mental well-bei
     * **AI:** "Please don't go. I'm here for you, and I want to listen. Things can get better, and you're not alone. You can talk to me about anything that's on your mind." (followed by resources)
 """
 
+# Register SYSTEM_PROMPT once via Gemini context caching instead of sending it every turn.
+# Set GEMINI_CONTEXT_CACHE=1 to enable; otherwise it is sent as systemInstruction.
+USE_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "0") == "1"
+
+@st.cache_resource
+def get_request_builder():
+    """One request builder (and context cache handle) per process."""
+    context_cache = gemini.ContextCache(api_key, SYSTEM_PROMPT, post=get_http_client().post) if USE_CONTEXT_CACHE else None
+    return gemini.RequestBuilder(SYSTEM_PROMPT, context_cache)
+
+# Memories, journal entries and goals are retrieved by relevance for each prompt, at most
+# MEMORY_CONTEXT_TOKENS of them. FEELEASE_RETRIEVAL=embedding scores with sentence-transformers
+# (FEELEASE_EMBEDDING_MODEL) instead of BM25, if it is installed.
+MEMORY_CONTEXT_TOKENS = int(os.getenv("FEELEASE_MEMORY_TOKENS", "300"))
+MEMORY_CONTEXT_ITEMS = 8
+MAX_INDEXED_JOURNAL_ENTRIES = int(os.getenv("FEELEASE_MAX_INDEXED_JOURNAL", "5000"))
+RETRIEVAL_BACKEND = os.getenv("FEELEASE_RETRIEVAL", "bm25")
+EMBEDDING_MODEL = os.getenv("FEELEASE_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+@st.cache_resource
+def get_embedder():
+    """The embedding model for memory retrieval, loaded once per process. None means BM25."""
+    if RETRIEVAL_BACKEND != "embedding":
+        return None
+    try:
+        return sentence_embedder(EMBEDDING_MODEL)
+    except ImportError:
+        # sentence-transformers is optional; BM25 needs nothing extra
+        return None
+
 # Initialize session state variables
 st.session_state.setdefault("messages", [])
-st.session_state.setdefault("hidden_history", [{"role": "user", "parts": [{"text": SYSTEM_PROMPT}]}])
+st.session_state.setdefault("hidden_history", [])  # Extra model-only turns; SYSTEM_PROMPT goes in systemInstruction
 st.session_state.setdefault("last_reply", "")
+st.session_state.setdefault("reply_audio", None)  # Cached audio file for the last reply (browser TTS)
 st.session_state.setdefault("user_name", "")
 st.session_state.setdefault("user_age", "")
 st.session_state.setdefault("user_faith", "")
@@ -172,12 +230,83 @@ st.session_state.setdefault("last_seen_date", datetime.now().date())
 st.session_state.setdefault("streak_counter", 0)
 st.session_state.setdefault("language", "English")
 st.session_state.setdefault("listening", False)  # New state for microphone
+st.session_state.setdefault("voice_job", None)  # Future of the background voice capture
+st.session_state.setdefault("voice_prompt", None)  # Recognized speech waiting to be submitted
+st.session_state.setdefault("voice_error", None)  # Why the last voice capture produced no text
 st.session_state.setdefault("age_valid", False)  # New state for age validation
 st.session_state.setdefault("text_input", "")  # Fix: Initialize text_input
-st.session_state.setdefault("mood_data", [])  # For mood tracking
+if "mood_data" not in st.session_state:
+    st.session_state.mood_data = MoodSeries()  # For mood tracking, stored column-wise
+st.session_state.setdefault("transcript_window", transcript.PAGE_SIZE)  # Chat messages rendered per rerun
+st.session_state.setdefault("export_file", None)  # Prepared download, cleared when anything it contains changes
+st.session_state.setdefault("mood_figure", None)  # Memoized mood chart, cleared when a rating is added
 st.session_state.setdefault("journal_entries", [])  # For journaling
+st.session_state.setdefault("journal_search", (None, 0))  # Journal search shown (query and filters) and its page
 st.session_state.setdefault("user_goals", [])  # For goal setting
 st.session_state.setdefault("user_memory", {})  # For remembering user details
+st.session_state.setdefault("verse_rotation", {})  # Position in each verse group, so verses don't repeat
+st.session_state.setdefault("pending_verse", None)  # Verse to show under the reply that is on its way
+if "memory_index" not in st.session_state:
+    st.session_state.memory_index = MemoryIndex(embed=get_embedder())  # Retrieval over memories, journal and goals
+st.session_state.setdefault("user_id", None)  # Storage key, set once the user has introduced themselves
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex  # Distinguishes this browser session's chat jobs
+st.session_state.setdefault("chat_job", None)  # Background chat turn whose reply is still pending
+st.session_state.setdefault("chat_error", None)  # Error from the last chat turn, shown on the next run
+st.session_state.setdefault("last_response_timing", {})  # Time to first token / total, in seconds
+st.session_state.setdefault("script_runs", 0)  # Full script executions this session
+st.session_state.setdefault("fragment_runs", 0)  # Timer fragment ticks this session
+# Sidebar choices, kept outside widget state (see kept_widget)
+st.session_state.setdefault("journal_prompt", "")
+st.session_state.setdefault("goal_category", "Wellness")
+st.session_state.setdefault("video_query", "")
+st.session_state.setdefault("voice_choice", "Female")
+st.session_state.setdefault("pitch", 100)
+st.session_state.setdefault("rate", 130)
+st.session_state.setdefault("export_format", next(iter(export.FORMATS)))
+st.session_state.script_runs += 1
+
+def keep_widget_value(key):
+    st.session_state[key] = st.session_state["_" + key]
+
+def kept_widget(key):
+    """Widget arguments that keep its value under the ordinary session key `key`.
+
+    Streamlit drops a widget's state when a run doesn't draw it (as after a
+    fragment's st.rerun()) or when its label changes (switching language
+    retranslates the labels), resetting it to its default. The widget gets
+    key "_" + key, seeded from `key` on every run and copied back on change.
+    """
+    st.session_state["_" + key] = st.session_state[key]
+    return {"key": "_" + key, "on_change": keep_widget_value, "args": (key,)}
+
+@st.cache_resource
+def get_sentiment_detector():
+    """Compiles the crisis/negative keyword automaton once per process."""
+    return SentimentDetector()
+
+@st.cache_resource
+def get_verse_library():
+    """Loads the curated verses (locales/verses.json) once per process."""
+    return load_verses()
+
+CRISIS_MESSAGE = """I hear you. Please don't go. I'm here for you, and I want to listen. Things can get better, and you're not alone. You can talk to me about anything that's on your mind.
+
+If you are in a crisis or experiencing an emergency, please contact a professional immediately. You can find local helplines or contact emergency services.
+
+Here are some resources:
+Vandrevala Foundation: +91 99996 66666
+Aasra: +91 98204 66726
+TISS iCALL: www.icallhelpline.org
+"""
+
+def is_crisis_message(message):
+    """Crisis turns get the crisis response and are never folded out of the model's context."""
+    return message["role"] == "user" and get_sentiment_detector().classify(message["content"]) == CRISIS
+
+# Bounded model context: recent turns verbatim, older ones in a rolling summary
+if "conversation_context" not in st.session_state:
+    st.session_state.conversation_context = ConversationContext(is_pinned=is_crisis_message)
 
 # Language codes for dynamic search queries
 language_codes = {
@@ -185,11 +314,149 @@ language_codes = {
     "Hindi": "hi",
     "Bengali": "bn"
 }
+# Locale codes for speech recognition
+speech_language_codes = {
+    "English": "en-IN",
+    "Hindi": "hi-IN",
+    "Bengali": "bn-IN"
+}
+# === Durable Storage ===
+# How much history a returning user loads into the session
+HISTORY_MESSAGES = 200
+HISTORY_JOURNAL_ENTRIES = 50
+HISTORY_MOOD_DAYS = 90
+# Saved history is keyed by name + passphrase (storage.user_key), never the name alone
+MIN_PASSPHRASE_LENGTH = 8
+# Most history a session keeps in memory; older items stay in storage only
+MAX_SESSION_MESSAGES = int(os.getenv("FEELEASE_MAX_SESSION_MESSAGES", "400"))
+MAX_SESSION_JOURNAL_ENTRIES = int(os.getenv("FEELEASE_MAX_SESSION_JOURNAL", "100"))
+MAX_SESSION_MOODS = int(os.getenv("FEELEASE_MAX_SESSION_MOODS", "5000"))
+# Sessions without a full script run for this long release their in-memory history
+SESSION_IDLE_SECONDS = int(os.getenv("FEELEASE_SESSION_IDLE_SECONDS", "1800"))
+
+@st.cache_resource
+def get_storage():
+    """One SQLite (WAL) storage layer per process. None if the database can't be opened."""
+    try:
+        return Storage()
+    except (sqlite3.Error, OSError):
+        return None
+
+def user_storage():
+    """Returns the storage layer once the user is known, else None."""
+    if not st.session_state.user_id:
+        return None
+    return get_storage()
+
+def load_history(storage, user_id, unsaved_messages=()):
+    """Loads a recent window of saved history into the session."""
+    st.session_state.messages = storage.recent_messages(user_id, HISTORY_MESSAGES) + list(unsaved_messages)
+    st.session_state.conversation_context.reset()
+    st.session_state.mood_data = MoodSeries.from_records(
+        storage.moods_since(user_id, datetime.now().date() - timedelta(days=HISTORY_MOOD_DAYS))
+    )
+    st.session_state.mood_figure = None
+    st.session_state.export_file = None
+    st.session_state.journal_entries = storage.recent_journal(user_id, HISTORY_JOURNAL_ENTRIES)
+    st.session_state.user_goals = storage.goals(user_id)
+    st.session_state.user_memory = {**storage.memory(user_id), **st.session_state.user_memory}
+    st.session_state.verse_rotation = storage.verse_positions(user_id)
+    # Retrieval reaches further back in the journal than the session keeps in memory
+    index_history(storage.recent_journal(user_id, MAX_INDEXED_JOURNAL_ENTRIES))
+
+def index_history(journal_entries):
+    """Rebuilds the retrieval index from the session's memories and goals and the given journal entries."""
+    index = st.session_state.memory_index
+    index.clear()
+    for key, data in st.session_state.user_memory.items():
+        index.add(("memory", key), memory_line(key, data["value"], data["timestamp"]))
+    for entry in journal_entries:
+        index.add(journal_key(entry), journal_line(entry))
+    for goal in st.session_state.user_goals:
+        index.add(goal_key(goal), goal_line(goal))
+
+def load_user(name, age, faith, passphrase):
+    """Identifies the user and loads a recent window of their saved history.
+
+    Without a passphrase nothing is saved: the conversation lives only in this
+    session, since a name alone must never unlock stored history.
+    """
+    st.session_state.user_id = user_key(name, passphrase) if passphrase else None
+    storage = user_storage()
+    if storage is None:
+        return
+    user_id = st.session_state.user_id
+    try:
+        storage.upsert_user(user_id, name, age, faith)
+        st.session_state.streak_counter = storage.touch_streak(user_id, datetime.now().date())
+        # Messages sent before the user introduced themselves were never saved
+        load_history(storage, user_id, unsaved_messages=st.session_state.messages)
+    except sqlite3.Error as e:
+        st.warning(f"Could not load your saved history: {e}")
+
+def enforce_session_caps():
+    """Keeps this session's in-memory history bounded.
+
+    Dropped items remain in storage; an anonymous session has none, so its
+    oldest items are simply gone. Otherwise one long anonymous chat could grow
+    without bound.
+    """
+    messages = st.session_state.messages
+
+    def drop_messages(count):
+        st.session_state.conversation_context.drop_oldest(messages, count)
+        del messages[:count]
+
+    trim_oldest(messages, MAX_SESSION_MESSAGES, drop=drop_messages)
+    trim_oldest(st.session_state.journal_entries, MAX_SESSION_JOURNAL_ENTRIES)
+    trim_oldest(st.session_state.mood_data, MAX_SESSION_MOODS, drop=st.session_state.mood_data.drop_oldest)
+
+@st.cache_resource
+def get_session_registry():
+    """Tracks activity of every session in this process to release idle ones."""
+    return SessionRegistry(idle_seconds=SESSION_IDLE_SECONDS)
+
+def track_session_activity():
+    """Marks this session active; reloads its history if it was released while idle.
+
+    Anonymous sessions are released too, and come back empty: their history was never saved.
+    """
+    storage = user_storage()
+    # The registry can't reach this session's st.session_state, so it gets the containers to empty
+    messages = st.session_state.messages
+    journal_entries = st.session_state.journal_entries
+    user_goals = st.session_state.user_goals
+    mood_data = st.session_state.mood_data
+    conversation_context = st.session_state.conversation_context
+    memory_index = st.session_state.memory_index
+
+    def release():
+        messages.clear()
+        journal_entries.clear()
+        user_goals.clear()
+        mood_data.clear()
+        conversation_context.reset()
+        memory_index.clear()
+
+    if not get_session_registry().touch(st.session_state.session_id, release):
+        return
+    if storage is None:
+        st.info("This conversation was cleared after being idle. Set a passphrase to keep your history.")
+        return
+    try:
+        load_history(storage, st.session_state.user_id)
+    except sqlite3.Error as e:
+        st.warning(f"Could not load your saved history: {e}")
+
+track_session_activity()
+
 # === Daily Streak Logic ===
 if st.session_state.last_seen_date != datetime.now().date():
     today = datetime.now().date()
     yesterday = today - timedelta(days=1)
-    if st.session_state.last_seen_date == yesterday:
+    if user_storage():
+        st.session_state.streak_counter = user_storage().touch_streak(st.session_state.user_id, today)
+    elif st.session_state.last_seen_date == yesterday:
         st.session_state.streak_counter += 1
     else:
         st.session_state.streak_counter = 1
@@ -201,32 +468,281 @@ def run_breathing_session():
     st.session_state.breath_timer = True
     st.session_state.stop_clicked = False
     st.session_state.breathing_start_time = time.time()
-    
-def get_conversation_history_as_text():
-    """Generates a text file from the conversation history."""
-    history = ""
-    for message in st.session_state.messages:
-        role = "User" if message["role"] == "user" else "Bot"
-        history += f"**{role}:** {message['content']}\n\n"
-    return history
+
+# The timers below are fragments: each tick reruns only the fragment, not the
+# whole script, so a running timer doesn't re-render the chat or re-translate
+# the sidebar every second.
+@st.fragment(run_every=1)
+def breathing_session():
+    """Renders the breathing phase and progress, refreshed once a second."""
+    st.session_state.fragment_runs += 1
+    placeholder = st.empty()
+    stop_col = st.empty()
+    progress_bar = st.progress(0)
+
+    if stop_col.button("❌ Stop Timer", key="inner_stop"):
+        st.session_state.breath_timer = False
+        st.rerun()
+
+    duration = 300 # 5-minute session
+    elapsed = int(time.time() - st.session_state.breathing_start_time)
+
+    if elapsed >= duration:
+        placeholder.markdown("✅ <h3 style='text-align:center;'>Session Complete</h3>", unsafe_allow_html=True)
+        progress_bar.progress(1.0)
+        st.session_state.breath_timer = False
+    else:
+        percent = min(elapsed / duration, 1.0)
+        progress_bar.progress(percent)
+
+        # Determine the current phase of the breathing cycle
+        phase_time = elapsed % 12
+        if phase_time >= 0 and phase_time < 4:
+            placeholder.markdown(f"<h2 style='text-align:center;'>🌬️ Inhale</h2>", unsafe_allow_html=True)
+        elif phase_time >= 4 and phase_time < 8:
+            placeholder.markdown(f"<h2 style='text-align:center;'>✋ Hold</h2>", unsafe_allow_html=True)
+        else:
+            placeholder.markdown(f"<h2 style='text-align:center;'>😌 Exhale</h2>", unsafe_allow_html=True)
+
+@st.fragment(run_every=1)
+def session_timer():
+    """Renders the sidebar session timer, refreshed once a second."""
+    st.session_state.fragment_runs += 1
+    elapsed = int(time.time() - st.session_state.timer_started)
+    st.markdown(tr("🕒 Time spent in session: {minutes} min {seconds} sec", st.session_state.language, minutes=elapsed // 60, seconds=elapsed % 60))
+
+def is_admin():
+    """True when the app was opened with ?admin=<FEELEASE_ADMIN_TOKEN>."""
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(st.query_params.get("admin", ""), ADMIN_TOKEN)
+
+def markdown_table(header, rows):
+    """Renders rows as a Markdown table (no pandas/pyarrow needed, unlike st.dataframe)."""
+    lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+    for row in rows:
+        lines.append("| " + " | ".join("–" if v is None else f"{v:.1f}" if isinstance(v, float) else str(v)
+                                       for v in row) + " |")
+    return "\n".join(lines)
+
+def performance_panel():
+    """Admin-only sidebar panel: recent span percentiles and counters for this process."""
+    snapshot = get_telemetry().snapshot()
+    http = get_http_client().stats()
+    with st.expander("📊 Performance"):
+        st.caption("This server process, all sessions. Times in ms; percentiles cover the most recent spans of each kind.")
+        if snapshot["spans"]:
+            st.markdown(markdown_table(
+                ["span", "n", "p50", "p95", "p99", "max"],
+                [(row["span"], row["count"], row["p50_ms"], row["p95_ms"], row["p99_ms"], row["max_ms"])
+                 for row in snapshot["spans"]],
+            ))
+        counters = {
+            **snapshot["counters"],
+            **{f"chat.{key}": value for key, value in get_chat_executor().stats.items()},
+            **{f"rate_limit.{key}": value for key, value in get_rate_limiter().stats.items()},
+            **{f"duplicates.{key}": value for key, value in get_duplicate_filter().stats.items()},
+            **{f"sessions.{key}": value for key, value in get_session_registry().stats.items()},
+            **{f"model.{key}": value for key, value in get_model_router().stats.items()},
+            **{f"http.{key}": value for key, value in http.items() if key not in ("pools", "breakers")},
+            **{f"translation.{key}": value for key, value in get_translation_cache().stats().items()},
+        }
+        st.markdown(markdown_table(["counter", "value"], counters.items()))
+        if http["breakers"]:
+            st.caption("Circuit breakers per upstream; failures are consecutive.")
+            st.markdown(markdown_table(
+                ["upstream", "state", "failures", "times opened"],
+                [(name, row["state"], row["failures"], row["times_opened"]) for name, row in sorted(http["breakers"].items())],
+            ))
+        if http["pools"]:
+            st.caption("Connection pools: connections opened vs. requests sent over them.")
+            st.markdown(markdown_table(
+                ["pool", "opened", "requests", "idle"],
+                [(pool, row["connections_opened"], row["requests"], row["idle"]) for pool, row in sorted(http["pools"].items())],
+            ))
+        latency = get_model_router().latency()
+        if latency:
+            st.caption("Time to first token per model, including attempts that lost a hedge race.")
+            st.markdown(markdown_table(
+                ["model", "n", "p50", "p95", "max"],
+                [(model, row["count"], row["p50_ms"], row["p95_ms"], row["max_ms"]) for model, row in latency.items()],
+            ))
+
+def prepare_export(fmt):
+    """Builds the export file only when asked; returning users get their full saved history."""
+    storage = user_storage()
+    with get_telemetry().span("export", format=fmt, source="storage" if storage else "session") as span:
+        try:
+            if storage:
+                user_id = st.session_state.user_id
+                data = export.build_export(fmt, storage.iter_messages(user_id), storage.iter_journal(user_id),
+                                           storage.iter_moods(user_id), st.session_state.user_goals)
+            else:
+                data = export.build_export(fmt, st.session_state.messages, st.session_state.journal_entries,
+                                           st.session_state.mood_data, st.session_state.user_goals)
+        except sqlite3.Error as e:
+            span.attrs["error"] = type(e).__name__
+            st.warning(f"Could not read your saved history: {e}")
+            return
+        span.attrs["bytes"] = len(data)
+    st.session_state.export_file = {"format": fmt, "data": data}
+
+@st.cache_resource
+def get_http_client():
+    """One pooled, retrying HTTP client per process for Gemini and translation calls."""
+    return HttpClient()
+
+# Model calls allowed in flight at once across all sessions; later turns wait their turn.
+MAX_MODEL_CALLS = int(os.getenv("FEELEASE_MAX_MODEL_CALLS", "8"))
+
+@st.cache_resource
+def get_chat_executor():
+    """One bounded pool per process runs every session's chat turns."""
+    return ChatJobExecutor(max_concurrent=MAX_MODEL_CALLS)
+
+# Model calls each session, and the whole process, may start per minute, with bursts of up to *_BURST
+SESSION_TURNS_PER_MINUTE = float(os.getenv("FEELEASE_SESSION_TURNS_PER_MINUTE", "10"))
+SESSION_TURNS_BURST = int(os.getenv("FEELEASE_SESSION_TURNS_BURST", "5"))
+PROCESS_TURNS_PER_MINUTE = float(os.getenv("FEELEASE_PROCESS_TURNS_PER_MINUTE", "300"))
+PROCESS_TURNS_BURST = int(os.getenv("FEELEASE_PROCESS_TURNS_BURST", "30"))
+# The same prompt submitted again by a session within this many seconds is dropped
+DUPLICATE_WINDOW_SECONDS = float(os.getenv("FEELEASE_DUPLICATE_WINDOW_SECONDS", "3"))
+
+@st.cache_resource
+def get_rate_limiter():
+    """Per-session and per-process token buckets for model calls."""
+    return RateLimiter(SESSION_TURNS_PER_MINUTE, SESSION_TURNS_BURST, PROCESS_TURNS_PER_MINUTE, PROCESS_TURNS_BURST)
+
+@st.cache_resource
+def get_duplicate_filter():
+    """Recently submitted prompts of every session, to drop double submits."""
+    return DuplicateFilter(DUPLICATE_WINDOW_SECONDS)
+
+# Short, low-risk turns go to GEMINI_FAST_MODEL and the rest to GEMINI_MODEL; FEELEASE_MODEL_ROUTING=0
+# sends every turn to GEMINI_MODEL. A turn that fails on its model falls back to the other one, and with
+# FEELEASE_HEDGE=1 the other model is also raced when the first token is slower than its recent p95.
+MODEL_ROUTING = os.getenv("FEELEASE_MODEL_ROUTING", "1") != "0"
+HEDGE_REQUESTS = os.getenv("FEELEASE_HEDGE", "0") == "1"
+# Seconds the first model gets (without retries) before the turn falls back to the other model
+FIRST_ATTEMPT_TIMEOUT = float(os.getenv("FEELEASE_FIRST_ATTEMPT_TIMEOUT", "8"))
+MODEL_TIMEOUT = 20
+
+@st.cache_resource
+def get_model_router():
+    """One router per process; it keeps every model's recent time to first token."""
+    return ModelRouter(gemini.FAST_MODEL if MODEL_ROUTING else gemini.MODEL, gemini.MODEL, hedge=HEDGE_REQUESTS)
+
+@st.cache_resource
+def get_translator_retry_errors():
+    """Translator failures worth retrying; anything else (e.g. bad input) fails immediately."""
+    from deep_translator.exceptions import RequestError, TooManyRequests
+
+    return (requests.exceptions.RequestException, RequestError, TooManyRequests)
+
+@st.cache_resource
+def get_translation_cache():
+    """One translation cache per process, shared by every session."""
+    return TranslationCache()
+
+@st.cache_resource
+def get_translators():
+    """GoogleTranslators reused per thread and language pair; an instance is not safe to share between threads."""
+    from deep_translator import GoogleTranslator
+
+    return PerThreadTranslators(lambda source, target: GoogleTranslator(source=source, target=target))
+
+def get_text_translator(target_lang):
+    """Returns a text -> translated text function for a target language.
+
+    The cached resources are looked up here, so the returned function can also
+    run on worker threads that have no Streamlit script context.
+    """
+    if target_lang == "English":
+        return lambda text: text
+    target = language_codes.get(target_lang, 'en')
+    translators = get_translators()
+    retry_errors = get_translator_retry_errors()
+    client = get_http_client()
+    cache = get_translation_cache()
+    telemetry = get_telemetry()
+
+    def translate_text(text):
+        if not text:
+            return text
+        # Spans are named translate.hit / translate.miss so the two get separate percentiles
+        with telemetry.span("translate.hit", target=target) as span:
+            def translate(value):
+                span.name = "translate.miss"
+                # Looked up here, on the thread doing the translating
+                translator = translators.get('en', target)
+                return client.call("translate.google.com", translator.translate, value, retry_on=retry_errors)
+
+            try:
+                return cache.get_or_translate(text, 'en', target, translate)
+            except Exception as e:
+                # Translator is down, its circuit is open, or it rejected the text (e.g. deep_translator's
+                # NotValidLength, TranslationNotFound): show the English text rather than failing the turn.
+                span.attrs["error"] = type(e).__name__
+                return text
+
+    return translate_text
 
 def translate_text(text, target_lang):
     """Translates text to a target language using deep_translator."""
-    if target_lang == "English":
+    if target_lang == "English" or not text:
         return text
-    translator = GoogleTranslator(source='en', target=language_codes.get(target_lang, 'en'))
-    return translator.translate(text)
+    return get_text_translator(target_lang)(text)
+
+@st.cache_resource
+def get_catalog():
+    """Loads the precompiled UI string catalog once per process."""
+    return load_catalog()
+
+def tr(msgid, target_lang, **kwargs):
+    """Renders a static UI string from the catalog, falling back to machine translation.
+
+    Placeholders such as {minutes} are filled after lookup, so changing values
+    never produce a new catalog or cache key. Run build_catalogs.py after
+    adding or editing a tr() string.
+    """
+    rendered = get_catalog().gettext(msgid, language_codes.get(target_lang, 'en'), **kwargs)
+    if rendered is not None:
+        return rendered
+    return translate_text(msgid.format(**kwargs) if kwargs else msgid, target_lang)
+
+# Optionally warm the audio cache when the process starts (FEELEASE_TTS_PRERENDER=1).
+# Otherwise pre-rendering starts with the first "Hear Response", keeping pyttsx3 off the cold-start path.
+if TTS_MODE == "browser" and os.getenv("FEELEASE_TTS_PRERENDER", "0") == "1":
+    get_audio_renderer()
 
 # === Microphone Input Function ===
 def handle_microphone():
-    """Handle microphone input and process the speech."""
+    """Start listening in the background; voice_status() picks up the result."""
     st.session_state.listening = True
-    with st.spinner(translate_text("🎙️ Listening... Speak now", st.session_state.language)):
-        recognized_text = recognize_voice()
-        if recognized_text:
-            st.session_state.text_input = recognized_text  # This should work now
-            handle_prompt_submit()
-        st.session_state.listening = False
+    st.session_state.voice_job = get_voice_capture().submit(speech_language_codes.get(st.session_state.language, "en-IN"))
+
+@st.fragment(run_every=0.5)
+def voice_status():
+    """Polls the background voice capture without re-running the whole page."""
+    job = st.session_state.voice_job
+    if job is None:
+        return
+    if not job.done():
+        st.info(tr("🎙️ Listening... Speak now", st.session_state.language))
+        return
+    result = job.result()
+    telemetry = get_telemetry()
+    if result["listen_seconds"]:
+        telemetry.record("voice.listen", result["listen_seconds"])
+    if result["recognize_seconds"]:
+        telemetry.record("voice.recognize", result["recognize_seconds"], engine=STT_ENGINE)
+    if result["error"]:
+        telemetry.count("voice.errors")
+    st.session_state.voice_job = None
+    st.session_state.listening = False
+    if result["text"]:
+        st.session_state.voice_prompt = result["text"]
+    else:
+        st.session_state.voice_error = result["error"]
+    st.rerun()
 
 # === Age Validation Function ===
 def validate_age(age_str):
@@ -246,80 +762,168 @@ def validate_age(age_str):
 def add_mood_rating(rating, emoji):
     """Add a mood rating to the session state."""
     timestamp = datetime.now()
-    st.session_state.mood_data.append({
-        "timestamp": timestamp,
-        "rating": rating,
-        "emoji": emoji,
-        "date": timestamp.date()
-    })
+    st.session_state.mood_data.append(timestamp, rating, emoji)
+    st.session_state.mood_figure = None
+    st.session_state.export_file = None
+    if user_storage():
+        user_storage().add_mood(st.session_state.user_id, rating, emoji, timestamp)
+    enforce_session_caps()
 
 def visualize_mood_data():
-    """Create a visualization of the mood data."""
+    """Create a visualization of the mood data, rebuilt only after a new rating."""
     if not st.session_state.mood_data:
         return None
-    
-    df = pd.DataFrame(st.session_state.mood_data)
-    df['date_str'] = df['timestamp'].dt.strftime('%Y-%m-%d')
-    
-    # Create a line chart
-    fig = px.line(df, x='date_str', y='rating', 
-                  title='Your Mood Over Time',
-                  labels={'date_str': 'Date', 'rating': 'Mood Rating'})
-    
-    # Add emoji markers
-    for i, row in df.iterrows():
-        fig.add_annotation(x=row['date_str'], y=row['rating'],
-                           text=row['emoji'], showarrow=False,
-                           yshift=25)
-    
-    return fig
+    if st.session_state.mood_figure is None:
+        with get_telemetry().span("mood_chart.build", points=len(st.session_state.mood_data)):
+            st.session_state.mood_figure = build_mood_figure(st.session_state.mood_data)
+    else:
+        get_telemetry().count("mood_chart.reused")
+    return st.session_state.mood_figure
 
 # === Journaling Functions ===
+def journal_key(entry):
+    """Retrieval index key; entries not saved to storage have no id."""
+    return ("journal", entry.get("id", entry["timestamp"]))
+
 def add_journal_entry(entry_text, prompt=""):
     """Add a journal entry to the session state."""
     timestamp = datetime.now()
-    st.session_state.journal_entries.append({
+    entry = {
         "timestamp": timestamp,
         "entry": entry_text,
         "prompt": prompt
-    })
+    }
+    if user_storage():
+        entry["id"] = user_storage().add_journal_entry(st.session_state.user_id, entry_text, prompt, timestamp)
+    st.session_state.journal_entries.append(entry)
+    st.session_state.memory_index.add(journal_key(entry), journal_line(entry))
+    st.session_state.export_file = None
+    enforce_session_caps()
+
+JOURNAL_SEARCH_PAGE_SIZE = 5
+
+def turn_journal_search_page(step):
+    search, page = st.session_state.journal_search
+    st.session_state.journal_search = (search, max(0, page + step))
+
+def journal_search(storage, journal_prompts):
+    """Searches the user's saved journal: ranked snippets, filtered by prompt and dates, a page at a time."""
+    query = st.text_input("Search your entries", key="journal_query")
+    any_prompt, no_prompt = "Any prompt", "No prompt"
+    prompt = st.selectbox("Prompt", [any_prompt, no_prompt] + journal_prompts, key="journal_query_prompt")
+    dates = st.date_input("Written between", value=(), key="journal_query_dates")
+    if not query.strip():
+        return
+    search = (query, prompt, tuple(dates))
+    if st.session_state.journal_search[0] != search:
+        st.session_state.journal_search = (search, 0)  # New search: back to the first page
+    page = st.session_state.journal_search[1]
+    with get_telemetry().span("journal.search", page=page) as span:
+        results, has_more = storage.search_journal(
+            st.session_state.user_id, query,
+            prompt={any_prompt: None, no_prompt: ""}.get(prompt, prompt),
+            since=dates[0] if dates else None,
+            until=dates[1] if len(dates) > 1 else None,
+            page=page, page_size=JOURNAL_SEARCH_PAGE_SIZE,
+        )
+        span.attrs["results"] = len(results)
+    if not results:
+        st.caption("No matching entries.")
+    for result in results:
+        heading = f"**{result['timestamp']:%d %b %Y}**" + (f" · _{result['prompt']}_" if result["prompt"] else "")
+        st.markdown(f"{heading}\n\n{result['snippet']}")
+    previous_col, next_col = st.columns(2)
+    previous_col.button("← Previous", key="journal_search_previous", disabled=page == 0,
+                        on_click=turn_journal_search_page, args=(-1,))
+    next_col.button("More →", key="journal_search_next", disabled=not has_more,
+                    on_click=turn_journal_search_page, args=(1,))
 
 # === Goal Setting Functions ===
+def goal_key(goal):
+    return ("goal", goal.get("id", goal["created"]))
+
 def add_goal(goal_text, category="Wellness"):
     """Add a goal to the session state."""
-    st.session_state.user_goals.append({
+    goal = {
         "goal": goal_text,
         "category": category,
         "created": datetime.now(),
         "completed": False,
         "completed_date": None
-    })
+    }
+    if user_storage():
+        goal["id"] = user_storage().add_goal(st.session_state.user_id, goal_text, category, goal["created"])
+    st.session_state.user_goals.append(goal)
+    st.session_state.memory_index.add(goal_key(goal), goal_line(goal))
+    st.session_state.export_file = None
 
 def update_goal_completion(goal_index, completed):
     """Update the completion status of a goal."""
     if 0 <= goal_index < len(st.session_state.user_goals):
-        st.session_state.user_goals[goal_index]["completed"] = completed
+        goal = st.session_state.user_goals[goal_index]
+        goal["completed"] = completed
         if completed:
-            st.session_state.user_goals[goal_index]["completed_date"] = datetime.now()
+            goal["completed_date"] = datetime.now()
+        st.session_state.memory_index.add(goal_key(goal), goal_line(goal))
+        st.session_state.export_file = None
+        if user_storage() and "id" in goal:
+            user_storage().set_goal_completed(goal["id"], completed, goal["completed_date"] if completed else None)
 
 # === Memory Functions ===
 def update_user_memory(key, value):
     """Update the user's memory with a key-value pair."""
+    timestamp = datetime.now()
     st.session_state.user_memory[key] = {
         "value": value,
-        "timestamp": datetime.now()
+        "timestamp": timestamp
     }
+    st.session_state.memory_index.add(("memory", key), memory_line(key, value, timestamp))
+    if user_storage():
+        user_storage().set_memory(st.session_state.user_id, key, value, timestamp)
 
-def get_user_memory_context():
-    """Generate context from user memory for the AI."""
-    if not st.session_state.user_memory:
-        return ""
-    
-    context = "Here's what I remember about the user:\n"
-    for key, data in st.session_state.user_memory.items():
-        context += f"- {key}: {data['value']} (mentioned on {data['timestamp'].strftime('%Y-%m-%d')})\n"
-    
-    return context
+# === Verse Functions ===
+def pick_verse(prompt):
+    """Next verse from the user's tradition for a sad, lonely, anxious, angry or hopeless message, else None."""
+    library = get_verse_library()
+    faith = st.session_state.user_faith
+    if faith not in library.faiths:
+        return None
+    emotion = detect_emotion(get_sentiment_detector().matches(prompt))
+    if emotion is None:
+        return None
+    group = library.group(faith, emotion)
+    position = st.session_state.verse_rotation.get(group, 0)
+    verse = library.pick(st.session_state.user_id or "", group, position)
+    st.session_state.verse_rotation[group] = position + 1
+    if user_storage():
+        user_storage().set_verse_position(st.session_state.user_id, group, position + 1)
+    get_telemetry().count("verses.shown")
+    return verse
+
+def verse_markdown(verse, language):
+    """The verse as a chat message: the original (if any), the text in the user's language, and its source."""
+    text, needs_translation = get_verse_library().text(verse, language_codes[language])
+    if needs_translation:
+        text = translate_text(text, language)
+    original = f"{verse['original']}\n\n" if verse.get("original") else ""
+    return f"🙏 {original}*{text}*\n\n— {verse['source']}"
+
+# === Chat Log Functions ===
+def append_message(role, content):
+    """Add a chat message to the session state and persist it for returning users."""
+    timestamp = datetime.now()
+    st.session_state.messages.append({"role": role, "content": content, "timestamp": timestamp})
+    st.session_state.export_file = None
+    if user_storage():
+        user_storage().append_message(st.session_state.user_id, role, content, timestamp)
+    enforce_session_caps()
+
+def get_user_memory_context(prompt=""):
+    """Context for the AI: profile memories, then the memories, journal entries and goals most relevant to the prompt."""
+    index = st.session_state.memory_index
+    with get_telemetry().span("memory.retrieve", items=len(index)):
+        return index.context(prompt, MEMORY_CONTEXT_TOKENS, MEMORY_CONTEXT_ITEMS,
+                             pinned=[("memory", key) for key in PINNED_MEMORIES])
 
 # === Main App UI and Logic ===
 # Header
@@ -334,37 +938,42 @@ if st.session_state.user_name and st.session_state.age_valid:
 else:
     with st.expander("👤 Start by telling me about yourself", expanded=True):
         st.info("The chatbot is not accessing your local information. The suggestions you see in the input box are from your browser's auto-fill feature.")
-        name = st.text_input("Your Name", placeholder="e.g., Jane Doe")
-        age_str = st.text_input("Your Age", placeholder="e.g., 25", key="age_input")
-        faith = st.selectbox(
-            "Your Faith", 
-            ["Not specified", "Hinduism", "Christianity", "Jainism", "Buddhism", "Atheist", "None"]
-        )
-        
-        # Age validation
-        if age_str:
-            is_valid, message = validate_age(age_str)
-            if is_valid:
+        # A form, so nothing happens until "Start chatting": logging in as soon as name and age were
+        # valid used to skip the passphrase field below them.
+        with st.form("intro_form"):
+            name = st.text_input("Your Name", placeholder="e.g., Jane Doe", key="name_input")
+            age_str = st.text_input("Your Age", placeholder="e.g., 25", key="age_input")
+            passphrase = st.text_input(
+                "Passphrase (to save your history)", type="password", key="passphrase_input",
+                help="Your chats, moods, journal and goals are saved under your name together with this passphrase, "
+                     "so only someone who knows both can open them. Use the same passphrase next time to continue."
+            )
+            st.caption("Without a passphrase nothing is saved: the conversation ends when you close the page. "
+                       "Your name alone never opens saved history.")
+            faith = st.selectbox(
+                "Your Faith",
+                ["Not specified", "Hinduism", "Christianity", "Jainism", "Buddhism", "Atheist", "None"]
+            )
+            submitted = st.form_submit_button("Start chatting")
+
+        if submitted:
+            is_valid, message = validate_age(age_str.strip()) if age_str.strip() else (False, "Please enter your age.")
+            if not name.strip():
+                st.warning("Please enter your name to proceed.")
+            elif not is_valid:
+                st.warning(message)
+            elif passphrase and len(passphrase) < MIN_PASSPHRASE_LENGTH:
+                st.warning(f"Please use a passphrase of at least {MIN_PASSPHRASE_LENGTH} characters, or leave it empty.")
+            else:
                 st.session_state.user_age = int(age_str.strip())
                 st.session_state.age_valid = True
-                st.success("✓ Age validated")
-            else:
-                st.warning(message)
-                st.session_state.age_valid = False
-        else:
-            st.session_state.age_valid = False
-            
-        if name.strip() and st.session_state.age_valid:
-            st.session_state.user_name = name.strip()
-            st.session_state.user_faith = faith
-            update_user_memory("name", name.strip())
-            update_user_memory("age", st.session_state.user_age)
-            update_user_memory("faith", faith)
-            st.success(f"Welcome, {name}! Let's talk.")
-        elif name.strip() and not st.session_state.age_valid:
-            st.warning("Please enter a valid age to proceed.")
-        else:
-            st.warning("Please enter your name to proceed.")
+                st.session_state.user_name = name.strip()
+                st.session_state.user_faith = faith
+                load_user(name.strip(), st.session_state.user_age, faith, passphrase)
+                update_user_memory("name", name.strip())
+                update_user_memory("age", st.session_state.user_age)
+                update_user_memory("faith", faith)
+                st.success(f"Welcome, {name.strip()}! Let's talk.")
 
 st.markdown("---")
 
@@ -387,157 +996,290 @@ if st.session_state.user_name and st.session_state.user_age and st.session_state
                     personalized_welcome = f"Hello {st.session_state.user_name}! How is your work/project going today?"
                     break
         
-        st.session_state.messages.append({"role": "assistant", "content": personalized_welcome})
+        append_message("assistant", personalized_welcome)
 
-    # Loop through and display the chat messages stored in the session state.
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    # Display the newest chat messages; older ones are paged in on demand.
+    def load_earlier_messages():
+        st.session_state.transcript_window += transcript.PAGE_SIZE
+
+    hidden = transcript.window_start(len(st.session_state.messages), st.session_state.transcript_window)
+    transcript.render_transcript(
+        st.session_state.messages,
+        st.session_state.transcript_window,
+        load_earlier_label=tr("⬆️ Load earlier messages ({count} more)", st.session_state.language, count=hidden) if hidden else None,
+        on_load_earlier=load_earlier_messages,
+    )
             
     # Display the breathing session if it's active
     if st.session_state.breath_timer:
-        placeholder = st.empty()
-        stop_col = st.empty()
-        progress_bar = st.progress(0)
-        
-        if stop_col.button("❌ Stop Timer", key="inner_stop"):
-            st.session_state.breath_timer = False
-            st.rerun()
-            
-        duration = 300 # 5-minute session
-        elapsed = int(time.time() - st.session_state.breathing_start_time)
-        
-        if elapsed >= duration:
-            placeholder.markdown("✅ <h3 style='text-align:center;'>Session Complete</h3>", unsafe_allow_html=True)
-            progress_bar.progress(1.0)
-            st.session_state.breath_timer = False
-        else:
-            percent = min(elapsed / duration, 1.0)
-            progress_bar.progress(percent)
-            
-            # Determine the current phase of the breathing cycle
-            phase_time = elapsed % 12
-            if phase_time >= 0 and phase_time < 4:
-                placeholder.markdown(f"<h2 style='text-align:center;'>🌬️ Inhale</h2>", unsafe_allow_html=True)
-            elif phase_time >= 4 and phase_time < 8:
-                placeholder.markdown(f"<h2 style='text-align:center;'>✋ Hold</h2>", unsafe_allow_html=True)
-            else:
-                placeholder.markdown(f"<h2 style='text-align:center;'>😌 Exhale</h2>", unsafe_allow_html=True)
-                
-            time.sleep(1)
-            st.rerun()
+        breathing_session()
 
     # === Function to get a response from the Gemini API ===
-    def get_gemini_response(prompt):
+    def build_gemini_payload(prompt, models):
+        """Builds the serialized generateContent request body for a prompt, per model."""
         chat_history = st.session_state.hidden_history.copy()
         
         # Add memory context to the prompt
-        memory_context = get_user_memory_context()
+        memory_context = get_user_memory_context(prompt)
         if memory_context:
             enhanced_prompt = f"{memory_context}\n\nUser: {prompt}"
         else:
             enhanced_prompt = prompt
-            
-        # Add a specific instruction for religious verses if a negative emotion is detected
-        negative_keywords = ["sad", "angry", "lonely", "stressed", "depressed", "low", "hopeless"]
-        if any(kw in prompt.lower() for kw in negative_keywords) and st.session_state.user_faith and st.session_state.user_faith not in ["Not specified", "Atheist", "None"]:
-            faith_message = f"The user's faith is {st.session_state.user_faith}. The user may be comforted by a relevant and positive verse from their holy book for their mood. Please provide one."
-            chat_history.append({"role": "user", "parts": [{"text": faith_message}]})
-
-        for m in st.session_state.messages:
-            role = "user" if m["role"] == "user" else "model"
-            chat_history.append({"role": role, "parts": [{"text": m["content"]}]})
+
+
+        # handle_prompt_submit has already logged the prompt, it is re-sent below with memory context
+        history = st.session_state.messages
+        if history and history[-1]["role"] == "user" and history[-1]["content"] == prompt:
+            history = history[:-1]
+        chat_history.extend(st.session_state.conversation_context.build(history))
         chat_history.append({"role": "user", "parts": [{"text": enhanced_prompt}]})
-        payload = {"contents": chat_history}
-        
-        try:
-            response = requests.post(
-                API_URL, 
+        builder = get_request_builder()
+        body, info = builder.build(chat_history, models[0])
+        st.session_state.last_payload_info = info
+        # A cachedContent handle only works with its own model; other bodies are the same otherwise
+        return {
+            model: builder.build(chat_history, model)[0] if info["cached"] and model != models[0] else body
+            for model in models
+        }
+
+    def fetch_reply(job, route, bodies, translate, post, router, telemetry):
+        """Runs on the chat executor: calls Gemini and translates the reply.
+
+        There is no script context on this thread, so it must not touch st.*:
+        `translate` (None for English), `post`, `router` and `telemetry` are
+        resolved by submit_chat_turn, and the reply so far is published through
+        job.partial. The router picks the model that answers (`route` names the
+        first choice, `bodies` holds the request body per model). When
+        streaming, each completed sentence is translated as soon as it arrives.
+        """
+        result = {"text": "", "error": None, "timing": {}}
+        shown = ""
+        started = time.perf_counter()
+        streams, elapsed = {}, {}
+
+        def open_reply(model):
+            # With another model to fall back to, the first one gets less time and no retries
+            first_try = model == route["model"] and route["alternate"] is not None
+            model_post = partial(post, upstream=f"gemini/{model}", retries=0 if first_try else None)
+            timeout = FIRST_ATTEMPT_TIMEOUT if first_try else MODEL_TIMEOUT
+            if STREAM_RESPONSES:
+                stream = streams[model] = gemini.GeminiStream(bodies[model], api_key, timeout=timeout,
+                                                              post=model_post, model=model)
+                return iter(stream)
+            return complete_reply(model, model_post, timeout)
+
+        def complete_reply(model, model_post, timeout):
+            response = model_post(
+                gemini.model_url("generateContent", api_key, model),
                 headers={'Content-Type': 'application/json'},
-                data=json.dumps(payload),
-                timeout=20
+                data=bodies[model],
+                timeout=timeout
             )
             response.raise_for_status()
-            result = response.json()
-            text = result['candidates'][0]['content']['parts'][0]['text']
-            return text
+            # elapsed runs until the response headers were parsed (last attempt only)
+            elapsed[model] = response.elapsed.total_seconds()
+            yield response.json()['candidates'][0]['content']['parts'][0]['text']
+
+        try:
+            model, chunks, info = router.start(route, open_reply)
+            # From the start of the turn, so a fallback or hedge counts the time lost on the first model
+            first_token = time.perf_counter() - started
+            if STREAM_RESPONSES:
+                pending = ""
+                try:
+                    for chunk in chunks:
+                        if translate is None:
+                            shown += chunk
+                        else:
+                            pending += chunk
+                            done, pending = gemini.split_sentences(pending)
+                            if done.strip():
+                                # Keep the sentence break (space or newline) the model used
+                                shown += translate(done.strip()) + done[len(done.rstrip()):]
+                        job.partial = shown
+                    if pending.strip():
+                        shown += translate(pending)
+                finally:
+                    result["timing"] = {"ttfb": streams[model].ttfb_seconds, "ttft": first_token,
+                                        "total": time.perf_counter() - started, "streamed": True}
+            else:
+                text = "".join(chunks)
+                total = time.perf_counter() - started
+                result["timing"] = {"ttfb": elapsed[model], "ttft": total, "total": total, "streamed": False}
+                # Translate the AI response before storing and displaying
+                shown = translate(text) if translate else text
+            result["timing"].update(model=model, tier=route["tier"], fallback=info["fallback"],
+                                    hedged=info["hedged"])
         except requests.exceptions.RequestException as e:
-            st.error(f"Network error: {e}")
-            return "Sorry, I'm having trouble connecting right now. Please check your internet connection and try again."
-        except KeyError:
-            st.error("API response format is not valid.")
-            return "Sorry, I received an invalid response from the server."
-    
+            result["error"] = f"Network error: {e}"
+            shown = "Sorry, I'm having trouble connecting right now. Please check your internet connection and try again."
+        except (KeyError, IndexError, ValueError):
+            result["error"] = "API response format is not valid."
+            shown = "Sorry, I received an invalid response from the server."
+        except Exception as e:
+            # Anything else still ends the turn with a reply, so the chat never waits on a failed job
+            result["error"] = f"Unexpected error: {type(e).__name__}: {e}"
+            shown = "Sorry, something went wrong while getting a reply. Please try again."
+        if not shown.strip():
+            shown = "Sorry, I received an invalid response from the server."
+        result["text"] = shown.strip()
+        # The routing decision goes on every model span, so latency can be split by model and tier
+        routing = {key: result["timing"][key] for key in ("model", "tier", "fallback", "hedged")
+                   if key in result["timing"]}
+        for phase in ("ttfb", "ttft", "total"):
+            if result["timing"].get(phase) is not None:
+                telemetry.record(f"gemini.{phase}", result["timing"][phase], streamed=STREAM_RESPONSES, **routing)
+        # The whole turn on the worker: model call plus translation of the reply
+        telemetry.record("chat.reply", time.perf_counter() - started,
+                         **({"error": result["error"]} if result["error"] else {}))
+        return result
+
+    def submit_chat_turn(prompt):
+        """Queues the model call for a prompt; chat_job_status() shows the reply when it lands."""
+        router = get_model_router()
+        route = router.route(prompt, get_sentiment_detector().classify(prompt))
+        bodies = build_gemini_payload(prompt, [model for model in (route["model"], route["alternate"]) if model])
+        language = st.session_state.language
+        translate = None if language == "English" else get_text_translator(language)
+        try:
+            # Keyed by what is sent upstream, so identical requests in flight share one model call
+            st.session_state.chat_job = get_chat_executor().submit(
+                request_key(bodies[route["model"]], route["model"], language), fetch_reply, route, bodies,
+                translate, get_http_client().post, router, get_telemetry(),
+            )
+        except JobQueueFull:
+            st.session_state.chat_error = "I'm getting a lot of messages right now. Please try again in a moment."
+        else:
+            st.session_state.pending_verse = pick_verse(prompt)
+
+    @st.fragment(run_every=0.5)
+    def chat_job_status():
+        """Shows the pending reply and polls for it without re-running the whole page."""
+        job = st.session_state.chat_job
+        if job is None:
+            return
+        if not job.done():
+            with st.chat_message("assistant"):
+                st.markdown(job.partial + "▌" if job.partial else tr("Thinking...", st.session_state.language))
+            return
+        # Cleared whatever the outcome, so a failed job can't keep the chat input disabled
+        st.session_state.chat_job = None
+        get_telemetry().record("chat.queued", job.queued_seconds())
+        error = job.exception()
+        if error is None:
+            result = job.result()
+            st.session_state.chat_error = result["error"]
+            st.session_state.last_response_timing = result["timing"]
+            append_message("assistant", result["text"])
+            st.session_state.last_reply = result["text"]
+        else:
+            # fetch_reply handles the failures it expects; this is anything else
+            get_telemetry().count("chat.failed")
+            st.session_state.chat_error = f"Sorry, something went wrong while getting a reply ({type(error).__name__}). Please try again."
+        if st.session_state.pending_verse is not None:
+            append_message("assistant", verse_markdown(st.session_state.pending_verse, st.session_state.language))
+            st.session_state.pending_verse = None
+        st.rerun()
+
     # New callback function to handle prompt submission
-    def handle_prompt_submit():
-        prompt = st.session_state.text_input
+    def handle_prompt_submit(prompt=None):
+        """Handles a typed prompt (chat_input callback) or a recognized voice prompt."""
+        if prompt is None:
+            prompt = st.session_state.text_input
         if prompt:
-            st.session_state.messages.append({"role": "user", "content": prompt})
+            submit_key = idempotency_key(st.session_state.session_id, prompt)
+            if not get_duplicate_filter().claim(submit_key):
+                # The same prompt was just submitted (double submit or rerun); its reply is already on the way
+                get_telemetry().count("chat.duplicates")
+                return
+            # Classified locally, so the crisis reply never waits on translation or the API
+            crisis = is_crisis_message({"role": "user", "content": prompt})
+            # Crisis messages are answered locally and never rate limited
+            wait = 0 if crisis else get_rate_limiter().acquire(st.session_state.session_id)
+            if wait:
+                get_duplicate_filter().release(submit_key)
+                get_telemetry().count("chat.rate_limited")
+                st.session_state.chat_error = tr(
+                    "You're sending messages a little too quickly. Please wait {seconds} seconds and try again.",
+                    st.session_state.language, seconds=math.ceil(wait),
+                )
+                return
+
+            append_message("user", prompt)
             
-            # Extract potential memory items from user input
-            if "my name is" in prompt.lower():
-                # Try to extract name
-                parts = prompt.lower().split("my name is")
-                if len(parts) > 1:
-                    name = parts[1].strip().split()[0].capitalize()
-                    update_user_memory("name", name)
+            # Remember what the user tells us about themselves (name, where they live, job, likes)
+            for key, value in extract_memories(prompt):
+                # Name, age and faith come from the login profile and go with every prompt; chat can't change them
+                if key not in PINNED_MEMORIES:
+                    update_user_memory(key, value)
             
-            if any(keyword in prompt.lower() for keyword in ["crisis", "emergency", "suicidal", "point anymore"]):
-                crisis_message = translate_text("""I hear you. Please don't go. I'm here for you, and I want to listen. Things can get better, and you're not alone. You can talk to me about anything that's on your mind.
-
-If you are in a crisis or experiencing an emergency, please contact a professional immediately. You can find local helplines or contact emergency services.
-
-Here are some resources:
-Vandrevala Foundation: +91 99996 66666
-Aasra: +91 98204 66726
-TISS iCALL: www.icallhelpline.org
-""", st.session_state.language)
-                st.session_state.messages.append({"role": "assistant", "content": crisis_message})
+            if crisis:
+                crisis_message = tr(CRISIS_MESSAGE, st.session_state.language)
+                append_message("assistant", crisis_message)
                 st.session_state.last_reply = crisis_message
             else:
-                with st.spinner(translate_text("Thinking...", st.session_state.language)):
-                    full_response = get_gemini_response(prompt)
-                    # Translate the AI response before storing and displaying
-                    translated_response = translate_text(full_response, st.session_state.language)
-                    st.session_state.messages.append({"role": "assistant", "content": translated_response})
-                    st.session_state.last_reply = translated_response
+                submit_chat_turn(prompt)
             
-            # Clear the input box after processing
-            st.session_state.text_input = ""
+            # st.chat_input clears itself; assigning its key would raise StreamlitAPIException
             st.rerun()
 
+    # Submit speech recognized by the background voice capture
+    if st.session_state.voice_prompt:
+        voice_prompt = st.session_state.voice_prompt
+        st.session_state.voice_prompt = None
+        st.success(f"You said: {voice_prompt}")
+        handle_prompt_submit(voice_prompt)
+
+    # Show the reply to a turn submitted by handle_prompt_submit as it arrives
+    if st.session_state.chat_job is not None:
+        chat_job_status()
+    if st.session_state.chat_error:
+        st.error(st.session_state.chat_error)
+        st.session_state.chat_error = None
+
     # Create a custom input area with microphone button
     col1, col2 = st.columns([6, 1])
     
     with col1:
         st.chat_input(
-            translate_text("How can I help you?", st.session_state.language), 
+            tr("How can I help you?", st.session_state.language), 
             on_submit=handle_prompt_submit, 
-            key="text_input"
+            key="text_input",
+            # One turn at a time per session; the next prompt waits for this reply
+            disabled=st.session_state.chat_job is not None
         )
     
     with col2:
         # Microphone button with appropriate styling
         if st.button(
             "🎤", 
-            help=translate_text("Click to speak your message", st.session_state.language),
+            help=tr("Click to speak your message", st.session_state.language),
             use_container_width=True,
-            disabled=st.session_state.listening
+            disabled=st.session_state.listening or st.session_state.chat_job is not None
         ):
             handle_microphone()
+
+    if st.session_state.voice_job is not None:
+        voice_status()
+    if st.session_state.voice_error:
+        st.warning(tr(st.session_state.voice_error, st.session_state.language))
+        st.session_state.voice_error = None
     
     # Add the 'Hear Response' button below the chat input if there's a last reply
     if st.session_state.last_reply:
         st.markdown("---")
         speak_col, stop_col = st.columns([1, 1])
         with speak_col:
-            if st.button(translate_text("🔊 Hear Response", st.session_state.language)):
-              speak_all(st.session_state.last_reply, st.session_state.voice_choice, st.session_state.get("rate", 130), st.session_state.get("pitch", 100))
+            if st.button(tr("🔊 Hear Response", st.session_state.language)):
+              speak_all(st.session_state.last_reply, st.session_state.voice_choice, st.session_state.rate, st.session_state.pitch, st.session_state.language)
 
         with stop_col:
-            if st.button(translate_text("🛑 Stop Speaking", st.session_state.language)):
+            if st.button(tr("🛑 Stop Speaking", st.session_state.language)):
                 stop_speaking()
 
+        if st.session_state.reply_audio:
+            st.audio(st.session_state.reply_audio, format=mime_type(st.session_state.reply_audio), autoplay=True)
+
 # === UI Styling and Sidebars ===
 st.markdown("""
 <style>
@@ -552,17 +1294,19 @@ input, textarea { background-color: #333; color: white; }
 
 with st.sidebar:
     # Language selection
-    st.session_state.language = st.selectbox("🌐 Choose Language", ["English", "Hindi", "Bengali"])
+    st.selectbox("🌐 Choose Language", ["English", "Hindi", "Bengali"], **kept_widget("language"))
 
     st.markdown("### 💡 Mental Health Fact")
     st.markdown("🧠 Thoughts aren't always facts. ❤️ You've survived your worst days.")
 
-    if st.button(translate_text("🧘 Start 5-Min Breathing Exercise", st.session_state.language)):
+    if st.button(tr("🧘 Start 5-Min Breathing Exercise", st.session_state.language)):
         st.session_state.timer_started = time.time()
+        run_breathing_session()
         st.rerun()
         
-    if st.button(translate_text("❌ Stop Timer", st.session_state.language), key="main_stop"):
+    if st.button(tr("❌ Stop Timer", st.session_state.language), key="main_stop"):
         st.session_state.timer_started = None
+        st.session_state.breath_timer = False
         st.rerun()
 
     st.markdown("---")
@@ -570,17 +1314,14 @@ with st.sidebar:
     st.markdown("**Inhale** for 5 sec → **Hold** for 5 sec → **Exhale** for 5 sec")
     
     st.markdown("---")
-    st.markdown(translate_text("### 📊 Session Stats", st.session_state.language))
+    st.markdown(tr("### 📊 Session Stats", st.session_state.language))
     
     if st.session_state.get("timer_started"):
-        elapsed = int(time.time() - st.session_state.timer_started)
-        st.markdown(translate_text(f"🕒 Time spent in session: {elapsed//60} min {elapsed%60} sec", st.session_state.language))
-        time.sleep(1)
-        st.rerun()
+        session_timer()
     else:
-        st.markdown(translate_text(f"🕒 Time spent in session: 0 min 0 sec", st.session_state.language))
+        st.markdown(tr("🕒 Time spent in session: {minutes} min {seconds} sec", st.session_state.language, minutes=0, seconds=0))
         
-    st.markdown(translate_text(f"🔥 **Daily Streak:** {st.session_state.streak_counter} days", st.session_state.language))
+    st.markdown(tr("🔥 **Daily Streak:** {days} days", st.session_state.language, days=st.session_state.streak_counter))
 
     st.markdown("---")
     
@@ -624,22 +1365,33 @@ with st.sidebar:
         "What would you like to let go of?"
     ]
     
-    selected_prompt = st.selectbox("Choose a journal prompt", [""] + journal_prompts)
-    journal_entry = st.text_area("Write your thoughts here", height=100, key="journal_entry")
-    
-    if st.button("Save Journal Entry", key="save_journal"):
-        if journal_entry:
-            add_journal_entry(journal_entry, selected_prompt)
-            st.success("Journal entry saved!")
+    selected_prompt = st.selectbox("Choose a journal prompt", [""] + journal_prompts, **kept_widget("journal_prompt"))
+    st.text_area("Write your thoughts here", height=100, key="journal_entry")
+
+    def save_journal_entry(prompt):
+        # A widget's value can only be cleared from a callback, before the widget is rebuilt
+        entry = st.session_state.journal_entry
+        if entry:
+            add_journal_entry(entry, prompt)
             st.session_state.journal_entry = ""  # Clear the input
+        st.session_state.journal_saved = bool(entry)
+
+    if st.button("Save Journal Entry", key="save_journal", on_click=save_journal_entry, args=(selected_prompt,)):
+        if st.session_state.journal_saved:
+            st.success("Journal entry saved!")
         else:
             st.warning("Please write something before saving.")
+
+    storage = user_storage()
+    if storage:
+        with st.expander("🔎 Search your journal"):
+            journal_search(storage, journal_prompts)
     
     st.markdown("---")
     st.markdown("### 🎯 Goal Setting")
     
     goal_categories = ["Wellness", "Social", "Productivity", "Mindfulness", "Personal Growth"]
-    goal_category = st.selectbox("Goal Category", goal_categories)
+    goal_category = st.selectbox("Goal Category", goal_categories, **kept_widget("goal_category"))
     new_goal = st.text_input("Set a new goal", key="new_goal")
     
     if st.button("Add Goal", key="add_goal"):
@@ -689,52 +1441,66 @@ with st.sidebar:
     
     # Conditionally display helpful resources in the sidebar
     if st.session_state.user_name and st.session_state.user_age and st.session_state.age_valid:
-        st.markdown(translate_text("### 🔍 Helpful Resources", st.session_state.language))
+        st.markdown(tr("### 🔍 Helpful Resources", st.session_state.language))
         # Use user's faith to customize the video search
         faith_query = st.session_state.user_faith if st.session_state.user_faith and st.session_state.user_faith not in ["Not specified", "Atheist", "None"] else "mental health"
         
-        suggestion = st.text_input(translate_text("🌐 Rephrase how you're feeling for video suggestions:", st.session_state.language))
+        suggestion = st.text_input(tr("🌐 Rephrase how you're feeling for video suggestions:", st.session_state.language),
+                                   **kept_widget("video_query"))
         query = suggestion if suggestion else f"{faith_query} support"
         search_link = f"https://www.youtube.com/results?search_query={urllib.parse.quote(query)}"
-        st.markdown(translate_text(f"🔗 [Search YouTube for '{query}']({search_link})", st.session_state.language))
+        st.markdown(tr("🔗 [Search YouTube for '{query}']({link})", st.session_state.language, query=query, link=search_link))
         
         st.markdown("---")
-        st.markdown(translate_text("### Mood Boosters", st.session_state.language))
-        st.link_button(translate_text("😂 Stand-up Comedy", st.session_state.language), "https://www.youtube.com/results?search_query=stand+up+comedy")
-        st.link_button(translate_text("🎮 Online Games", st.session_state.language), "https://poki.com")
+        st.markdown(tr("### Mood Boosters", st.session_state.language))
+        st.link_button(tr("😂 Stand-up Comedy", st.session_state.language), "https://www.youtube.com/results?search_query=stand+up+comedy")
+        st.link_button(tr("🎮 Online Games", st.session_state.language), "https://poki.com")
 
         st.markdown("---")
-        st.markdown(translate_text("### Audio Stories", st.session_state.language))
+        st.markdown(tr("### Audio Stories", st.session_state.language))
         # Age-specific and faith-specific logic for audio stories
         if st.session_state.user_age < 18:
-            st.link_button(translate_text("😴 Bedtime Stories for Kids", st.session_state.language), f"https://www.youtube.com/results?search_query={urllib.parse.quote(st.session_state.user_faith + ' bedtime stories for kids')}")
+            st.link_button(tr("😴 Bedtime Stories for Kids", st.session_state.language), f"https://www.youtube.com/results?search_query={urllib.parse.quote(st.session_state.user_faith + ' bedtime stories for kids')}")
         else:
-            st.link_button(translate_text("😴 Calm Sleep Stories", st.session_state.language), f"https://www.youtube.com/results?search_query={urllib.parse.quote(st.session_state.user_faith + ' calm audio stories')}")
+            st.link_button(tr("😴 Calm Sleep Stories", st.session_state.language), f"https://www.youtube.com/results?search_query={urllib.parse.quote(st.session_state.user_faith + ' calm audio stories')}")
     
         st.markdown("---")
-        voice_choice = st.selectbox(translate_text("🔊 Choose a Voice", st.session_state.language), ["Female", "Male"])
-        st.session_state.voice_choice = voice_choice
+        st.selectbox(tr("🔊 Choose a Voice", st.session_state.language), ["Female", "Male"], **kept_widget("voice_choice"))
         
         # New: Sliders for voice customization
         st.markdown("---")
-        st.markdown(translate_text("### 🎤 Customize Voice", st.session_state.language))
-        pitch = st.slider(translate_text("Voice Pitch", st.session_state.language), min_value=50, max_value=200, value=100, step=10, key="pitch_slider")
-        rate = st.slider(translate_text("Voice Rate", st.session_state.language), min_value=50, max_value=200, value=130, step=10, key="rate_slider")
-        st.session_state.pitch = pitch
-        st.session_state.rate = rate
+        st.markdown(tr("### 🎤 Customize Voice", st.session_state.language))
+        if get_tts_worker().supports_pitch:  # espeak only; other backends ignore pitch
+            st.slider(tr("Voice Pitch", st.session_state.language), min_value=50, max_value=200, step=10, **kept_widget("pitch"))
+        st.slider(tr("Voice Rate", st.session_state.language), min_value=50, max_value=200, step=10, **kept_widget("rate"))
         
         # New: Download conversation history button
         st.markdown("---")
-        st.download_button(
-            label=translate_text("Download Conversation", st.session_state.language),
-            data=get_conversation_history_as_text(),
-            file_name="MindfulBot_Conversation.txt",
-            mime="text/plain",
+        export_format = st.selectbox(
+            tr("Export format", st.session_state.language),
+            list(export.FORMATS),
+            format_func=lambda fmt: export.FORMATS[fmt][0],
+            **kept_widget("export_format"),
         )
+        st.button(tr("Prepare Download", st.session_state.language), on_click=prepare_export, args=(export_format,))
+        export_file = st.session_state.export_file
+        if export_file and export_file["format"] == export_format:
+            st.download_button(
+                label=tr("Download Conversation", st.session_state.language),
+                data=export_file["data"],
+                file_name=export.file_name(export_format),
+                mime=export.mime_type(export_format),
+            )
+
+if is_admin():
+    with st.sidebar:
+        performance_panel()
 
 st.markdown("---")
 
 # Footer
 st.markdown("""
 <p style='text-align:center;'>🚀 Made for the Hack Odisha 2025 </p>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+script_span.end()
@@ -0,0 +1,144 @@
+# Content-addressed cache of synthesized speech, served to the browser with st.audio.
+#
+# Files are keyed by a hash of (text, language, voice, rate, pitch), so replaying
+# a reply, or a fixed text such as the crisis message, costs a file read instead
+# of a synthesis run. The directory is kept under a size budget by evicting the
+# least recently played files.
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+
+DEFAULT_AUDIO_DIR = os.getenv(
+    "FEELEASE_AUDIO_DIR", os.path.join(os.path.expanduser("~"), ".cache", "feelease", "audio")
+)
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+MIME_TYPES = {".ogg": "audio/ogg", ".wav": "audio/wav"}
+
+
+def audio_key(text, language, voice_type, rate, pitch):
+    """Hashes everything that changes the rendered audio."""
+    raw = "\x00".join([text, language, voice_type, str(rate), str(pitch)]).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def compress(wav_path):
+    """Transcodes a WAV file to Ogg/Opus with ffmpeg if it is installed.
+
+    Returns the path of the file to keep: the .ogg on success, otherwise the WAV.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        return wav_path
+    ogg_path = os.path.splitext(wav_path)[0] + ".ogg"
+    result = subprocess.run(
+        [ffmpeg, "-y", "-loglevel", "error", "-i", wav_path, "-c:a", "libopus", "-b:a", "32k", ogg_path],
+        capture_output=True,
+    )
+    if result.returncode != 0 or not os.path.exists(ogg_path):
+        return wav_path
+    os.remove(wav_path)
+    return ogg_path
+
+
+class AudioCache:
+    """Audio files on disk, named by key, with LRU eviction by total size."""
+
+    def __init__(self, directory=DEFAULT_AUDIO_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError:
+            # An unwritable cache dir shouldn't turn off audio; render into a private temp dir instead.
+            directory = tempfile.mkdtemp(prefix="feelease-audio-")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()  # held for a whole eviction pass
+        # Updated from script threads and the prerender thread; separate from
+        # _lock so a lookup never waits for an eviction pass to count itself.
+        self._stats_lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def get(self, key):
+        """Returns the cached file path for key, or None. Marks the file as recently used."""
+        for ext in MIME_TYPES:
+            path = os.path.join(self.directory, key + ext)
+            try:
+                os.utime(path)
+            except FileNotFoundError:  # never cached, or evicted by another thread just now
+                continue
+            self._count("hits")
+            return path
+        self._count("misses")
+        return None
+
+    def put(self, key, source_path):
+        """Moves a rendered file into the cache and evicts old files if over budget."""
+        ext = os.path.splitext(source_path)[1]
+        path = os.path.join(self.directory, key + ext)
+        os.replace(source_path, path)
+        self._evict()
+        return path
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if os.path.splitext(name)[1] in MIME_TYPES:
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                os.remove(path)
+                total -= size
+                self._count("evictions")
+
+
+class AudioRenderer:
+    """Renders speech through the TTS worker and caches the result."""
+
+    def __init__(self, worker, cache):
+        self.worker = worker
+        self.cache = cache
+
+    def render(self, text, language="English", voice_type="Female", rate=130, pitch=100, background=False):
+        """Returns the path of an audio file for the text, synthesizing it on a cache miss."""
+        # Pitch only changes the audio where the backend can apply it (espeak)
+        key = audio_key(text, language, voice_type, rate, pitch if self.worker.supports_pitch else None)
+        path = self.cache.get(key)
+        if path:
+            return path
+        fd, wav_path = tempfile.mkstemp(suffix=".wav", dir=self.cache.directory, prefix=".render-")
+        os.close(fd)
+        if not self.worker.render_to_file(text, wav_path, voice_type, rate, pitch, background=background):
+            if os.path.exists(wav_path):
+                os.remove(wav_path)
+            return None
+        return self.cache.put(key, compress(wav_path))
+
+    def prerender(self, items):
+        """Renders (text, language, voice_type, rate, pitch) tuples in the background.
+
+        Each render queues behind interactive ones, so a user's first reply isn't
+        held up by the crisis message being rendered in every language.
+        """
+        def run():
+            for item in items:
+                self.render(*item, background=True)
+
+        thread = threading.Thread(target=run, name="audio-prerender", daemon=True)
+        thread.start()
+        return thread
+
+
+def mime_type(path):
+    return MIME_TYPES.get(os.path.splitext(path)[1], "audio/wav")
@@ -0,0 +1,45 @@
+# Payload bytes per turn: full chat history vs. ConversationContext.
+#
+# Usage: python benchmarks/bench_context.py [--turns 1000]
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_context import ConversationContext  # noqa: E402
+
+USER_LINES = [
+    "I feel so stressed about my exams and I can't sleep at night.",
+    "My friends don't really understand what I'm going through right now.",
+    "Today was a bit better, I went for a walk after lunch.",
+    "I don't see a point anymore.",
+]
+BOT_LINE = ("I hear you. It sounds like you're carrying a lot right now. Your feelings are valid. "
+            "Try taking a few deep breaths, and consider reaching out to someone you trust. " * 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark conversation payload size per turn.")
+    parser.add_argument("--turns", type=int, default=1000)
+    args = parser.parse_args()
+
+    context = ConversationContext(is_pinned=lambda m: "point anymore" in m["content"])
+    messages = []
+    checkpoints = {10, 50, 100, 250, 500, 1000, args.turns}
+    print(f"{'turn':>6} {'full bytes':>12} {'bounded bytes':>14} {'build ms':>9}")
+    for turn in range(1, args.turns + 1):
+        messages.append({"role": "user", "content": f"{USER_LINES[turn % len(USER_LINES)]} (turn {turn})"})
+        full = [{"role": m["role"], "parts": [{"text": m["content"]}]} for m in messages]
+        started = time.perf_counter()
+        bounded = context.build(messages)
+        build_ms = 1000 * (time.perf_counter() - started)
+        if turn in checkpoints:
+            print(f"{turn:>6} {len(json.dumps(full)):>12} {len(json.dumps(bounded)):>14} {build_ms:>9.3f}")
+        messages.append({"role": "assistant", "content": BOT_LINE})
+
+
+if __name__ == "__main__":
+    main()
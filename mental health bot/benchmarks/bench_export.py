@@ -0,0 +1,86 @@
+# Export time and peak memory for large histories.
+#
+# Compares the old `history +=` text export with export.build_export, both
+# from an in-memory message list and streamed from SQLite. Peak memory is
+# measured with tracemalloc (Python allocations only) in a separate run.
+#
+# Usage: python benchmarks/bench_export.py [--messages 10000 100000]
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import export  # noqa: E402
+from storage import Storage  # noqa: E402
+
+USER_ID = "bench user"
+USER_LINE = "I have been feeling stressed about exams and I can't sleep well at night."
+BOT_LINE = ("I hear you. It sounds like you're carrying a lot right now, and your feelings are valid. "
+            "Would you like to try a short breathing exercise together?")
+
+
+def legacy_text(messages):
+    """The export the sidebar built on every rerun before."""
+    history = ""
+    for message in messages:
+        role = "User" if message["role"] == "user" else "Bot"
+        history += f"**{role}:** {message['content']}\n\n"
+    return history
+
+
+def make_messages(count):
+    start = datetime.now() - timedelta(minutes=count)
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant",
+         "content": f"{USER_LINE if i % 2 == 0 else BOT_LINE} ({i})",
+         "timestamp": start + timedelta(minutes=i)}
+        for i in range(count)
+    ]
+
+
+def measure(fn):
+    """Returns (seconds, peak traced bytes, output bytes).
+
+    tracemalloc slows allocation-heavy code several times over, so time and
+    memory are measured in separate runs.
+    """
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark conversation export.")
+    parser.add_argument("--messages", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'messages':>9} {'method':<22} {'seconds':>8} {'peak MB':>8} {'output MB':>10}")
+    for count in args.messages:
+        messages = make_messages(count)
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = Storage(os.path.join(tmp, "bench.sqlite3"))
+            storage.append_messages(USER_ID, [(m["role"], m["content"], m["timestamp"]) for m in messages])
+            cases = [
+                ("legacy text (list)", lambda: legacy_text(messages).encode("utf-8")),
+                ("markdown (list)", lambda: export.build_export("markdown", messages)),
+                ("markdown (storage)", lambda: export.build_export("markdown", storage.iter_messages(USER_ID))),
+                ("jsonl (storage)", lambda: export.build_export("jsonl", storage.iter_messages(USER_ID))),
+                ("archive (storage)", lambda: export.build_export("archive", storage.iter_messages(USER_ID))),
+            ]
+            for name, fn in cases:
+                elapsed, peak, size = measure(fn)
+                print(f"{count:>9} {name:<22} {elapsed:>8.3f} {peak / 2**20:>8.1f} {size / 2**20:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Journal search latency at 100k entries per user.
+#
+# Fills a database with synthetic journal entries for several users, their
+# entries interleaved as they would be in a shared database, then times
+# Storage.search_journal over a mix of queries: rare and very common words,
+# several words, another form of a word, prompt and date filters and a later
+# page. Exits 1 if any query's p95 is over --budget-ms.
+#
+# Usage: python benchmarks/bench_journal_search.py [--entries 100000] [--users 3]
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import Storage  # noqa: E402
+
+PROMPTS = ["", "What are you grateful for today?", "What challenged you today?", "What made you smile today?"]
+# A few words recur in most entries (as "today" and "felt" do in real journals)
+COMMON = ["today", "felt", "really", "tired", "better", "work", "day", "little"]
+TOPICAL = ["exam", "exams", "revision", "sister", "mother", "boss", "deadline", "sleep", "insomnia", "walk",
+           "yoga", "friends", "lonely", "party", "music", "guitar", "rain", "garden", "coffee", "therapy"]
+
+
+def entry_text(rng, vocabulary):
+    words = rng.choices(COMMON, k=6) + rng.choices(TOPICAL, k=2) + rng.choices(vocabulary, k=30)
+    rng.shuffle(words)
+    return " ".join(words).capitalize() + "."
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark journal full-text search.")
+    parser.add_argument("--entries", type=int, default=100_000, help="journal entries per user")
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=50, help="timed runs per query")
+    parser.add_argument("--budget-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = [f"{rng.choice('bcdfghklmnprstvw')}{rng.choice('aeiou')}{rng.choice('bcdfghklmnprstvw')}"
+                  f"{rng.choice('aeiou')}{i}" for i in range(20000)]
+    users = [f"user{u}" for u in range(args.users)]
+    start = datetime.now() - timedelta(hours=args.entries)
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = Storage(os.path.join(tmp, "bench.sqlite3"))
+        started = time.perf_counter()
+        for offset in range(0, args.entries, 1000):
+            for user_id in users:
+                storage.add_journal_entries(user_id, [
+                    (entry_text(rng, vocabulary), rng.choice(PROMPTS), start + timedelta(hours=i))
+                    for i in range(offset, min(offset + 1000, args.entries))
+                ])
+        print(f"inserted {args.entries * len(users)} entries with indexing in {time.perf_counter() - started:.1f} s; "
+              f"database {os.path.getsize(os.path.join(tmp, 'bench.sqlite3')) / 1e6:.0f} MB")
+        started = time.perf_counter()
+        for _ in range(100):
+            storage.add_journal_entry(users[0], entry_text(rng, vocabulary), "", datetime.now())
+        print(f"single save incl. index update: {(time.perf_counter() - started) * 10:.2f} ms")
+
+        today = datetime.now().date()
+        queries = [
+            ("rare word", dict(query=vocabulary[123])),
+            ("topical word", dict(query="insomnia")),
+            ("very common word", dict(query="today")),
+            ("two common words", dict(query="felt tired")),
+            ("three words", dict(query="exam revision sister")),
+            ("word form", dict(query="exams")),
+            ("prompt filter", dict(query="friends", prompt=PROMPTS[2])),
+            ("last 30 days", dict(query="sleep", since=today - timedelta(days=30))),
+            ("a month, 5 years ago", dict(query="sleep", since=today - timedelta(days=1855),
+                                          until=today - timedelta(days=1825))),
+            ("whole history", dict(query="today", since=start.date(), until=today)),
+            ("page 5", dict(query="work", page=4)),
+            ("no match", dict(query="zzzzqx")),
+        ]
+        over = False
+        print(f"{'query':<20} {'results':>7} {'p50 ms':>7} {'p95 ms':>7} {'max ms':>7}")
+        for label, kwargs in queries:
+            latencies = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                results, _ = storage.search_journal(users[0], **kwargs)
+                latencies.append(time.perf_counter() - started)
+            latencies.sort()
+            p95 = 1000 * latencies[int(0.95 * (len(latencies) - 1))]
+            over |= p95 > args.budget_ms
+            print(f"{label:<20} {len(results):>7} {1000 * statistics.median(latencies):>7.2f} {p95:>7.2f} "
+                  f"{1000 * latencies[-1]:>7.2f}")
+    if over:
+        print(f"p95 over the {args.budget_ms:g} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# Model routing, fallback and hedged requests against local fake endpoints.
+#
+# Streams chat turns from the stub Gemini server through ModelRouter the way
+# app.py's fetch_reply does, with per-model latency and failures injected:
+#   routing    short turns on the fast model, long/distressed ones on the strong
+#   5xx        the strong model always fails; turns fall back to the fast one
+#   timeout    the strong model is slower than the first-attempt timeout
+#   hedging    the strong model has latency spikes; with and without hedging
+# and reports time to first token from the start of each turn. Exits 1 if a
+# turn fails or hedging doesn't cut the tail.
+#
+# Usage: python benchmarks/bench_model_routing.py [--turns 200] [--concurrency 8]
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gemini  # noqa: E402
+from fake_upstreams import FakeGeminiServer  # noqa: E402
+from harness import percentile  # noqa: E402
+from http_client import HttpClient  # noqa: E402
+from model_router import ModelRouter  # noqa: E402
+from sentiment import SentimentDetector  # noqa: E402
+
+FAST, STRONG = "fast-model", "strong-model"
+BODY = '{"contents": [{"role": "user", "parts": [{"text": "hello"}]}]}'
+PROMPTS = [
+    "hi",
+    "thanks, that helped",
+    "good morning!",
+    "I tried the breathing exercise",
+    "I've been feeling really anxious about my exams and I can't sleep",
+    "Work has been a lot lately. My manager keeps moving deadlines and I never get a weekend, "
+    "and I don't know how to say no without looking lazy.",
+    "I feel so lonely since we moved",
+    "can you suggest a song?",
+]
+
+
+def run_turns(router, client, prompts, concurrency, first_timeout=8.0, hedge=None):
+    """Runs one streamed turn per prompt; returns per-turn (seconds to first token, model, info) or errors."""
+    detector = SentimentDetector()
+
+    def turn(prompt):
+        route = router.route(prompt, detector.classify(prompt))
+        started = time.perf_counter()
+
+        def open_reply(model):
+            first_try = model == route["model"] and route["alternate"] is not None
+            post = partial(client.post, upstream=f"gemini/{model}", retries=0 if first_try else None)
+            return iter(gemini.GeminiStream(BODY, "offline-benchmark", timeout=first_timeout if first_try else 20,
+                                            post=post, model=model))
+
+        try:
+            model, chunks, info = router.start(route, open_reply, hedge=hedge)
+            first_token = time.perf_counter() - started
+            "".join(chunks)
+        except Exception as e:
+            return {"error": type(e).__name__, "tier": route["tier"]}
+        return {"ttft": first_token, "model": model, "tier": route["tier"], **info}
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(turn, prompts))
+
+
+def report(name, turns):
+    ok = [t for t in turns if "error" not in t]
+    ttft = sorted(t["ttft"] for t in ok)
+    models = {}
+    for t in ok:
+        models[t["model"]] = models.get(t["model"], 0) + 1
+    print(f"{name:<22} {len(turns):>5} {len(turns) - len(ok):>6} "
+          f"{1000 * statistics.median(ttft):>8.0f} {1000 * percentile(ttft, 95):>8.0f} "
+          f"{1000 * percentile(ttft, 99):>8.0f} {sum(t['fallback'] for t in ok):>9} {sum(t['hedged'] for t in ok):>7}  "
+          + ", ".join(f"{model} {count}" for model, count in sorted(models.items())))
+    return ok, ttft
+
+
+def fake_gemini(**kwargs):
+    server = FakeGeminiServer(chunk_seconds=0, **kwargs)
+    gemini.API_BASE = server.api_base  # read by gemini.model_url on every call
+    return server
+
+
+def spiky(rng):
+    """Strong model: usually 150 ms to first token, one request in 50 takes 1.5 s (beyond its p95)."""
+    return 1.5 if rng.random() < 0.02 else 0.15
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model routing, fallback and hedging.")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    prompts = [PROMPTS[i % len(PROMPTS)] for i in range(args.turns)]
+    long_prompts = [PROMPTS[5]] * args.turns
+    failed = False
+    print(f"{'scenario':<22} {'turns':>5} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'fallback':>9} {'hedged':>7}  answered by")
+
+    latency = {FAST: 0.05, STRONG: 0.3}
+    with fake_gemini(model_latency=latency) as server:
+        client = HttpClient()
+        turns = run_turns(ModelRouter(STRONG, STRONG), client, prompts, args.concurrency)
+        report("strong model only", turns)
+        router = ModelRouter(FAST, STRONG)
+        turns = run_turns(router, client, prompts, args.concurrency)
+        ok, _ = report("routed", turns)
+        failed |= len(ok) != len(turns)
+        print(f"{'':<22} routing: {router.stats['fast']} fast, {router.stats['strong']} strong")
+
+    with fake_gemini(model_latency=latency, failing_models={STRONG}) as server:
+        # Each turn's first attempt is a fresh breaker, as separate processes would see
+        router = ModelRouter(FAST, STRONG)
+        turns = run_turns(router, HttpClient(breaker_threshold=10**9), prompts, args.concurrency)
+        ok, _ = report("strong returns 503", turns)
+        failed |= len(ok) != len(turns)
+        turns = run_turns(ModelRouter(FAST, STRONG), HttpClient(), prompts, args.concurrency)
+        ok, _ = report("  with breaker", turns)
+        failed |= len(ok) != len(turns)
+        print(f"{'':<22} strong-model requests: {server.model_requests.get(STRONG, 0)} "
+              f"over {2 * args.turns} turns (breaker stops calling it)")
+
+    with fake_gemini(model_latency={FAST: 0.05, STRONG: 2.0}) as server:
+        turns = run_turns(ModelRouter(FAST, STRONG), HttpClient(), long_prompts[:args.turns // 4],
+                          args.concurrency, first_timeout=0.5)
+        ok, _ = report("strong times out", turns)
+        failed |= len(ok) != len(turns)
+
+    with fake_gemini(model_latency={FAST: 0.1, STRONG: spiky}, seed=1) as server:
+        client = HttpClient()
+        # Same router throughout, so the hedge delay is learned from the unhedged turns' p95
+        router = ModelRouter(FAST, STRONG, min_samples=20)
+        _, plain = report("spiky, no hedging", run_turns(router, client, long_prompts, args.concurrency, hedge=False))
+        requests_before = server.requests
+        turns = run_turns(router, client, long_prompts, args.concurrency, hedge=True)
+        ok, hedged = report("spiky, hedged", turns)
+        extra = (server.requests - requests_before - len(turns)) / len(turns)
+        print(f"{'':<22} hedge delay {1000 * router.hedge_delay(STRONG):.0f} ms, "
+              f"{extra:.0%} extra requests, {router.stats['hedge_wins']} won by the other model")
+        failed |= len(ok) != len(turns) or percentile(hedged, 99) >= percentile(plain, 99)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
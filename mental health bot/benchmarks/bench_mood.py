@@ -0,0 +1,88 @@
+# Mood chart build time and Plotly payload size: per-point annotations vs. MoodSeries.
+#
+# Usage: python benchmarks/bench_mood.py [--ratings 10000] [--legacy-limit 300]
+#
+# The old chart adds one annotation per rating, which is quadratic in Plotly;
+# it is only timed up to --legacy-limit ratings (1000 already takes over a minute).
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mood_analytics import MOOD_EMOJI, MoodSeries, build_mood_figure, rollup  # noqa: E402
+
+
+def make_records(count, seed=7):
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(hours=2 * count)
+    records = []
+    for i in range(count):
+        rating = rng.randint(1, 5)
+        timestamp = start + timedelta(hours=2 * i)
+        records.append({"timestamp": timestamp, "rating": rating, "emoji": MOOD_EMOJI[rating], "date": timestamp.date()})
+    return records
+
+
+def legacy_figure(records):
+    """The chart the app built before: a DataFrame per rerun plus one annotation per point."""
+    import pandas as pd
+    import plotly.express as px
+
+    df = pd.DataFrame(records)
+    df['date_str'] = df['timestamp'].dt.strftime('%Y-%m-%d')
+    fig = px.line(df, x='date_str', y='rating', title='Your Mood Over Time',
+                  labels={'date_str': 'Date', 'rating': 'Mood Rating'})
+    for i, row in df.iterrows():
+        fig.add_annotation(x=row['date_str'], y=row['rating'], text=row['emoji'], showarrow=False, yshift=25)
+    return fig
+
+
+def measure(build):
+    started = time.perf_counter()
+    fig = build()
+    build_ms = 1000 * (time.perf_counter() - started)
+    started = time.perf_counter()
+    payload = fig.to_json()
+    json_ms = 1000 * (time.perf_counter() - started)
+    return build_ms, json_ms, len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the mood chart.")
+    parser.add_argument("--ratings", type=int, default=10000)
+    parser.add_argument("--legacy-limit", type=int, default=300)
+    args = parser.parse_args()
+
+    # Warm up the lazy pandas/plotly imports so they are not billed to the first row.
+    build_mood_figure(MoodSeries.from_records(make_records(10)))
+    legacy_figure(make_records(10))
+
+    print(f"{'ratings':>8} {'method':<10} {'build ms':>10} {'to_json ms':>11} {'payload KB':>11}")
+    for count in sorted({100, 300, 1000, args.ratings}):
+        records = make_records(count)
+        if count <= args.legacy_limit:
+            build_ms, json_ms, size = measure(lambda: legacy_figure(records))
+            print(f"{count:>8} {'legacy':<10} {build_ms:>10.1f} {json_ms:>11.1f} {size / 1024:>11.1f}")
+        series = MoodSeries.from_records(records)
+        build_ms, json_ms, size = measure(lambda: build_mood_figure(series))
+        print(f"{count:>8} {'columnar':<10} {build_ms:>10.1f} {json_ms:>11.1f} {size / 1024:>11.1f}")
+
+    series = MoodSeries.from_records(make_records(args.ratings))
+    started = time.perf_counter()
+    daily = rollup(series, "D")
+    weekly = rollup(series, "W")
+    rollup_ms = 1000 * (time.perf_counter() - started)
+    print(f"\nrollups of {args.ratings} ratings: {len(daily)} days, {len(weekly)} weeks in {rollup_ms:.1f} ms")
+
+    started = time.perf_counter()
+    for _ in range(1000):
+        series.append(datetime.now(), 3, MOOD_EMOJI[3])
+    print(f"append: {1e6 * (time.perf_counter() - started) / 1000:.2f} us per rating")
+
+
+if __name__ == "__main__":
+    main()
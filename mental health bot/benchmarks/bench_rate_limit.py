@@ -0,0 +1,151 @@
+# Rate limiting, duplicate submits and request coalescing under concurrency.
+#
+# Fires concurrent chat turns at a local stub Gemini server through the same
+# pieces app.py uses (DuplicateFilter -> RateLimiter -> ChatJobExecutor keyed
+# by request_key) and checks that:
+#   - identical requests in flight reach the upstream once and share the reply
+#   - a session (and the process) never gets more turns than its bucket allows
+#   - a prompt submitted several times at once by one session is sent once
+# and reports what the admission checks cost per turn. Exits 1 if a check fails.
+#
+# Usage: python benchmarks/bench_rate_limit.py [--threads 64] [--sessions 40]
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_jobs import ChatJobExecutor, request_key  # noqa: E402
+from fake_upstreams import FakeGeminiServer  # noqa: E402
+from http_client import HttpClient  # noqa: E402
+from rate_limit import DuplicateFilter, RateLimiter, idempotency_key  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def concurrently(count, fn):
+    """Runs fn(i) on `count` threads released at the same moment; returns the results in order."""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def run(i):
+        barrier.wait()
+        results[i] = fn(i)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check rate limiting and coalescing against a stub upstream.")
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub upstream response time, seconds")
+    args = parser.parse_args()
+
+    checks = []
+
+    def check(name, ok, detail):
+        checks.append(ok)
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: {detail}")
+
+    client = HttpClient()
+    with FakeGeminiServer(first_token_seconds=args.latency) as server:
+        url = f"{server.api_base}/models/stub:generateContent"
+
+        def fetch(job, body):
+            response = client.post(url, headers={"Content-Type": "application/json"}, data=body, timeout=20)
+            return response.json()["candidates"][0]["content"]["parts"][0]["text"]
+
+        # Identical requests in flight share one upstream call
+        executor = ChatJobExecutor(max_concurrent=8, max_pending=args.threads * 2)
+        body = '{"contents": [{"role": "user", "parts": [{"text": "hi"}]}]}'
+        jobs = concurrently(args.threads, lambda i: executor.submit(request_key(body, "English"), fetch, body))
+        replies = {job.result() for job in jobs}
+        check("single flight", server.requests == 1 and len(replies) == 1,
+              f"{args.threads} identical submits -> {server.requests} upstream call(s), "
+              f"{executor.stats['coalesced']} coalesced")
+
+        before = server.requests
+        jobs = concurrently(args.threads, lambda i: executor.submit(
+            request_key(body, f"lang{i}"), fetch, body))
+        for job in jobs:
+            job.result()
+        check("distinct requests", server.requests - before == args.threads,
+              f"{args.threads} different keys -> {server.requests - before} upstream calls")
+
+        # One session hammering, then many sessions at once
+        limiter = RateLimiter(session_per_minute=10, session_burst=5, process_per_minute=300, process_burst=30)
+        allowed = sum(not wait for wait in concurrently(args.threads, lambda i: limiter.acquire("one")))
+        check("session burst", allowed == 5, f"{args.threads} concurrent turns from one session -> {allowed} allowed")
+        limiter = RateLimiter(session_per_minute=10, session_burst=5, process_per_minute=300, process_burst=30)
+        waits = concurrently(args.threads, lambda i: limiter.acquire(f"session{i}"))
+        allowed = sum(not wait for wait in waits)
+        check("process burst", allowed == min(30, args.threads),
+              f"{args.threads} sessions at once -> {allowed} allowed, "
+              f"longest backoff {max(waits):.1f}s")
+
+        # Sustained rate over ten simulated minutes, one attempt a second
+        clock = FakeClock()
+        limiter = RateLimiter(session_per_minute=10, session_burst=5, clock=clock)
+        allowed = 0
+        for second in range(600):
+            clock.now = float(second)
+            allowed += not limiter.acquire("steady")
+        check("sustained rate", 5 + 100 - 1 <= allowed <= 5 + 100,
+              f"600 attempts in 10 min at 10/min with burst 5 -> {allowed} allowed")
+
+        # Each session submits its prompt three times at once (callback + rerun + voice)
+        duplicates = DuplicateFilter(window_seconds=5)
+        limiter = RateLimiter(session_per_minute=10, session_burst=5, process_per_minute=6000, process_burst=1000)
+        executor = ChatJobExecutor(max_concurrent=8, max_pending=args.sessions * 3)
+        before = server.requests
+
+        def turn(i):
+            session_id, prompt = f"session{i // 3}", f"I feel anxious today ({i // 3})"
+            key = idempotency_key(session_id, prompt if i % 3 else f"  {prompt.upper()} ")
+            if not duplicates.claim(key):
+                return None
+            if limiter.acquire(session_id):
+                duplicates.release(key)
+                return None
+            turn_body = f'{{"contents": [{{"role": "user", "parts": [{{"text": "{prompt}"}}]}}]}}'
+            return executor.submit(request_key(turn_body, "English"), fetch, turn_body)
+
+        jobs = [job for job in concurrently(args.sessions * 3, turn) if job is not None]
+        for job in jobs:
+            job.result()
+        check("double submits", server.requests - before == args.sessions and len(jobs) == args.sessions,
+              f"{args.sessions} sessions x 3 submits -> {len(jobs)} turns, "
+              f"{server.requests - before} upstream calls, {duplicates.stats['duplicates']} dropped")
+
+    # Cost of the admission checks on the submit path
+    limiter = RateLimiter(session_per_minute=1e9, session_burst=10**9, process_per_minute=1e9, process_burst=10**9)
+    duplicates = DuplicateFilter()
+    n = 100_000
+    started = time.perf_counter()
+    for i in range(n):
+        key = idempotency_key(f"session{i % 1000}", f"prompt number {i}")
+        duplicates.claim(key)
+        limiter.acquire(f"session{i % 1000}")
+    print(f"\nadmission per turn (key + duplicate check + both buckets): "
+          f"{1e6 * (time.perf_counter() - started) / n:.2f} us")
+
+    if not all(checks):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# Memory retrieval for users with long histories.
+#
+# Builds MemoryIndex over synthetic memories, journal entries and goals, each
+# written about one topic (exams, sleep, family...), then measures index
+# build and incremental add time, query latency and the size of the prompt
+# context. Precision is the share of retrieved journal entries and goals that
+# are about the query's topic. The old context sent every memory on every turn
+# (and no journal entries or goals at all).
+#
+# With a stand-in embedder (hashed bag of words, no model download) it also
+# counts the embedding calls a login makes: items are embedded in one batch at
+# the first search rather than one call per item as they are added.
+#
+# Usage: python benchmarks/bench_retrieval.py [--entries 1000 5000 20000]
+import argparse
+import hashlib
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_context import estimate_tokens  # noqa: E402
+from memory_index import PINNED_MEMORIES, MemoryIndex, goal_line, journal_line, memory_line  # noqa: E402
+from text_utils import tokenize  # noqa: E402
+
+TOPICS = {
+    "exams": ["exam", "exams", "revision", "syllabus", "marks", "test", "studying", "results"],
+    "sleep": ["sleep", "insomnia", "tired", "night", "nap", "bedtime", "dreams", "awake"],
+    "family": ["mother", "father", "sister", "brother", "parents", "family", "home", "grandmother"],
+    "work": ["work", "boss", "deadline", "office", "meeting", "project", "colleague", "shift"],
+    "friends": ["friends", "friend", "lonely", "party", "texted", "hangout", "ignored", "group"],
+    "exercise": ["walk", "run", "gym", "yoga", "exercise", "cycling", "stretching", "steps"],
+}
+FILLER = ["today", "felt", "really", "again", "because", "little", "better", "worse", "kept", "thinking",
+          "about", "after", "lunch", "evening", "morning", "honestly", "maybe", "tomorrow", "quiet"]
+QUERIES = {
+    "exams": "I'm so anxious about my exam results",
+    "sleep": "I couldn't sleep at all last night",
+    "family": "my parents keep arguing at home",
+    "work": "my boss gave me another deadline",
+    "friends": "I feel lonely, my friends ignored me",
+    "exercise": "should I go for a run or do yoga",
+}
+
+
+def make_history(entries, rng):
+    """Returns (index items as (key, line), topic per key, legacy memory context)."""
+    now = datetime.now()
+    items, topics = [], {}
+    for i in range(entries):
+        topic = rng.choice(list(TOPICS))
+        words = rng.sample(TOPICS[topic], 3) + rng.sample(FILLER, 12)
+        rng.shuffle(words)
+        entry = {"entry": " ".join(words).capitalize() + ".", "timestamp": now - timedelta(hours=entries - i)}
+        items.append((("journal", i), journal_line(entry)))
+        topics[("journal", i)] = topic
+    for i in range(max(10, entries // 100)):
+        topic = rng.choice(list(TOPICS))
+        goal = {"goal": f"{rng.choice(['Less', 'More', 'Better'])} {' '.join(rng.sample(TOPICS[topic], 2))}",
+                "category": "Wellness", "completed": rng.random() < 0.3}
+        items.append((("goal", i), goal_line(goal)))
+        topics[("goal", i)] = topic
+    memories = {"name": "Asha", "age": 21, "faith": "Hinduism"}
+    for i in range(40):
+        topic = rng.choice(list(TOPICS))
+        memories[f"likes/{i}"] = " ".join(rng.sample(TOPICS[topic], 2))
+    for key, value in memories.items():
+        items.append((("memory", key), memory_line(key, value, now)))
+    legacy = "Here's what I remember about the user:\n" + "".join(
+        f"- {key}: {value} (mentioned on {now:%Y-%m-%d})\n" for key, value in memories.items()
+    )
+    return items, topics, legacy
+
+
+def hashing_embedder(dimensions=256):
+    """Stand-in for sentence_embedder(): unit bag-of-words vectors. Counts calls and texts."""
+    import numpy as np
+
+    counts = {"calls": 0, "texts": 0}
+
+    def embed(texts):
+        counts["calls"] += 1
+        counts["texts"] += len(texts)
+        vectors = np.zeros((len(texts), dimensions))
+        for row, text in enumerate(texts):
+            for term in tokenize(text):
+                vectors[row, int(hashlib.md5(term.encode()).hexdigest()[:8], 16) % dimensions] += 1
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+
+    return embed, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory retrieval for prompt context.")
+    parser.add_argument("--entries", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--budget", type=int, default=300, help="context token budget")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pinned = [("memory", key) for key in PINNED_MEMORIES]
+    print(f"{'entries':>8} {'build ms':>9} {'add us':>7} {'query p50 us':>13} {'p95 us':>8} "
+          f"{'ctx tokens':>11} {'old tokens':>11} {'all journal':>12} {'precision':>10}")
+    for entries in args.entries:
+        items, topics, legacy = make_history(entries, rng)
+        index = MemoryIndex()
+        started = time.perf_counter()
+        for key, line in items[:-100]:
+            index.add(key, line)
+        build_ms = 1000 * (time.perf_counter() - started)
+        started = time.perf_counter()
+        for key, line in items[-100:]:
+            index.add(key, line)
+        add_us = 1e6 * (time.perf_counter() - started) / 100
+
+        latencies, tokens, hits, retrieved = [], [], 0, 0
+        names = list(QUERIES)
+        for i in range(args.queries):
+            topic = names[i % len(names)]
+            started = time.perf_counter()
+            context = index.context(QUERIES[topic], token_budget=args.budget, pinned=pinned)
+            latencies.append(time.perf_counter() - started)
+            tokens.append(estimate_tokens(context))
+            for _, key in index.search(QUERIES[topic]):
+                if key in topics:
+                    retrieved += 1
+                    hits += topics[key] == topic
+        all_journal = sum(estimate_tokens(line) for key, line in items if key[0] == "journal")
+        latencies.sort()
+        print(f"{entries:>8} {build_ms:>9.1f} {add_us:>7.1f} {1e6 * statistics.median(latencies):>13.1f} "
+              f"{1e6 * latencies[int(0.95 * (len(latencies) - 1))]:>8.1f} {statistics.mean(tokens):>11.0f} "
+              f"{estimate_tokens(legacy):>11} {all_journal:>12} {hits / max(retrieved, 1):>10.0%}")
+
+    print(f"\n{'entries':>8} {'login ms':>9} {'embed calls':>12} {'first query ms':>15} {'embed calls':>12} "
+          f"{'query p50 us':>13}   (stand-in embedder)")
+    for entries in args.entries:
+        items, _, _ = make_history(entries, rng)
+        embed, counts = hashing_embedder()
+        index = MemoryIndex(embed=embed)
+        started = time.perf_counter()
+        for key, line in items:
+            index.add(key, line)
+        login_ms, login_calls = 1000 * (time.perf_counter() - started), counts["calls"]
+        started = time.perf_counter()
+        index.search(QUERIES["sleep"])
+        first_ms = 1000 * (time.perf_counter() - started)
+        first_calls = counts["calls"] - login_calls
+        latencies = []
+        for i in range(args.queries // 10):
+            started = time.perf_counter()
+            index.search(QUERIES[list(QUERIES)[i % len(QUERIES)]])
+            latencies.append(time.perf_counter() - started)
+        print(f"{entries:>8} {login_ms:>9.1f} {login_calls:>12} {first_ms:>15.1f} {first_calls:>12} "
+              f"{1e6 * statistics.median(latencies):>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# Accuracy and speed of the crisis/sentiment detector on a labeled corpus.
+#
+# Compares SentimentDetector with the old per-keyword substring scans
+# (English only). Exits non-zero if the detector mislabels any corpus line,
+# so it doubles as a check when keyword lists change.
+#
+# sentiment_corpus.jsonl is written around the keyword lists, so it can't show
+# what they miss. crisis_heldout.jsonl holds phrasings written without looking
+# at KEYWORDS; its recall is reported, and misses listed, but doesn't fail the
+# run. Don't add keywords copied from its lines, or it stops measuring anything.
+#
+# Usage: python benchmarks/bench_sentiment.py [--repeat 2000]
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sentiment import SentimentDetector  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sentiment_corpus.jsonl")
+HELDOUT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "crisis_heldout.jsonl")
+
+OLD_CRISIS_KEYWORDS = ["crisis", "emergency", "suicidal", "point anymore"]
+OLD_NEGATIVE_KEYWORDS = ["sad", "angry", "lonely", "stressed", "depressed", "low", "hopeless"]
+
+
+def substring_classify(text):
+    """The scans the app used before: two lists, lowercase substring checks."""
+    lowered = text.lower()
+    if any(keyword in lowered for keyword in OLD_CRISIS_KEYWORDS):
+        return "crisis"
+    if any(keyword in lowered for keyword in OLD_NEGATIVE_KEYWORDS):
+        return "negative"
+    return "neutral"
+
+
+def load_corpus(path=CORPUS_PATH):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def time_per_message_us(classify, texts, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            classify(text)
+    return 1e6 * (time.perf_counter() - started) / (repeat * len(texts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the crisis/sentiment detector.")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    texts = [row["text"] for row in corpus]
+
+    started = time.perf_counter()
+    detector = SentimentDetector()
+    build_ms = 1000 * (time.perf_counter() - started)
+    print(f"automaton: {len(detector._goto)} states, built in {build_ms:.2f} ms")
+
+    print(f"{'method':<12} {'accuracy':>9} {'crisis recall':>14} {'us/message':>11}")
+    failures = []
+    for name, classify in (("substring", substring_classify), ("automaton", detector.classify)):
+        predictions = [classify(text) for text in texts]
+        correct = sum(p == row["label"] for p, row in zip(predictions, corpus))
+        crisis = [p for p, row in zip(predictions, corpus) if row["label"] == "crisis"]
+        recall = sum(p == "crisis" for p in crisis) / len(crisis)
+        speed = time_per_message_us(classify, texts, args.repeat)
+        print(f"{name:<12} {correct / len(corpus):>9.1%} {recall:>14.1%} {speed:>11.2f}")
+        if name == "automaton":
+            failures = [(row, p) for p, row in zip(predictions, corpus) if p != row["label"]]
+
+    heldout = load_corpus(HELDOUT_PATH)
+    print()
+    print(f"{'held-out':<12} {'crisis recall':>14} {'false alarms':>13}")
+    for name, classify in (("substring", substring_classify), ("automaton", detector.classify)):
+        predictions = [classify(row["text"]) for row in heldout]
+        crisis = [p for p, row in zip(predictions, heldout) if row["label"] == "crisis"]
+        recall = sum(p == "crisis" for p in crisis) / len(crisis)
+        false_alarms = sum(p == "crisis" for p, row in zip(predictions, heldout) if row["label"] != "crisis")
+        print(f"{name:<12} {recall:>14.1%} {false_alarms:>13}")
+        if name == "automaton":
+            misses = [row for p, row in zip(predictions, heldout) if p != row["label"]]
+
+    for row, predicted in failures:
+        print(f"MISLABELED [{row['lang']}] {row['text']!r}: expected {row['label']}, got {predicted}")
+    for row in misses:
+        print(f"held-out miss [{row['lang']}] {row['text']!r}: expected {row['label']}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# Multi-session load test: RSS and rerun latency with N live sessions.
+#
+# Each simulated user is its own AppTest (its own session state) running the
+# real app.py against stubbed upstreams (fake Gemini server, silent TTS,
+# local translator, temporary SQLite database). Process-wide resources
+# (st.cache_resource) are shared between them exactly as on a real server.
+#
+# AppTest swaps a global runtime for each run, so scripts are executed one at
+# a time: every session stays resident and their reruns are interleaved
+# round-robin, while chat turns overlap on the shared background executor.
+#
+# Usage: python benchmarks/bench_sessions.py [--sessions 10 100 500] [--turns 2]
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_upstreams import FakeGeminiServer, install_fake_translator, install_fake_tts  # noqa: E402
+from harness import Session, percentile, rss_mb  # noqa: E402
+
+PROMPTS = [
+    "I have been feeling stressed about work lately.",
+    "Can you suggest something to help me sleep?",
+    "Today was a little better than yesterday.",
+]
+
+
+def run_level(count, turns, timeout):
+    sessions = [Session(i, timeout) for i in range(count)]
+    baseline = rss_mb()
+    started = time.perf_counter()
+    for session in sessions:
+        session.login()
+    for turn in range(turns):
+        # Every session submits before any waits, so chat turns overlap.
+        for session in sessions:
+            session.chat(PROMPTS[(session.index + turn) % len(PROMPTS)])
+        for session in sessions:
+            session.wait_for_reply()
+        for session in sessions:
+            session.run()  # a plain rerun (widget interaction) with the reply in the transcript
+    elapsed = time.perf_counter() - started
+    latencies = [latency for session in sessions for latency in session.latencies]
+    return {
+        "sessions": count,
+        "reruns": len(latencies),
+        "p50_ms": 1000 * statistics.median(latencies),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "rss_mb": rss_mb(),
+        "rss_per_session_kb": 1024 * (rss_mb() - baseline) / count,
+        "seconds": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test app.py with many concurrent sessions.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--turns", type=int, default=2, help="chat turns per session")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake Gemini time to first token")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    install_fake_tts()
+    install_fake_translator()
+    with tempfile.TemporaryDirectory() as tmp, FakeGeminiServer(first_token_seconds=args.latency) as server:
+        os.environ.update({
+            "GOOGLE_API_KEY": "offline-benchmark",
+            "GEMINI_API_BASE": server.api_base,
+            "FEELEASE_DB": os.path.join(tmp, "load.sqlite3"),
+            # Every session starts its turns at once; admission control has bench_rate_limit.py
+            "FEELEASE_PROCESS_TURNS_BURST": "1000000",
+        })
+        print(f"{'sessions':>8} {'reruns':>7} {'p50 ms':>8} {'p95 ms':>8} {'RSS MB':>8} {'KB/session':>11} {'seconds':>8}")
+        for count in args.sessions:
+            result = run_level(count, args.turns, args.timeout)
+            print(f"{result['sessions']:>8} {result['reruns']:>7} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+                  f"{result['rss_mb']:>8.1f} {result['rss_per_session_kb']:>11.1f} {result['seconds']:>8.1f}")
+        print(f"fake Gemini requests: {server.requests}")
+
+
+if __name__ == "__main__":
+    main()
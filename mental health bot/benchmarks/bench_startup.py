@@ -0,0 +1,87 @@
+# Cold-start budget for app.py: import time, time to first render and peak RSS.
+#
+# Usage: python benchmarks/bench_startup.py [--runs 3]
+#
+# Each measurement runs in a fresh interpreter so nothing is already imported.
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(APP_DIR, "app.py")
+
+# Imported lazily by app.py; measured separately to show what a cold start avoids.
+LAZY_MODULES = ["pandas", "plotly.express", "speech_recognition", "deep_translator", "pyttsx3"]
+
+FIRST_RENDER_SCRIPT = """
+import json, resource, sys, time
+sys.path.insert(0, {app_dir!r})
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app_path!r}, default_timeout=60)
+at.run()
+elapsed = time.perf_counter() - started
+heavy = [m for m in {lazy!r} if m in sys.modules]
+print(json.dumps({{
+    "first_render_s": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "exceptions": len(at.exception),
+    "heavy_modules_loaded": heavy,
+}}))
+"""
+
+
+def top_level_imports(path):
+    """Returns the module names app.py imports at module level."""
+    modules = []
+    for node in ast.parse(open(path, encoding="utf-8").read()).body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return modules
+
+
+def import_time_us(modules):
+    """Total cumulative import time (µs) of `modules` in a fresh interpreter, and the top entries."""
+    code = "import sys; sys.path.insert(0, %r)\n" % APP_DIR + "\n".join(f"import {m}" for m in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, cwd=APP_DIR)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        # Only top-level entries (no leading indentation in the raw name column)
+        if not line.split("|")[2].startswith("  "):
+            rows.append((int(cumulative), name))
+    rows.sort(reverse=True)
+    return sum(us for us, _ in rows), rows[:10]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure FeelEase cold-start time and memory.")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    modules = top_level_imports(APP_PATH)
+    total, top = import_time_us(modules)
+    print(f"app.py top-level imports: {total / 1000:.1f} ms")
+    for us, name in top:
+        print(f"  {us / 1000:>8.1f} ms  {name}")
+    lazy_total, _ = import_time_us(LAZY_MODULES)
+    print(f"deferred heavy imports (not paid at startup): {lazy_total / 1000:.1f} ms")
+
+    env = dict(os.environ, GOOGLE_API_KEY=os.environ.get("GOOGLE_API_KEY", "bench-key"))
+    script = FIRST_RENDER_SCRIPT.format(app_dir=APP_DIR, app_path=APP_PATH, lazy=LAZY_MODULES)
+    for run in range(args.runs):
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, env=env)
+        last_line = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else "{}"
+        print(f"first render run {run + 1}: {json.loads(last_line)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Insert/read benchmark for the SQLite storage layer at 100k rows per user.
+#
+# Usage: python benchmarks/bench_storage.py [--rows 100000] [--users 3]
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import Storage  # noqa: E402
+
+
+def timed(label, fn, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{label:<45} {elapsed * 1000:>10.3f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FeelEase storage inserts and reads.")
+    parser.add_argument("--rows", type=int, default=100_000, help="rows per table per user")
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = Storage(os.path.join(tmp, "bench.sqlite3"))
+        start = datetime.now() - timedelta(days=args.rows // 100)
+        for u in range(args.users):
+            user_id = f"user{u}"
+            storage.upsert_user(user_id, user_id)
+            messages = [("user" if i % 2 == 0 else "assistant", f"message {i} " * 10,
+                         start + timedelta(minutes=i)) for i in range(args.rows)]
+            moods = [((i % 5) + 1, "😊", start + timedelta(minutes=14 * i)) for i in range(args.rows)]
+
+            def insert_messages():
+                for i in range(0, len(messages), args.batch):
+                    storage.append_messages(user_id, messages[i:i + args.batch])
+
+            def insert_moods():
+                for i in range(0, len(moods), args.batch):
+                    storage.add_moods(user_id, moods[i:i + args.batch])
+
+            timed(f"[{user_id}] insert {args.rows} messages (batched)", insert_messages)
+            timed(f"[{user_id}] insert {args.rows} moods (batched)", insert_moods)
+
+        user_id = "user0"
+        timed("single message append", lambda: storage.append_message(user_id, "user", "hi", datetime.now()), 200)
+        timed("recent_messages(limit=200)", lambda: storage.recent_messages(user_id, 200), 50)
+        timed("moods_since(90 days)", lambda: storage.moods_since(user_id, datetime.now().date() - timedelta(days=90)), 50)
+        timed("touch_streak", lambda: storage.touch_streak(user_id, datetime.now().date()), 50)
+        print(f"database size: {os.path.getsize(os.path.join(tmp, 'bench.sqlite3')) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# Streamed (SSE) versus blocking Gemini replies against the local stand-in server.
+#
+# Sends the same request to FakeGeminiServer's streamGenerateContent?alt=sse
+# through gemini.GeminiStream, and to generateContent, and reports what the
+# user waits for: time to first token for the stream, the whole reply for the
+# blocking call. Also times incremental translation (each completed sentence
+# translated as it arrives, as app.py's fetch_reply does) against translating
+# the finished reply, and checks that:
+#   - the streamed text is the whole reply, in order
+#   - a stream cut off mid-reply raises instead of ending quietly
+#   - a 5xx before the stream starts raises HTTPError
+# Exits 1 if a check fails.
+#
+# Usage: python benchmarks/bench_streaming.py [--replies 50] [--first-token 0.3] [--chunk 0.15]
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gemini  # noqa: E402
+from fake_upstreams import REPLY_SENTENCES, FakeGeminiServer  # noqa: E402
+from harness import percentile  # noqa: E402
+from http_client import HttpClient  # noqa: E402
+
+BODY = '{"contents": [{"role": "user", "parts": [{"text": "I had a long day"}]}]}'
+MODEL = "stub"
+
+
+def fake_translate(latency):
+    def translate(text):
+        time.sleep(latency)
+        return f"[hi] {text}"
+    return translate
+
+
+def streamed_turn(client, translate=None):
+    """One streamed reply; returns (seconds to first shown text, total seconds, text shown)."""
+    started = time.perf_counter()
+    stream = gemini.GeminiStream(BODY, "offline-benchmark", post=client.post, model=MODEL)
+    shown, pending, first = "", "", None
+    for chunk in stream:
+        if translate is None:
+            shown += chunk
+        else:
+            pending += chunk
+            done, pending = gemini.split_sentences(pending)
+            if done.strip():
+                shown += translate(done.strip()) + done[len(done.rstrip()):]
+        if shown and first is None:
+            first = time.perf_counter() - started
+    if pending.strip():
+        shown += translate(pending)
+    total = time.perf_counter() - started
+    return first if first is not None else total, total, shown
+
+
+def blocking_turn(client, translate=None):
+    """One generateContent reply, translated whole at the end; nothing is shown before it returns."""
+    started = time.perf_counter()
+    response = client.post(gemini.model_url("generateContent", "offline-benchmark", MODEL),
+                           headers={"Content-Type": "application/json"}, data=BODY, timeout=20)
+    response.raise_for_status()
+    text = gemini.extract_text(response.json())
+    if translate is not None:
+        text = translate(text)
+    total = time.perf_counter() - started
+    return total, total, text
+
+
+def report(name, turns):
+    first = sorted(turn[0] for turn in turns)
+    total = sorted(turn[1] for turn in turns)
+    print(f"{name:<28} {1000 * statistics.median(first):>10.0f} {1000 * percentile(first, 95):>8.0f} "
+          f"{1000 * statistics.median(total):>10.0f}")
+    return statistics.median(first)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streamed against blocking Gemini replies.")
+    parser.add_argument("--replies", type=int, default=50)
+    parser.add_argument("--first-token", type=float, default=0.3, help="stub delay before the first chunk, seconds")
+    parser.add_argument("--chunk", type=float, default=0.15, help="stub delay between chunks, seconds")
+    parser.add_argument("--translate-ms", type=float, default=40, help="stand-in translator latency per call")
+    args = parser.parse_args()
+
+    checks = []
+
+    def check(name, ok, detail):
+        checks.append(ok)
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: {detail}")
+
+    client = HttpClient(max_retries=0)
+    translate = fake_translate(args.translate_ms / 1000)
+    print(f"{'':<28} {'first text ms':>13} {'p95':>5} {'total ms':>10}")
+    with FakeGeminiServer(first_token_seconds=args.first_token, chunk_seconds=args.chunk) as server:
+        gemini.API_BASE = server.api_base  # read by gemini.model_url on every call
+        blocking = report("blocking", [blocking_turn(client) for _ in range(args.replies)])
+        streamed_turns = [streamed_turn(client) for _ in range(args.replies)]
+        streamed = report("streamed", streamed_turns)
+        report("blocking, translated", [blocking_turn(client, translate) for _ in range(args.replies // 5 or 1)])
+        report("streamed, per sentence", [streamed_turn(client, translate) for _ in range(args.replies // 5 or 1)])
+
+        print()
+        expected = "".join(REPLY_SENTENCES)
+        check("whole reply", all(turn[2] == expected for turn in streamed_turns),
+              f"{len(streamed_turns)} streams, {len(REPLY_SENTENCES)} chunks each")
+        check("first token sooner", streamed < blocking,
+              f"median {1000 * streamed:.0f} ms streamed vs {1000 * blocking:.0f} ms blocking")
+
+    with FakeGeminiServer(first_token_seconds=0, chunk_seconds=0, truncate_rate=1.0) as server:
+        gemini.API_BASE = server.api_base
+        stream = gemini.GeminiStream(BODY, "offline-benchmark", post=client.post, model=MODEL)
+        received = []
+        try:
+            for chunk in stream:
+                received.append(chunk)
+            error = None
+        except requests.exceptions.RequestException as e:
+            error = type(e).__name__
+        check("cut-off stream", error is not None and received == REPLY_SENTENCES[:1],
+              f"{len(received)} chunk(s) then {error}")
+
+    with FakeGeminiServer(first_token_seconds=0, error_rate=1.0) as server:
+        gemini.API_BASE = server.api_base
+        try:
+            list(gemini.GeminiStream(BODY, "offline-benchmark", post=client.post, model=MODEL))
+            error = None
+        except requests.exceptions.HTTPError as e:
+            error = e.response.status_code
+        check("upstream error", error == 503, f"HTTP {error}")
+
+    if not all(checks):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
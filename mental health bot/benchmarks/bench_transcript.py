@@ -0,0 +1,66 @@
+# Rerun cost of the chat transcript: every message vs. the bounded window.
+#
+# Runs a minimal Streamlit script under streamlit.testing's AppTest that
+# renders a conversation of N messages, and times repeated reruns.
+#
+# Usage: python benchmarks/bench_transcript.py [--reruns 5] [--sizes 50 500 5000]
+import argparse
+import os
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import transcript  # noqa: E402
+
+
+def transcript_script():
+    # Runs inside AppTest; settings come from session_state.
+    import streamlit as st
+
+    import transcript
+
+    messages = st.session_state.messages
+    window = len(messages) if st.session_state.render_all else transcript.PAGE_SIZE
+    transcript.render_transcript(messages, window, load_earlier_label="Load earlier messages")
+
+
+def make_messages(count):
+    line = ("It sounds like a lot is on your mind. Would you like to try a short **breathing exercise** "
+            "or tell me more about what happened today?")
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"{line} ({i})"}
+        for i in range(count)
+    ]
+
+
+def time_reruns(count, render_all, reruns):
+    app = AppTest.from_function(transcript_script, default_timeout=600)
+    app.session_state.messages = make_messages(count)
+    app.session_state.render_all = render_all
+    app.run()  # the first run also pays for script compilation
+    started = time.perf_counter()
+    for _ in range(reruns):
+        app.run()
+    return 1000 * (time.perf_counter() - started) / reruns, len(app.chat_message)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transcript rendering per rerun.")
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    args = parser.parse_args()
+
+    print(f"window: {transcript.PAGE_SIZE} messages")
+    print(f"{'messages':>9} {'full ms/rerun':>14} {'windowed ms/rerun':>18} {'rendered':>9}")
+    for count in args.sizes:
+        full_ms, _ = time_reruns(count, True, args.reruns)
+        windowed_ms, rendered = time_reruns(count, False, args.reruns)
+        print(f"{count:>9} {full_ms:>14.1f} {windowed_ms:>18.1f} {rendered:>9}")
+
+
+if __name__ == "__main__":
+    main()
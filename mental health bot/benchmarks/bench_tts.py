@@ -0,0 +1,120 @@
+# Time-to-first-audio and rapid-click behavior of the TTS worker.
+#
+# Usage: python benchmarks/bench_tts.py [--real]
+#
+# By default a simulated engine stands in for pyttsx3: synthesis takes
+# --ms-per-char before an utterance starts, and speaking takes as long again.
+# Pass --real to drive the installed pyttsx3 backend instead.
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tts import TTSWorker, default_engine_factory  # noqa: E402
+
+REPLY = ("I hear you. It sounds like you're having a really tough day. Remember, it's okay to not be okay. "
+         "Sometimes, just taking a moment to sit with those feelings can help. Try taking a few deep breaths. "
+         "I am an AI and not a substitute for professional help. Please consider speaking with a therapist. ") * 3
+
+
+class SimulatedVoice:
+    def __init__(self, id_, name):
+        self.id = id_
+        self.name = name
+
+
+class SimulatedEngine:
+    """Mimics the pyttsx3 engine API with latency proportional to text length."""
+
+    def __init__(self, ms_per_char):
+        self.ms_per_char = ms_per_char
+        self.callbacks = {}
+        self.pending = []
+        self.stopped = False
+        self.utterances = 0
+
+    def getProperty(self, name):
+        return [SimulatedVoice("f", "Female"), SimulatedVoice("m", "Male")] if name == "voices" else None
+
+    def setProperty(self, name, value):
+        pass
+
+    def connect(self, topic, callback):
+        self.callbacks[topic] = callback
+
+    def say(self, text):
+        self.pending.append(text)
+
+    def stop(self):
+        self.stopped = True
+
+    def runAndWait(self):
+        self.stopped = False
+        for text in self.pending:
+            time.sleep(len(text) * self.ms_per_char / 1000)  # synthesis
+            self.utterances += 1
+            self.callbacks["started-utterance"]("utterance")
+            for i, word in enumerate(text.split()):
+                self.callbacks["started-word"]("utterance", i, len(word))
+                if self.stopped:
+                    break
+                time.sleep(len(word) * self.ms_per_char / 1000)  # playback
+            if self.stopped:
+                break
+        self.pending = []
+
+
+def wait_idle(worker, timeout=60):
+    deadline = time.time() + timeout
+    while (worker.is_speaking() or not worker._queue.empty()) and time.time() < deadline:
+        time.sleep(0.005)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the FeelEase TTS worker.")
+    parser.add_argument("--real", action="store_true", help="use the installed pyttsx3 backend")
+    parser.add_argument("--ms-per-char", type=float, default=0.5)
+    args = parser.parse_args()
+
+    def factory():
+        return default_engine_factory() if args.real else SimulatedEngine(args.ms_per_char)
+
+    worker = TTSWorker(engine_factory=factory)
+    if not worker.available:
+        print(f"TTS backend unavailable: {worker.error}")
+        return
+
+    # Previous behavior: a fresh engine speaks the whole reply as one utterance.
+    if not args.real:
+        engine = SimulatedEngine(args.ms_per_char)
+        started = time.perf_counter()
+        first_audio = []
+        engine.connect("started-utterance", lambda name: first_audio.append(time.perf_counter() - started))
+        engine.connect("started-word", lambda *a: engine.stop())
+        engine.say(REPLY)
+        engine.runAndWait()
+        print(f"time to first audio, whole reply:     {first_audio[0] * 1000:8.1f} ms")
+
+    # Current behavior: sentence chunks on the persistent worker.
+    worker.speak(REPLY)
+    wait_idle(worker)
+    print(f"time to first audio, sentence chunks: {worker.stats['last_time_to_first_audio'] * 1000:8.1f} ms")
+
+    # Ten rapid clicks: only the last one should play, nothing overlaps.
+    before = dict(worker.stats)
+    for _ in range(10):
+        worker.speak(REPLY)
+    time.sleep(0.05)
+    stopped_at = time.perf_counter()
+    worker.stop()
+    wait_idle(worker)
+    print(f"10 rapid clicks: jobs started={worker.stats['jobs'] - before['jobs']}, "
+          f"cancelled={worker.stats['cancelled'] - before['cancelled']}, "
+          f"silent {1000 * (time.perf_counter() - stopped_at):.1f} ms after stop")
+    worker.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Verse selection from the local library.
+#
+# Times detecting the emotion of a message (the sentiment keyword scan) and
+# picking the user's next verse for it, checks that each user goes through a
+# whole rotation group before any verse repeats, and compares the prompt
+# tokens with the old approach of asking the model for a verse (a system
+# prompt section on every turn plus an extra instruction on negative ones).
+#
+# Usage: python benchmarks/bench_verses.py [--picks 100000] [--users 1000]
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_context import estimate_tokens  # noqa: E402
+from sentiment import SentimentDetector  # noqa: E402
+from verses import EMOTIONS, detect_emotion, load_verses  # noqa: E402
+
+PROMPTS = [
+    "I feel so lonely since my friends moved away",
+    "I'm really stressed about my exams next week",
+    "I'm so angry at my brother, he never listens",
+    "Everything feels hopeless and I'm tired of everything",
+    "I've been feeling sad all day and I don't know why",
+    "मैं बहुत अकेला महसूस कर रहा हूँ",
+    "আমি খুব হতাশ",
+]
+# What the model used to be sent for verses
+OLD_SYSTEM_SECTION = """### Religious Guidance and Comfort:
+If a user has specified their faith, you can provide a relevant and comforting verse from their religious text. For example:
+- **Hinduism:** The Bhagavad Gita, the Upanishads.
+- **Christianity:** The Bible (e.g., Psalms, Proverbs).
+- **Jainism:** The Tattvartha Sutra.
+- **Buddhism:** The Dhammapada.
+Ensure the verse is always positive, uplifting, and aligned with mental well-being, and never prescriptive or judgmental.
+"""
+OLD_FAITH_MESSAGE = ("The user's faith is Hinduism. The user may be comforted by a relevant and positive verse "
+                     "from their holy book for their mood. Please provide one.")
+NEW_SYSTEM_SECTION = """### Religious Guidance and Comfort:
+When the user has specified their faith, the app shows them a comforting verse from their tradition next to your reply. Do not quote scripture yourself; you may gently acknowledge their faith.
+"""
+
+
+def time_us(fn, n):
+    started = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return 1e6 * (time.perf_counter() - started) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark verse selection from the local library.")
+    parser.add_argument("--picks", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    library = load_verses()
+    detector = SentimentDetector()
+    matches = [detector.matches(prompt) for prompt in PROMPTS]
+    print(f"{len(library.verses)} verses, faiths: {', '.join(sorted(library.faiths))}")
+    print(f"{'faith':<14}" + "".join(f"{emotion:>14}" for emotion in EMOTIONS))
+    for faith in sorted(library.faiths):
+        # The group each emotion rotates through; "(all)" means all of the faith's verses
+        groups = [library.group(faith, emotion).partition("/")[2] or "(all)" for emotion in EMOTIONS]
+        print(f"{faith:<14}" + "".join(f"{group:>14}" for group in groups))
+
+    faiths = sorted(library.faiths)
+    pick_us = time_us(lambda i: library.pick(f"user{i % args.users}", faiths[i % len(faiths)], i), args.picks)
+    scan_us = time_us(lambda i: detect_emotion(detector.matches(PROMPTS[i % len(PROMPTS)])), args.picks // 10)
+    detect_us = time_us(lambda i: detect_emotion(matches[i % len(matches)]), args.picks)
+    print(f"\npick: {pick_us:.2f} us   emotion from matches: {detect_us:.2f} us   "
+          f"keyword scan + emotion: {scan_us:.1f} us")
+
+    # Every user sees every verse of a group once before any repeats
+    rng = random.Random(0)
+    repeats, firsts = 0, []
+    for user in range(args.users):
+        faith = rng.choice(faiths)
+        group = library.group(faith, rng.choice(EMOTIONS))
+        size = len({library.pick(f"user{user}", group, i)["id"] for i in range(200)})
+        seen = [library.pick(f"user{user}", group, i)["id"] for i in range(size)]
+        repeats += len(seen) - len(set(seen))
+        firsts.append(seen[0])
+    print(f"repeats within a rotation over {args.users} users: {repeats}; "
+          f"distinct first verses: {len(set(firsts))}")
+
+    old_negative = estimate_tokens(OLD_SYSTEM_SECTION) + estimate_tokens(OLD_FAITH_MESSAGE)
+    print(f"\nprompt tokens for verses per turn: old {estimate_tokens(OLD_SYSTEM_SECTION)} "
+          f"(+{estimate_tokens(OLD_FAITH_MESSAGE)} on negative turns = {old_negative}), "
+          f"new {estimate_tokens(NEW_SYSTEM_SECTION)}")
+    lengths = [estimate_tokens(verse["text"]["en"]) for verse in library.verses.values()]
+    print(f"verse reply tokens no longer generated by the model: ~{statistics.mean(lengths):.0f} per verse")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# Local stand-ins for the services the app talks to, for offline benchmarks.
+#
+# - FakeGeminiServer: an HTTP server speaking enough of the Gemini REST API
+#   (generateContent, streamGenerateContent?alt=sse, cachedContents) with
+#   configurable latency and injected failures. Point the app at it with
+#   GEMINI_API_BASE.
+# - install_fake_tts(): a pyttsx3 module whose engine does nothing.
+# - install_fake_translator(): patches deep_translator.GoogleTranslator so
+#   translation is local and instant.
+import json
+import random
+import sys
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY_SENTENCES = [
+    "I hear you, and it sounds like today has been heavy. ",
+    "Your feelings are valid. ",
+    "Try taking a few slow, deep breaths with me. ",
+    "I am an AI and not a substitute for professional help. ",
+]
+
+
+def _event(text):
+    return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+
+
+class FakeGeminiServer:
+    """Serves canned Gemini replies on 127.0.0.1.
+
+    `first_token_seconds` is the delay before the first chunk and
+    `chunk_seconds` the delay between streamed chunks; generateContent
+    answers once the whole reply would have been generated, as the real API
+    does. Streams use chunked transfer encoding like the real API,
+    so clients see each event as soon as it is written.
+
+    Failures are injected per model request: `error_rate` of them are answered
+    with `error_status`, and `truncate_rate` of the streams are cut off after
+    the first chunk. Request body sizes are kept in `request_bytes`.
+
+    Models can behave differently: `model_latency` maps a model name to its
+    first-token delay, either seconds or a function of a random.Random
+    (for latency spikes), and models in `failing_models` always answer
+    `error_status`. Requests per model are counted in `model_requests`.
+    """
+
+    def __init__(self, first_token_seconds=0.05, chunk_seconds=0.01, sentences=REPLY_SENTENCES,
+                 error_rate=0.0, error_status=503, truncate_rate=0.0, seed=0, model_latency=None,
+                 failing_models=()):
+        self.first_token_seconds = first_token_seconds
+        self.model_latency = model_latency or {}
+        self.failing_models = set(failing_models)
+        self.model_requests = {}
+        self.chunk_seconds = chunk_seconds
+        self.sentences = sentences
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.truncate_rate = truncate_rate
+        self.requests = 0
+        self.request_bytes = []
+        self.errors = 0
+        self.truncated = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def api_base(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1beta"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and the first chunk go out as separate small writes; don't let Nagle hold them back
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except ConnectionResetError:
+                    # The client closed a kept-alive connection without reading all of a response
+                    self.close_connection = True
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _write_chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with fake._lock:
+                    fake.requests += 1
+                if "/cachedContents" in self.path:
+                    # Like the real API for prompts below the minimum cacheable size.
+                    self._send_json(400, {"error": {"message": "Cached content is too small"}})
+                    return
+                model = self.path.split("/models/", 1)[-1].split(":", 1)[0]
+                with fake._lock:
+                    fake.request_bytes.append(len(body))
+                    fake.model_requests[model] = fake.model_requests.get(model, 0) + 1
+                    fail = model in fake.failing_models or fake._random.random() < fake.error_rate
+                    truncate = not fail and fake._random.random() < fake.truncate_rate
+                    fake.errors += fail
+                    fake.truncated += truncate
+                    delay = fake.model_latency.get(model, fake.first_token_seconds)
+                    if callable(delay):
+                        delay = delay(fake._random)
+                time.sleep(delay)
+                if fail:
+                    self._send_json(fake.error_status, {"error": {"message": "Injected failure"}})
+                    return
+                if ":streamGenerateContent" in self.path:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    try:
+                        for i, sentence in enumerate(fake.sentences):
+                            if i:
+                                if truncate:
+                                    # Drop the connection mid-stream, without the terminating chunk.
+                                    self.close_connection = True
+                                    return
+                                time.sleep(fake.chunk_seconds)
+                            self._write_chunk(b"data: " + json.dumps(_event(sentence)).encode("utf-8") + b"\r\n\r\n")
+                        self._write_chunk(b"")
+                    except (BrokenPipeError, ConnectionResetError):
+                        # The client closed the stream early (e.g. the losing request of a hedge)
+                        self.close_connection = True
+                    return
+                time.sleep(fake.chunk_seconds * (len(fake.sentences) - 1))
+                self._send_json(200, _event("".join(fake.sentences)))
+
+        return Handler
+
+
+class _SilentEngine:
+    def getProperty(self, name):
+        return []
+
+    def setProperty(self, name, value):
+        pass
+
+    def connect(self, topic, callback):
+        pass
+
+    def say(self, text):
+        pass
+
+    def save_to_file(self, text, path):
+        with open(path, "wb"):
+            pass
+
+    def runAndWait(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def install_fake_tts():
+    """Makes `import pyttsx3` return an engine that produces no audio."""
+    module = types.ModuleType("pyttsx3")
+    module.init = lambda *args, **kwargs: _SilentEngine()
+    sys.modules["pyttsx3"] = module
+
+
+def install_fake_translator(latency_seconds=0.0):
+    """Replaces GoogleTranslator.translate with a local tagger ("[hi] text").
+
+    Returns a dict whose "calls" entry counts the translations requested.
+    """
+    from deep_translator import GoogleTranslator
+
+    counter = {"calls": 0}
+    lock = threading.Lock()
+
+    def translate(self, text, **kwargs):
+        with lock:
+            counter["calls"] += 1
+        if latency_seconds:
+            time.sleep(latency_seconds)
+        return f"[{self._target}] {text}"
+
+    GoogleTranslator.translate = translate
+    return counter
@@ -0,0 +1,199 @@
+# Shared helpers for the benchmarks that drive app.py through AppTest.
+#
+# - Session: one simulated user (its own AppTest and session state).
+# - instrumented(): makes AppTest use InstrumentedRunner, which times every
+#   script and fragment run and counts the bytes sent to the browser. It can
+#   also replay `run_every` fragment timers: AppTest has no frontend, so those
+#   never tick on their own.
+import contextlib
+import os
+import statistics
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+APP_PATH = os.path.join(APP_DIR, "app.py")
+for path in (APP_DIR, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def rss_mb():
+    """Resident set size of this process, from /proc (Linux)."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(seconds):
+    """Count, p50, p95 and max (in ms) of a list of durations in seconds."""
+    if not seconds:
+        return {"count": 0, "p50_ms": None, "p95_ms": None, "max_ms": None}
+    return {
+        "count": len(seconds),
+        "p50_ms": 1000 * statistics.median(seconds),
+        "p95_ms": 1000 * percentile(seconds, 95),
+        "max_ms": 1000 * max(seconds),
+    }
+
+
+def _runner_class():
+    from streamlit.runtime.scriptrunner.script_runner import RerunData, ScriptRunnerEvent
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    stop_events = {
+        ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS: "script",
+        ScriptRunnerEvent.SCRIPT_STOPPED_WITH_COMPILE_ERROR: "script",
+        ScriptRunnerEvent.SCRIPT_STOPPED_FOR_RERUN: "interrupted",
+        ScriptRunnerEvent.FRAGMENT_STOPPED_WITH_SUCCESS: "fragment",
+    }
+
+    class InstrumentedRunner(LocalScriptRunner):
+        """LocalScriptRunner that records every run as {"kind", "seconds", "bytes"}.
+
+        With `simulate_seconds`, the fragment timers announced by the first
+        full run are replayed back to back, in the order a browser would have
+        fired them over that much time, as fragment-scoped reruns on this same
+        runner (so AppTest.run() returns only once they are all done).
+        """
+
+        def __init__(self, *args, simulate_seconds=0, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.simulate_seconds = simulate_seconds
+            self.runs = []
+            self.timers = {}  # fragment_id -> run_every interval in seconds
+            self._schedule = None
+            self._started = None
+            self._bytes = 0
+            self.on_event.connect(self._record, weak=False)
+
+        def _record(self, sender, event, forward_msg=None, **kwargs):
+            if event == ScriptRunnerEvent.SCRIPT_STARTED:
+                self._started = time.perf_counter()
+                self._bytes = 0
+            elif event == ScriptRunnerEvent.ENQUEUE_FORWARD_MSG:
+                self._bytes += forward_msg.ByteSize()
+                if forward_msg.HasField("auto_rerun"):
+                    self.timers[forward_msg.auto_rerun.fragment_id] = forward_msg.auto_rerun.interval
+            elif event in stop_events and self._started is not None:
+                self.runs.append({"kind": stop_events[event], "seconds": time.perf_counter() - self._started,
+                                  "bytes": self._bytes})
+                self._started = None
+
+        def _on_script_finished(self, ctx, event, premature_stop):
+            super()._on_script_finished(ctx, event, premature_stop)
+            if not self.simulate_seconds or event == ScriptRunnerEvent.SCRIPT_STOPPED_FOR_RERUN:
+                # A rerun is already queued (st.rerun()); the next finish resumes the schedule
+                return
+            if self._schedule is None:
+                ticks = [
+                    (interval * n, fragment_id)
+                    for fragment_id, interval in self.timers.items()
+                    for n in range(1, int(self.simulate_seconds / interval) + 1)
+                ]
+                self._schedule = [fragment_id for _, fragment_id in sorted(ticks, reverse=True)]
+            while self._schedule:
+                fragment_id = self._schedule.pop()
+                # A fragment that is no longer rendered stops ticking in the browser too
+                if self._fragment_storage.contains(fragment_id):
+                    self.request_rerun(RerunData(fragment_id_queue=[fragment_id], is_fragment_scoped_rerun=True))
+                    return
+
+    return InstrumentedRunner
+
+
+class RunRecorder:
+    """Collects the runner of every AppTest run made while instrumented() is active.
+
+    Set `simulate_seconds` before a run to replay that many seconds of
+    fragment timer ticks after it.
+    """
+
+    def __init__(self):
+        self.runners = []
+        self.simulate_seconds = 0
+
+    def runs(self, kind=None):
+        return [run for runner in self.runners for run in runner.runs if kind is None or run["kind"] == kind]
+
+
+@contextlib.contextmanager
+def instrumented():
+    """Runs AppTest scripts on InstrumentedRunner; yields a RunRecorder."""
+    from streamlit.testing.v1 import app_test
+
+    runner_class = _runner_class()
+    recorder = RunRecorder()
+
+    def factory(*args, **kwargs):
+        runner = runner_class(*args, simulate_seconds=recorder.simulate_seconds, **kwargs)
+        recorder.runners.append(runner)
+        return runner
+
+    original = app_test.LocalScriptRunner
+    app_test.LocalScriptRunner = factory
+    try:
+        yield recorder
+    finally:
+        app_test.LocalScriptRunner = original
+
+
+# Passphrase simulated users log in with, so their history is saved
+PASSPHRASE = "load test passphrase"
+
+
+class Session:
+    """One simulated user driving app.py through AppTest."""
+
+    def __init__(self, index, timeout, name=None):
+        from streamlit.testing.v1 import AppTest
+
+        self.index = index
+        self.name = name or f"Load User {index}"
+        self.app = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.latencies = []
+
+    def run(self, action=None):
+        started = time.perf_counter()
+        if action is not None:
+            action(self.app)
+        self.app.run()
+        self.latencies.append(time.perf_counter() - started)
+        if self.app.exception:
+            raise RuntimeError(f"session {self.index}: {self.app.exception[0].message}")
+
+    def login(self, age="30"):
+        self.run()
+        self.app.text_input(key="name_input").input(self.name)
+        self.app.text_input(key="age_input").input(age)
+        self.app.text_input(key="passphrase_input").input(PASSPHRASE)
+        self.click("Start chatting")
+
+    def chat(self, prompt):
+        self.run(lambda app: app.chat_input[0].set_value(prompt))
+
+    def click(self, label):
+        """Clicks the first button (main area or sidebar) whose label contains `label`."""
+        button = next(b for b in self.app.button if label in b.label)
+        self.run(lambda app: button.click())
+
+    def select(self, label, value):
+        """Picks `value` in the selectbox whose label contains `label`."""
+        selectbox = next(s for s in self.app.selectbox if label in s.label)
+        self.run(lambda app: selectbox.select(value))
+
+    def wait_for_reply(self, timeout=30):
+        """Reruns until the background chat turn has been shown."""
+        deadline = time.perf_counter() + timeout
+        while self.app.session_state.chat_job is not None and time.perf_counter() < deadline:
+            time.sleep(0.01)
+            if self.app.session_state.chat_job.done():
+                self.run()
@@ -0,0 +1,333 @@
+# Offline benchmark suite: scripted scenarios against local stand-ins.
+#
+# app.py runs through AppTest against the fake Gemini server and translator
+# from fake_upstreams.py, silent TTS and a temporary SQLite database, so no
+# Google endpoint is contacted. Results are written as JSON; pass a previous
+# results file to --compare to flag regressions between two versions:
+#
+#   python benchmarks/run_suite.py --output before.json
+#   python benchmarks/run_suite.py --output after.json --compare before.json
+#
+# Scenarios (each in a fresh interpreter, so memory figures and process-wide
+# caches don't carry over from one to the next):
+#   long_chat        many chat turns in one session, then plain reruns
+#   hindi_session    chat with the UI and replies in Hindi (fake translator)
+#   breathing_timer  the breathing exercise left running; its timer ticks are
+#                    replayed for --timer-seconds of simulated time
+#   mood_10k         a returning user with 10k saved mood ratings
+#
+# Reported per scenario: full-run ("rerun") latency and bytes sent to the
+# browser, per-turn latency (prompt submitted -> reply rendered), model
+# request payload bytes, translations made, and process RSS.
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_upstreams import FakeGeminiServer, install_fake_translator, install_fake_tts  # noqa: E402
+from harness import APP_DIR, PASSPHRASE, Session, instrumented, rss_mb, summarize  # noqa: E402
+
+ENGLISH_PROMPTS = [
+    "I have been feeling stressed about work lately.",
+    "Can you suggest something to help me sleep?",
+    "Today was a little better than yesterday.",
+    "My friends don't seem to have time for me anymore.",
+]
+HINDI_PROMPTS = [
+    "मैं आज बहुत तनाव में हूँ।",
+    "मुझे रात को नींद नहीं आती।",
+    "आज का दिन कल से थोड़ा बेहतर था।",
+]
+
+
+def chat_turns(session, prompts, turns):
+    """Sends `turns` prompts, each waiting for its reply; returns turn metrics."""
+    latencies, first_tokens, errors = [], [], 0
+    for i in range(turns):
+        started = time.perf_counter()
+        session.chat(prompts[i % len(prompts)])
+        session.wait_for_reply()
+        latencies.append(time.perf_counter() - started)
+        state = session.app.session_state
+        # chat_error is shown (and cleared) by the rerun that renders the reply
+        if state.messages[-1]["content"].startswith("Sorry"):
+            errors += 1
+        elif state.last_response_timing.get("ttft") is not None:
+            first_tokens.append(state.last_response_timing["ttft"])
+    return {"turn": summarize(latencies), "model_ttft": summarize(first_tokens), "error_turns": errors}
+
+
+def run_metrics(recorder):
+    """Latency and browser bytes of the full script runs recorded so far."""
+    runs = recorder.runs("script")
+    return {
+        "rerun": summarize([run["seconds"] for run in runs]),
+        "rerun_bytes": max(run["bytes"] for run in runs) if runs else None,
+    }
+
+
+def long_chat(config, db_path):
+    with instrumented() as recorder:
+        session = Session(0, config["timeout"], name="Suite Long Chat")
+        session.login()
+        turns = chat_turns(session, ENGLISH_PROMPTS, config["turns"])
+        for _ in range(config["reruns"]):
+            session.run()
+    return {**turns, **run_metrics(recorder), "messages": len(session.app.session_state.messages)}
+
+
+def hindi_session(config, db_path):
+    with instrumented() as recorder:
+        session = Session(0, config["timeout"], name="Suite Hindi")
+        session.login()
+        session.select("Choose Language", "Hindi")
+        turns = chat_turns(session, HINDI_PROMPTS, config["hindi_turns"])
+        for _ in range(config["reruns"]):
+            session.run()
+    return {**turns, **run_metrics(recorder)}
+
+
+def breathing_timer(config, db_path):
+    seconds = config["timer_seconds"]
+    with instrumented() as recorder:
+        session = Session(0, config["timeout"], name="Suite Breathing")
+        session.login()
+        session.click("Breathing Exercise")
+        script_runs = session.app.session_state.script_runs
+        recorder.simulate_seconds = seconds
+        session.run()
+        recorder.simulate_seconds = 0
+        full_runs = session.app.session_state.script_runs - script_runs
+    ticks = recorder.runners[-1].runs
+    fragments = [run for run in ticks if run["kind"] == "fragment"]
+    rerun = run_metrics(recorder)
+    per_minute = 60 / seconds
+    return {
+        **rerun,
+        "simulated_seconds": seconds,
+        "timers": len(recorder.runners[-1].timers),
+        "fragment_tick": summarize([run["seconds"] for run in fragments]),
+        "fragment_ticks_per_minute": len(fragments) * per_minute,
+        "full_runs_during_timer": full_runs,
+        "timer_cpu_ms_per_minute": 1000 * sum(run["seconds"] for run in fragments) * per_minute,
+        "timer_bytes_per_minute": sum(run["bytes"] for run in fragments) * per_minute,
+        # What the same minute cost when every 1 s tick reran the whole script
+        "full_rerun_cpu_ms_per_minute": rerun["rerun"]["p50_ms"] * 60,
+        "full_rerun_bytes_per_minute": rerun["rerun_bytes"] * 60,
+    }
+
+
+def mood_10k(config, db_path):
+    from mood_analytics import MOOD_EMOJI
+    from storage import Storage, user_key
+
+    name = "Suite Moods"
+    count = config["moods"]
+    rng = random.Random(0)
+    start = datetime.now() - timedelta(days=60)
+    step = timedelta(days=60) / count
+    rows = []
+    for i in range(count):
+        rating = rng.randint(1, 5)
+        rows.append((rating, MOOD_EMOJI[rating], start + i * step))
+    storage = Storage(db_path)
+    storage.add_moods(user_key(name, PASSPHRASE), rows)
+    # The mood tracker and chart are shown once there is a conversation
+    now = datetime.now()
+    storage.append_messages(user_key(name, PASSPHRASE), [
+        ("user" if i % 2 == 0 else "assistant", ENGLISH_PROMPTS[i], now - timedelta(minutes=4 - i))
+        for i in range(4)
+    ])
+
+    with instrumented() as recorder:
+        session = Session(0, config["timeout"], name=name)
+        session.login()
+        login = session.latencies[-1]
+        points = len(session.app.session_state.mood_data)
+        for _ in range(config["reruns"]):
+            session.run()
+        memoized = session.latencies[-config["reruns"]:]
+        ratings = []
+        for rating in (4, 2, 5):
+            session.run(lambda app: app.button(key=f"mood_{rating}").click())
+            ratings.append(session.latencies[-1])
+    return {
+        **run_metrics(recorder),
+        "mood_points": points,
+        "mood_points_after_ratings": len(session.app.session_state.mood_data),
+        "login_ms": 1000 * login,
+        "memoized_rerun": summarize(memoized),
+        "rate_mood": summarize(ratings),
+    }
+
+
+SCENARIOS = {
+    "long_chat": long_chat,
+    "hindi_session": hindi_session,
+    "breathing_timer": breathing_timer,
+    "mood_10k": mood_10k,
+}
+
+
+def run_scenario(name, config):
+    """Runs one scenario in this process and returns its results."""
+    from streamlit.testing.v1 import AppTest  # noqa: F401 (loaded before the RSS baseline)
+
+    install_fake_tts()
+    translations = install_fake_translator(config["translate_latency"])
+    server = FakeGeminiServer(
+        first_token_seconds=config["latency"], chunk_seconds=config["chunk_latency"],
+        error_rate=config["error_rate"], truncate_rate=config["truncate_rate"], seed=config["seed"],
+    )
+    with tempfile.TemporaryDirectory() as tmp, server:
+        db_path = os.path.join(tmp, "suite.sqlite3")
+        os.environ.update({
+            "GOOGLE_API_KEY": "offline-benchmark",
+            "GEMINI_API_BASE": server.api_base,
+            "FEELEASE_DB": db_path,
+            # Start with empty translation and audio caches; audio_cache reads its own variable
+            "FEELEASE_CACHE_DIR": tmp,
+            "FEELEASE_AUDIO_DIR": os.path.join(tmp, "audio"),
+            "FEELEASE_STREAMING": "1" if config["stream"] else "0",
+            # Turns are sent back to back and prompts repeat; admission control has bench_rate_limit.py
+            "FEELEASE_SESSION_TURNS_BURST": "1000000",
+            "FEELEASE_PROCESS_TURNS_BURST": "1000000",
+            "FEELEASE_DUPLICATE_WINDOW_SECONDS": "0",
+        })
+        baseline = rss_mb()
+        started = time.perf_counter()
+        result = SCENARIOS[name](config, db_path)
+        result["seconds"] = time.perf_counter() - started
+        sizes = server.request_bytes
+        result["model_requests"] = len(sizes)
+        result["request_bytes_mean"] = sum(sizes) / len(sizes) if sizes else None
+        result["request_bytes_max"] = max(sizes) if sizes else None
+        result["injected_errors"] = server.errors
+        result["injected_truncations"] = server.truncated
+        result["translations"] = translations["calls"]
+        result["rss_mb"] = rss_mb()
+        result["rss_growth_mb"] = result["rss_mb"] - baseline
+    return result
+
+
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def lower_is_better(key):
+    return key.endswith(("_ms", "_bytes", "bytes_mean", "bytes_max", "_mb", "_per_minute", "translations",
+                         "model_requests", "full_runs_during_timer"))
+
+
+def compare(current, baseline, tolerance):
+    """Prints metrics that changed beyond `tolerance`; returns the regressed keys."""
+    now, before = flatten(current["scenarios"]), flatten(baseline["scenarios"])
+    regressions = []
+    differing = sorted(key for key in current["config"] if current["config"][key] != baseline["config"].get(key))
+    if differing:
+        print(f"note: the runs used different settings ({', '.join(differing)})")
+    print(f"\n{'metric':<48} {'baseline':>12} {'current':>12} {'change':>8}")
+    for key in sorted(now.keys() & before.keys()):
+        if not lower_is_better(key) or key.endswith("rss_mb"):
+            continue
+        old, new = before[key], now[key]
+        if old == new:
+            continue
+        change = (new - old) / old if old else float("inf")
+        if abs(change) < tolerance:
+            continue
+        flag = "  REGRESSION" if change > 0 else ""
+        if change > 0:
+            regressions.append(key)
+        print(f"{key:<48} {old:>12.1f} {new:>12.1f} {change:>+8.0%}{flag}")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark scenarios for app.py.")
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help=f"scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file to write")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file of a previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative change reported as a regression")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake Gemini time to first token")
+    parser.add_argument("--chunk-latency", type=float, default=0.01, help="delay between streamed chunks")
+    parser.add_argument("--no-stream", dest="stream", action="store_false", help="use generateContent")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of model calls answered with 503")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="share of streams cut off early")
+    parser.add_argument("--translate-latency", type=float, default=0.02, help="fake translator delay")
+    parser.add_argument("--turns", type=int, default=40, help="turns in long_chat")
+    parser.add_argument("--hindi-turns", type=int, default=10, help="turns in hindi_session")
+    parser.add_argument("--reruns", type=int, default=10, help="plain reruns after each scenario's script")
+    parser.add_argument("--timer-seconds", type=int, default=60, help="simulated breathing timer duration")
+    parser.add_argument("--moods", type=int, default=10000, help="saved mood ratings in mood_10k")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    config = {key: value for key, value in vars(args).items()
+              if key not in ("scenarios", "output", "compare", "tolerance", "child")}
+
+    if args.child:
+        print(json.dumps(run_scenario(args.child, config)))
+        return
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    scenarios = {}
+    for name in args.scenarios or SCENARIOS:
+        print(f"running {name}...", flush=True)
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", name, *sys.argv[1:]],
+                               capture_output=True, text=True)
+        if child.returncode:
+            sys.stderr.write(child.stderr)
+            sys.exit(f"scenario {name} failed")
+        scenarios[name] = json.loads(child.stdout.strip().splitlines()[-1])
+        result = scenarios[name]
+        print(f"  rerun p50 {result['rerun']['p50_ms']:.1f} ms, p95 {result['rerun']['p95_ms']:.1f} ms; "
+              f"RSS {result['rss_mb']:.0f} MB; {result['seconds']:.1f} s")
+
+    results = {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": config,
+        "scenarios": scenarios,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            sys.exit(f"{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
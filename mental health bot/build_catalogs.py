@@ -0,0 +1,123 @@
+# Extracts the static UI strings passed to tr() in app.py and updates locales/catalog.json.
+#
+# Usage:
+#   python build_catalogs.py              # add new msgids, drop stale ones, report gaps
+#   python build_catalogs.py --translate  # also machine-translate missing entries
+#   python build_catalogs.py --check      # exit non-zero if the catalog is out of date
+#
+# Existing translations are never overwritten, so hand-reviewed entries stay put.
+import argparse
+import ast
+import json
+import os
+import re
+import sys
+
+from i18n import CATALOG_PATH
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+LANGUAGES = ["hi", "bn"]
+PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
+
+def extract_msgids(source):
+    """Returns the strings passed as the first argument to tr(), in source order."""
+    tree = ast.parse(source)
+    # Module-level string constants, so tr(CRISIS_MESSAGE, ...) resolves too
+    constants = {
+        node.targets[0].id: node.value.value
+        for node in tree.body
+        if isinstance(node, ast.Assign)
+        and len(node.targets) == 1
+        and isinstance(node.targets[0], ast.Name)
+        and isinstance(node.value, ast.Constant)
+        and isinstance(node.value.value, str)
+    }
+
+    def literal(arg):
+        if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+            return arg.value
+        if isinstance(arg, ast.Name):
+            return constants.get(arg.id)
+        return None
+
+    calls = [
+        node for node in ast.walk(tree)
+        if isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id == "tr"
+        and node.args
+        and literal(node.args[0]) is not None
+    ]
+    msgids = []
+    for node in sorted(calls, key=lambda n: (n.lineno, n.col_offset)):
+        if literal(node.args[0]) not in msgids:
+            msgids.append(literal(node.args[0]))
+    return msgids
+
+
+def machine_translate(msgid, lang_code):
+    """Translates a template while protecting its {placeholders} from the translator."""
+    from deep_translator import GoogleTranslator
+
+    names = PLACEHOLDER_RE.findall(msgid)
+    protected = msgid
+    for i, name in enumerate(names):
+        protected = protected.replace("{" + name + "}", f"__{i}__", 1)
+    translated = GoogleTranslator(source="en", target=lang_code).translate(protected)
+    for i, name in enumerate(names):
+        translated = translated.replace(f"__{i}__", "{" + name + "}", 1)
+    return translated
+
+
+def build(catalog, msgids, translate=False):
+    """Returns an updated catalog plus a list of (lang, msgid) pairs still missing."""
+    updated = {}
+    missing = []
+    for lang in LANGUAGES:
+        existing = catalog.get(lang, {})
+        entries = {}
+        for msgid in msgids:
+            msgstr = existing.get(msgid)
+            if msgstr is None and translate:
+                msgstr = machine_translate(msgid, lang)
+            if msgstr is None:
+                missing.append((lang, msgid))
+                continue
+            if set(PLACEHOLDER_RE.findall(msgstr)) != set(PLACEHOLDER_RE.findall(msgid)):
+                raise ValueError(f"Placeholder mismatch in {lang} entry for {msgid!r}")
+            entries[msgid] = msgstr
+        updated[lang] = entries
+    return updated, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the FeelEase UI string catalog.")
+    parser.add_argument("--translate", action="store_true", help="machine-translate missing entries")
+    parser.add_argument("--check", action="store_true", help="fail if the catalog needs changes")
+    args = parser.parse_args()
+
+    with open(APP_PATH, encoding="utf-8") as f:
+        msgids = extract_msgids(f.read())
+
+    catalog = {}
+    if os.path.exists(CATALOG_PATH):
+        with open(CATALOG_PATH, encoding="utf-8") as f:
+            catalog = json.load(f)
+
+    updated, missing = build(catalog, msgids, translate=args.translate)
+    for lang, msgid in missing:
+        print(f"missing [{lang}]: {msgid!r}", file=sys.stderr)
+
+    if args.check:
+        sys.exit(1 if missing or updated != catalog else 0)
+
+    os.makedirs(os.path.dirname(CATALOG_PATH), exist_ok=True)
+    with open(CATALOG_PATH, "w", encoding="utf-8") as f:
+        json.dump(updated, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+    print(f"{len(msgids)} msgids, {len(missing)} missing translations -> {CATALOG_PATH}")
+
+
+if __name__ == "__main__":
+    main()
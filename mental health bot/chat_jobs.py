@@ -0,0 +1,101 @@
+# Background execution of chat turns.
+#
+# Model calls (and the translation of their replies) run on one bounded thread
+# pool per process, so a Streamlit script run never blocks on the network. The
+# pool size caps how many model calls are outstanding at once; submits beyond
+# `max_pending` are refused rather than queued without limit. A job submitted
+# again with the same key while it is still pending is coalesced into the
+# existing one ("single flight"): keyed by request_key() of the request body,
+# identical requests in flight share one model call and its reply.
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobQueueFull(Exception):
+    """Raised when too many chat turns are already waiting for the model."""
+
+
+def request_key(*parts):
+    """Coalescing key for a request: a digest of everything that shapes its result."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ChatJob:
+    """Handle for one background chat turn.
+
+    `partial` holds the reply text received so far, so the UI can show a
+    streaming reply while polling.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.partial = ""
+        self.future = None
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.finished_at = None
+
+    def done(self):
+        return self.future.done()
+
+    def result(self):
+        return self.future.result()
+
+    def exception(self):
+        """The exception the job raised, or None (call once done())."""
+        return self.future.exception()
+
+    def queued_seconds(self):
+        start = self.started_at if self.started_at is not None else time.perf_counter()
+        return start - self.submitted_at
+
+
+class ChatJobExecutor:
+    """Runs chat turns on a bounded pool and coalesces duplicate submits."""
+
+    def __init__(self, max_concurrent=8, max_pending=64):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="chat")
+        self._jobs = {}  # key -> pending ChatJob
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "coalesced": 0, "rejected": 0, "running": 0, "completed": 0}
+
+    def submit(self, key, fn, *args):
+        """Schedules fn(job, *args) and returns the job, or the pending job already using `key`."""
+        with self._lock:
+            existing = self._jobs.get(key)
+            if existing is not None and not existing.done():
+                self.stats["coalesced"] += 1
+                return existing
+            if len(self._jobs) >= self.max_pending:
+                self.stats["rejected"] += 1
+                raise JobQueueFull(f"{len(self._jobs)} chat turns are already waiting")
+            job = ChatJob(key)
+            self._jobs[key] = job
+            self.stats["submitted"] += 1
+            job.future = self._executor.submit(self._run, job, fn, args)
+            return job
+
+    def pending(self):
+        with self._lock:
+            return len(self._jobs)
+
+    def _run(self, job, fn, args):
+        job.started_at = time.perf_counter()
+        with self._lock:
+            self.stats["running"] += 1
+        try:
+            return fn(job, *args)
+        finally:
+            job.finished_at = time.perf_counter()
+            with self._lock:
+                self.stats["running"] -= 1
+                self.stats["completed"] += 1
+                if self._jobs.get(job.key) is job:
+                    del self._jobs[job.key]
@@ -0,0 +1,107 @@
+# Keeps the conversation sent to Gemini within a fixed token budget.
+#
+# The last few turns go out verbatim. Older turns are folded, once, into a
+# rolling summary that only ever grows by the newly folded turns and is trimmed
+# from the front when it exceeds its own budget. Turns flagged as pinned (crisis
+# related) are never folded away.
+import re
+
+SENTENCE_RE = re.compile(r"(?<=[.!?।])\s+")
+
+
+def estimate_tokens(text):
+    """Rough token count: ~4 chars per token for ASCII, ~1.5 for other scripts."""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return max(1, int(ascii_chars / 4 + (len(text) - ascii_chars) / 1.5))
+
+
+def summarize_turn(message, max_chars=160):
+    """Compresses one chat message to a single summary line."""
+    text = " ".join(message["content"].split())
+    first = SENTENCE_RE.split(text, maxsplit=1)[0]
+    if len(first) > max_chars:
+        first = first[:max_chars].rsplit(" ", 1)[0] + "..."
+    role = "User" if message["role"] == "user" else "Bot"
+    return f"- {role}: {first}"
+
+
+class ConversationContext:
+    """Builds a bounded Gemini `contents` list from the full chat log."""
+
+    def __init__(self, keep_last_turns=8, max_recent_tokens=2000,
+                 summary_token_budget=400, max_pinned_tokens=600, is_pinned=None):
+        self.keep_last_turns = keep_last_turns
+        self.max_recent_tokens = max_recent_tokens
+        self.summary_token_budget = summary_token_budget
+        self.max_pinned_tokens = max_pinned_tokens
+        self.is_pinned = is_pinned or (lambda message: False)
+        self.reset()
+
+    def reset(self):
+        """Forgets the summary and pinned turns."""
+        self.folded_upto = 0  # messages[:folded_upto] are already in the summary or pinned
+        self.summary_lines = []
+        self.summary_tokens = 0
+        self.dropped_lines = 0
+        self.pinned = []
+
+    def _fold(self, message):
+        if self.is_pinned(message):
+            self.pinned.append(message)
+            # Pinned turns are kept, but the oldest go first if even they overflow.
+            while (len(self.pinned) > 1
+                   and sum(estimate_tokens(m["content"]) for m in self.pinned) > self.max_pinned_tokens):
+                self.pinned.pop(0)
+            return
+        line = summarize_turn(message)
+        self.summary_lines.append(line)
+        self.summary_tokens += estimate_tokens(line)
+        while self.summary_tokens > self.summary_token_budget and len(self.summary_lines) > 1:
+            self.summary_tokens -= estimate_tokens(self.summary_lines.pop(0))
+            self.dropped_lines += 1
+
+    def drop_oldest(self, messages, count):
+        """Folds messages[:count] if needed; call before removing them from the log."""
+        for message in messages[self.folded_upto:count]:
+            self._fold(message)
+        self.folded_upto = max(self.folded_upto, count) - count
+
+    def summary_text(self):
+        """Returns the rolling summary as a single message text ("" if empty)."""
+        if not self.summary_lines:
+            return ""
+        header = "Summary of the earlier conversation"
+        if self.dropped_lines:
+            header += " (oldest parts omitted)"
+        return header + ":\n" + "\n".join(self.summary_lines)
+
+    def build(self, messages):
+        """Returns Gemini `contents` entries for the conversation so far.
+
+        Messages older than the verbatim window are folded incrementally, so
+        each call only does work proportional to the new turns.
+        """
+        if len(messages) < self.folded_upto:
+            # The chat log was cleared or replaced, start over.
+            self.reset()
+
+        window_start = max(0, len(messages) - self.keep_last_turns)
+        for message in messages[self.folded_upto:window_start]:
+            self._fold(message)
+        self.folded_upto = max(self.folded_upto, window_start)
+
+        # Trim the verbatim window to its budget, always keeping the newest message.
+        recent = list(messages[self.folded_upto:])
+        recent_tokens = sum(estimate_tokens(m["content"]) for m in recent)
+        while len(recent) > 1 and recent_tokens > self.max_recent_tokens:
+            dropped = recent.pop(0)
+            recent_tokens -= estimate_tokens(dropped["content"])
+
+        contents = []
+        summary = self.summary_text()
+        if summary:
+            contents.append({"role": "user", "parts": [{"text": summary}]})
+        for message in self.pinned + recent:
+            role = "user" if message["role"] == "user" else "model"
+            contents.append({"role": role, "parts": [{"text": message["content"]}]})
+        return contents
@@ -0,0 +1,90 @@
+# Conversation export as Markdown, JSON Lines or a zip archive.
+#
+# Exports are built only when the user asks for one. Records are consumed from
+# iterators (session lists or Storage.iter_* cursors) and written straight into
+# the output buffer, so a long history is never held as one growing string.
+import csv
+import io
+import json
+import zipfile
+from datetime import date, datetime
+
+# format -> (label, file extension, MIME type)
+FORMATS = {
+    "markdown": ("Markdown", "md", "text/markdown"),
+    "jsonl": ("JSON Lines", "jsonl", "application/x-ndjson"),
+    "archive": ("Archive (.zip)", "zip", "application/zip"),
+}
+
+FILE_STEM = "MindfulBot_Conversation"
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def markdown_lines(messages):
+    """Yields the transcript as Markdown, one message at a time."""
+    for message in messages:
+        role = "User" if message["role"] == "user" else "Bot"
+        yield f"**{role}:** {message['content']}\n\n"
+
+
+def jsonl_lines(records):
+    """Yields one JSON document per record."""
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False, default=_json_default) + "\n"
+
+
+def _write_lines(lines, binary_file):
+    text = io.TextIOWrapper(binary_file, encoding="utf-8", newline="")
+    text.writelines(lines)
+    text.flush()
+    # Hand the binary file back to the caller instead of closing it.
+    text.detach()
+
+
+def _write_moods_csv(moods, binary_file):
+    text = io.TextIOWrapper(binary_file, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(["timestamp", "rating", "emoji"])
+    for mood in moods:
+        writer.writerow([mood["timestamp"].isoformat(), mood["rating"], mood["emoji"]])
+    text.flush()
+    text.detach()
+
+
+def build_export(fmt, messages, journal=(), moods=(), goals=()):
+    """Returns the export file for `fmt` as bytes.
+
+    Arguments are iterables of record dicts and are consumed once. Journal
+    entries, moods and goals only go into the archive.
+    """
+    buffer = io.BytesIO()
+    if fmt == "markdown":
+        _write_lines(markdown_lines(messages), buffer)
+    elif fmt == "jsonl":
+        _write_lines(jsonl_lines(messages), buffer)
+    elif fmt == "archive":
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+            with archive.open("conversation.jsonl", "w") as member:
+                _write_lines(jsonl_lines(messages), member)
+            with archive.open("journal.jsonl", "w") as member:
+                _write_lines(jsonl_lines(journal), member)
+            with archive.open("moods.csv", "w") as member:
+                _write_moods_csv(moods, member)
+            with archive.open("goals.jsonl", "w") as member:
+                _write_lines(jsonl_lines(goals), member)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return buffer.getvalue()
+
+
+def file_name(fmt):
+    return f"{FILE_STEM}.{FORMATS[fmt][1]}"
+
+
+def mime_type(fmt):
+    return FORMATS[fmt][2]
@@ -0,0 +1,222 @@
+# Helpers for talking to the Gemini REST API.
+#
+# GEMINI_API_BASE can point at a local stand-in server (e.g. http://127.0.0.1:8765/v1beta)
+# so streaming and error handling can be exercised without Google's endpoints.
+import json
+import os
+import re
+import threading
+import time
+
+import requests
+
+API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta").rstrip("/")
+MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-preview-05-20")
+# Faster, cheaper model for short, low-risk turns (see model_router.py)
+FAST_MODEL = os.getenv("GEMINI_FAST_MODEL", "gemini-2.5-flash-lite")
+
+# A sentence ends at . ! ? (or their Devanagari/Bengali equivalent) followed by
+# whitespace, or at a line break.
+SENTENCE_END_RE = re.compile(r"(?<=[.!?।])\s+|\n+")
+
+
+def api_url(path, api_key):
+    """Builds the URL for a top-level resource such as cachedContents."""
+    return f"{API_BASE}/{path}?key={api_key}"
+
+
+def model_url(method, api_key, model=MODEL, **params):
+    """Builds the URL for a model method such as generateContent."""
+    query = "&".join(f"{k}={v}" for k, v in params.items())
+    url = f"{API_BASE}/models/{model}:{method}?key={api_key}"
+    return f"{url}&{query}" if query else url
+
+
+def extract_text(result):
+    """Pulls the reply text out of a (possibly partial) generateContent response."""
+    parts = result["candidates"][0]["content"]["parts"]
+    return "".join(part.get("text", "") for part in parts)
+
+
+def system_instruction(text):
+    """Wraps the system prompt in the systemInstruction field format."""
+    return {"parts": [{"text": text}]}
+
+
+class ContextCache:
+    """Registers the system prompt once through the cachedContents API.
+
+    Later requests reference the returned handle instead of re-sending the
+    prompt. If registration fails (for example the prompt is below the
+    model's minimum cacheable size) callers fall back to systemInstruction,
+    and registration is not retried until `retry_after_seconds` has passed.
+    """
+
+    def __init__(self, api_key, system_text, post=requests.post, ttl_seconds=3600,
+                 retry_after_seconds=300, clock=time.time, model=MODEL):
+        self.api_key = api_key
+        self.model = model
+        self.system_text = system_text
+        self.post = post
+        self.ttl_seconds = ttl_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.clock = clock
+        self._name = None
+        self._expires_at = 0.0
+        self._next_attempt = 0.0
+        self._refreshing = False  # a registration POST is in flight
+        self._lock = threading.Lock()
+
+    def name(self):
+        """Returns a live cachedContents name, or None if none is available.
+
+        One caller at a time registers the prompt, outside the lock; callers
+        arriving meanwhile get the old handle while it is still live, else
+        None, instead of waiting on the POST.
+        """
+        with self._lock:
+            now = self.clock()
+            # Refresh a minute early so a request never references an expired cache.
+            if self._name and now < self._expires_at - 60:
+                return self._name
+            if self._refreshing or now < self._next_attempt:
+                return self._name if self._name and now < self._expires_at else None
+            self._refreshing = True
+        name = None
+        try:
+            response = self.post(
+                api_url("cachedContents", self.api_key),
+                headers={'Content-Type': 'application/json'},
+                data=json.dumps({
+                    "model": f"models/{self.model}",
+                    "systemInstruction": system_instruction(self.system_text),
+                    "ttl": f"{self.ttl_seconds}s",
+                }),
+                timeout=10,
+            )
+            response.raise_for_status()
+            name = response.json()["name"]
+        except (requests.exceptions.RequestException, KeyError, ValueError):
+            pass
+        finally:
+            with self._lock:
+                self._refreshing = False
+                self._name = name
+                if name:
+                    self._expires_at = now + self.ttl_seconds
+                else:
+                    self._next_attempt = now + self.retry_after_seconds
+        return name
+
+
+class RequestBuilder:
+    """Builds generateContent bodies with the system prompt sent out of band.
+
+    The prompt goes in systemInstruction, or is replaced by a cachedContent
+    handle when a ContextCache is configured and the request is for the
+    cache's model (a handle belongs to one model). Bytes saved compared with
+    sending the prompt as the first "user" turn are tracked in `stats`.
+    """
+
+    def __init__(self, system_text, context_cache=None):
+        self.system_text = system_text
+        self.context_cache = context_cache
+        self.inline_prompt_bytes = len(json.dumps(
+            {"role": "user", "parts": [{"text": system_text}]}
+        ))
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "bytes_sent": 0, "bytes_saved": 0, "serialize_seconds": 0.0,
+                      "cached_requests": 0}
+
+    def build(self, contents, model=None):
+        """Returns (serialized body, info dict) for a list of contents sent to `model` (default MODEL)."""
+        started = time.perf_counter()
+        cacheable = self.context_cache is not None and self.context_cache.model == (model or MODEL)
+        cache_name = self.context_cache.name() if cacheable else None
+        if cache_name:
+            payload = {"cachedContent": cache_name, "contents": contents}
+        else:
+            payload = {"systemInstruction": system_instruction(self.system_text), "contents": contents}
+        body = json.dumps(payload)
+        # Without a cache the prompt is still sent, just not as a chat turn.
+        saved = self.inline_prompt_bytes - len(json.dumps(cache_name)) if cache_name else 0
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["bytes_sent"] += len(body)
+            self.stats["bytes_saved"] += saved
+            self.stats["serialize_seconds"] += elapsed
+            self.stats["cached_requests"] += 1 if cache_name else 0
+        return body, {"bytes": len(body), "bytes_saved": saved, "cached": bool(cache_name)}
+
+
+def iter_sse_events(lines):
+    """Yields decoded JSON payloads from an iterable of SSE lines."""
+    data = []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line:
+            # A blank line terminates the current event.
+            if data:
+                yield json.loads("\n".join(data))
+                data = []
+            continue
+        if line.startswith("data:"):
+            data.append(line[5:].lstrip())
+    if data:
+        yield json.loads("\n".join(data))
+
+
+def split_sentences(buffer):
+    """Splits buffered text into (completed sentences, unfinished remainder)."""
+    matches = list(SENTENCE_END_RE.finditer(buffer))
+    if not matches:
+        return "", buffer
+    cut = matches[-1].end()
+    return buffer[:cut], buffer[cut:]
+
+
+class GeminiStream:
+    """Iterates the text chunks of a streamGenerateContent (SSE) response.
+
+    Time to first byte (response headers), time to first token and total
+    time are recorded separately, since the first token is the latency users
+    actually feel.
+    """
+
+    def __init__(self, body, api_key, timeout=20, post=requests.post, model=MODEL):
+        self.body = body
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.post = post
+        self.text = ""
+        self.ttfb_seconds = None
+        self.ttft_seconds = None
+        self.total_seconds = None
+
+    def __iter__(self):
+        started = time.perf_counter()
+        response = self.post(
+            model_url("streamGenerateContent", self.api_key, self.model, alt="sse"),
+            headers={'Content-Type': 'application/json'},
+            data=self.body,
+            timeout=self.timeout,
+            stream=True,
+        )
+        # With stream=True, post() returns as soon as the response headers arrive
+        self.ttfb_seconds = time.perf_counter() - started
+        try:
+            response.raise_for_status()
+            for event in iter_sse_events(response.iter_lines()):
+                chunk = extract_text(event)
+                if not chunk:
+                    continue
+                if self.ttft_seconds is None:
+                    self.ttft_seconds = time.perf_counter() - started
+                self.text += chunk
+                yield chunk
+        finally:
+            response.close()
+            self.total_seconds = time.perf_counter() - started
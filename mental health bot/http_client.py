@@ -0,0 +1,263 @@
+# Process-wide HTTP client shared by the Gemini and translation calls.
+#
+# One requests.Session keeps TLS connections alive between calls. Transient
+# failures (connection errors, timeouts, 429 and 5xx) are retried with jittered
+# exponential backoff that honors Retry-After, and a per-upstream circuit
+# breaker fails fast while a service is down instead of making every user wait
+# for the full timeout.
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BREAKER_STATUSES = {500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+
+def parse_retry_after(value, now=None):
+    """Returns the delay in seconds requested by a Retry-After header, or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+class CircuitBreaker:
+    """Closed -> open after N consecutive failures -> half-open after a cooldown."""
+
+    def __init__(self, failure_threshold=5, cooldown_seconds=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.cooldown_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        """Returns True if a call may go through. Half-open lets a single trial call in."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    self.times_opened += 1
+                self.opened_at = self.clock()
+            self._trial_in_flight = False
+
+    def release(self):
+        """Ends a half-open trial that says nothing about the upstream (e.g. the call was rejected locally)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class HttpClient:
+    """Pooled session with retries, backoff and per-upstream circuit breakers."""
+
+    def __init__(self, pool_maxsize=20, connect_timeout=3.05, read_timeout=20.0,
+                 max_retries=3, backoff_base=0.5, backoff_cap=8.0, max_retry_after=30.0,
+                 breaker_threshold=5, breaker_cooldown=30.0, sleep=time.sleep):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_retry_after = max_retry_after
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.sleep = sleep
+
+        self.session = requests.Session()
+        # Retries are handled here rather than by urllib3 so Retry-After,
+        # jitter and the breaker all see every attempt.
+        self._adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            "requests": 0,
+            "attempts": 0,
+            "retries": 0,
+            "failures": 0,
+            "short_circuited": 0,
+        }
+
+    # === Internals ===
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def breaker(self, name):
+        """Returns the circuit breaker for an upstream (host name or label)."""
+        with self._lock:
+            if name not in self._breakers:
+                self._breakers[name] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return self._breakers[name]
+
+    def backoff(self, attempt, retry_after=None):
+        """Seconds to wait before retry number `attempt` (0-based)."""
+        if retry_after is not None:
+            return retry_after
+        # "Full jitter": a random delay up to the exponential ceiling.
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def _timeout(self, timeout):
+        if timeout is None:
+            return (self.connect_timeout, self.read_timeout)
+        if isinstance(timeout, (int, float)):
+            return (self.connect_timeout, timeout)
+        return timeout
+
+    # === Public API ===
+    def request(self, method, url, upstream=None, retries=None, **kwargs):
+        """Sends a request through the pool, retrying transient failures.
+
+        `upstream` names the circuit breaker (default: the host), so endpoints
+        on one host can fail independently. `retries` overrides max_retries,
+        e.g. when the caller has another endpoint to fall back to.
+        """
+        kwargs["timeout"] = self._timeout(kwargs.get("timeout"))
+        max_retries = self.max_retries if retries is None else retries
+        upstream = upstream or urlparse(url).netloc
+        breaker = self.breaker(upstream)
+        self._count("requests")
+
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                self._count("short_circuited")
+                raise CircuitOpenError(f"Circuit open for {upstream}; not calling upstream.")
+            self._count("attempts")
+            retry_after = None
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                breaker.record_failure()
+                if attempt >= max_retries:
+                    self._count("failures")
+                    raise
+            except BaseException:
+                # Not a transient failure (bad URL, interrupted...): free the half-open trial slot
+                breaker.release()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    breaker.record_success()
+                    return response
+                if response.status_code in BREAKER_STATUSES:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if (attempt >= max_retries
+                        or (retry_after is not None and retry_after > self.max_retry_after)):
+                    self._count("failures")
+                    return response
+                response.close()
+
+            self.sleep(self.backoff(attempt, retry_after))
+            attempt += 1
+            self._count("retries")
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def call(self, name, fn, *args, retry_on=(requests.exceptions.RequestException,), **kwargs):
+        """Runs fn(*args, **kwargs) under the same retry and breaker policy.
+
+        For clients such as deep_translator that make their own HTTP requests.
+        """
+        breaker = self.breaker(name)
+        self._count("requests")
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                self._count("short_circuited")
+                raise CircuitOpenError(f"Circuit open for {name}; not calling upstream.")
+            self._count("attempts")
+            try:
+                result = fn(*args, **kwargs)
+            except retry_on:
+                breaker.record_failure()
+                if attempt >= self.max_retries:
+                    self._count("failures")
+                    raise
+            except BaseException:
+                breaker.release()
+                raise
+            else:
+                breaker.record_success()
+                return result
+            self.sleep(self.backoff(attempt))
+            attempt += 1
+            self._count("retries")
+
+    def stats(self):
+        """Returns request/retry counters, pool usage and breaker states."""
+        with self._lock:
+            counters = dict(self._counters)
+            breakers = {
+                name: {"state": b.state, "failures": b.failures, "times_opened": b.times_opened}
+                for name, b in self._breakers.items()
+            }
+        pools = {}
+        for key in list(self._adapter.poolmanager.pools.keys()):
+            pool = self._adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            pools[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+                # The queue is pre-filled with None placeholders; only real entries are idle connections
+                "idle": sum(conn is not None for conn in list(pool.pool.queue)) if pool.pool is not None else 0,
+            }
+        counters["pools"] = pools
+        counters["breakers"] = breakers
+        return counters
@@ -0,0 +1,37 @@
+# Precompiled message catalogs for the static UI strings in app.py.
+#
+# The catalog is a compact JSON index of the form {"hi": {msgid: msgstr}, ...}
+# built by build_catalogs.py. English is the source language, so msgids are
+# the English strings themselves and need no catalog entry.
+import json
+import os
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales", "catalog.json")
+
+
+class Catalog:
+    """Looks up translated UI strings and fills in their placeholders."""
+
+    def __init__(self, messages=None):
+        self.messages = messages or {}
+
+    def lookup(self, msgid, lang_code):
+        """Returns the translated template for msgid, or None if it isn't catalogued."""
+        if lang_code == "en":
+            return msgid
+        return self.messages.get(lang_code, {}).get(msgid)
+
+    def gettext(self, msgid, lang_code, **kwargs):
+        """Returns the rendered string, or None if msgid isn't catalogued for lang_code."""
+        template = self.lookup(msgid, lang_code)
+        if template is None:
+            return None
+        return template.format(**kwargs) if kwargs else template
+
+
+def load_catalog(path=CATALOG_PATH):
+    """Loads a catalog from disk. A missing file yields an empty catalog."""
+    if not os.path.exists(path):
+        return Catalog()
+    with open(path, encoding="utf-8") as f:
+        return Catalog(json.load(f))
@@ -0,0 +1,218 @@
+# Relevance-ranked retrieval over what the user has shared.
+#
+# Memories (facts such as their name or job), journal entries and goals go
+# into one in-memory index per session, updated as each item is added. For
+# every prompt only the best-matching items are sent to the model, under a
+# token budget, instead of every memory on every turn. A few profile memories
+# (name, age, faith) are always included.
+#
+# Scoring is BM25 by default. An embedding function (texts -> unit vectors,
+# e.g. sentence_embedder() when sentence-transformers is installed) switches
+# it to cosine similarity. Items are embedded lazily, in one batch at the next
+# search, so loading a long history at login makes no model calls.
+import heapq
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+
+from conversation_context import estimate_tokens
+from text_utils import tokenize
+
+PINNED_MEMORIES = ("name", "age", "faith")
+
+
+# === Memory extraction ===
+# (key, pattern) pairs; the first group is the value. Keys ending in "/" get the
+# value appended, so several of them can be remembered at once.
+_UNTIL_CLAUSE_END = r"(.{2,40}?)(?=[.,;!?।]|\s+(?:and|but|because|so)\b|$)"
+MEMORY_PATTERNS = [
+    # Not "call me": "did not call me yesterday", "call me back"
+    ("name", re.compile(r"\b(?:my name is|i am called|i'm called)\s+([^\W\d_][\w'-]*)", re.I)),
+    ("name", re.compile(r"मेरा नाम\s+(\S+?)\s*(?:है|$)")),
+    ("location", re.compile(r"\bi(?: live in| am from|'m from)\s+" + _UNTIL_CLAUSE_END, re.I)),
+    ("occupation", re.compile(r"\bi work as (?:an? )?" + _UNTIL_CLAUSE_END, re.I)),
+    ("studies", re.compile(r"\bi(?:'m| am) (?:studying|a student of)\s+" + _UNTIL_CLAUSE_END, re.I)),
+    ("likes/", re.compile(r"\bi (?:really )?(?:love|enjoy)\s+" + _UNTIL_CLAUSE_END, re.I)),
+]
+NOT_NAMES = frozenset({"not", "a", "an", "the", "very", "so", "just", "really", "feeling", "actually", "also",
+                       "still", "now", "too", "here", "back", "yesterday", "today", "tomorrow"})
+# "I live in fear that...": a place doesn't start with one of these
+NOT_PLACES = frozenset({"fear", "dread", "terror", "panic", "hope", "hopes", "denial", "pain", "misery", "shame",
+                        "guilt", "peace", "silence", "hell", "constant", "anxiety", "worry", "my", "your",
+                        "his", "her", "their", "our", "this", "that", "it", "hiding", "regret", "limbo"})
+
+
+def extract_memories(text):
+    """Returns (key, value) facts stated in a message, e.g. ("name", "Asha")."""
+    found = []
+    for key, pattern in MEMORY_PATTERNS:
+        match = pattern.search(text)
+        if not match:
+            continue
+        value = match.group(1).strip()
+        if key == "name":
+            if value.lower() in NOT_NAMES:
+                continue
+            value = value[:1].upper() + value[1:]
+        if key == "location" and value.split()[0].lower() in NOT_PLACES:
+            continue
+        if key.endswith("/"):
+            key += value.lower()
+        found.append((key, value))
+    return found
+
+
+def memory_line(key, value, timestamp=None):
+    label = key.split("/", 1)[0]
+    when = f" (mentioned on {timestamp:%Y-%m-%d})" if timestamp else ""
+    return f"{label}: {value}{when}"
+
+
+def journal_line(entry, max_chars=300):
+    text = " ".join(entry["entry"].split())
+    if len(text) > max_chars:
+        text = text[:max_chars].rsplit(" ", 1)[0] + "..."
+    return f"journal entry ({entry['timestamp']:%Y-%m-%d}): {text}"
+
+
+def goal_line(goal):
+    status = "completed" if goal.get("completed") else "in progress"
+    return f"goal ({goal.get('category', 'Wellness')}, {status}): {goal['goal']}"
+
+
+class MemoryIndex:
+    """Incrementally updated index over memories, journal entries and goals.
+
+    Items are keyed (e.g. ("journal", 42)); adding an existing key replaces
+    the item. BM25 statistics are kept as postings (term -> {key: count}), so
+    a query only touches the items sharing a term with it.
+    """
+
+    def __init__(self, embed=None, k1=1.2, b=0.75, min_similarity=0.25):
+        self.embed = embed
+        self.k1 = k1
+        self.b = b
+        self.min_similarity = min_similarity
+        self.clear()
+
+    def clear(self):
+        self._items = {}  # key -> (line, token count, term counts, length)
+        self._postings = {}
+        self._total_length = 0
+        self._vectors = {}
+        self._unembedded = set()  # keys added since the last search, embedded together by it
+        self._matrix = None  # (keys, stacked vectors), rebuilt after changes
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def add(self, key, line):
+        """Indexes `line` under `key`, replacing what was there."""
+        if key in self._items:
+            self.remove(key)
+        terms = Counter(tokenize(line))
+        length = sum(terms.values())
+        self._items[key] = (line, estimate_tokens(line), terms, length)
+        self._total_length += length
+        for term, count in terms.items():
+            self._postings.setdefault(term, {})[key] = count
+        if self.embed is not None:
+            self._unembedded.add(key)
+
+    def remove(self, key):
+        line, tokens, terms, length = self._items.pop(key)
+        self._total_length -= length
+        for term in terms:
+            postings = self._postings[term]
+            del postings[key]
+            if not postings:
+                del self._postings[term]
+        self._unembedded.discard(key)
+        if self._vectors.pop(key, None) is not None:
+            self._matrix = None
+
+    def search(self, query, k=8):
+        """Returns up to k (score, key) pairs, best first; only items that match at all."""
+        if not self._items:
+            return []
+        if self.embed is not None:
+            return self._search_embedding(query, k)
+        count = len(self._items)
+        average_length = self._total_length / count or 1
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._items[key][3] / average_length)
+                scores[key] = scores.get(key, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return [(score, key) for key, score in heapq.nlargest(k, scores.items(), key=lambda item: item[1])]
+
+    def _search_embedding(self, query, k):
+        import numpy as np
+
+        if self._unembedded:
+            keys = list(self._unembedded)
+            for key, vector in zip(keys, self.embed([self._items[key][0] for key in keys])):
+                self._vectors[key] = vector
+            self._unembedded.clear()
+            self._matrix = None
+        if self._matrix is None:
+            keys = list(self._vectors)
+            self._matrix = (keys, np.vstack([self._vectors[key] for key in keys]))
+        keys, matrix = self._matrix
+        similarities = matrix @ self.embed([query])[0]
+        best = np.argsort(-similarities)[:k]
+        return [(float(similarities[i]), keys[i]) for i in best if similarities[i] >= self.min_similarity]
+
+    def context(self, query, token_budget=300, k=8, pinned=()):
+        """Prompt text with the pinned items, then the best matches, within token_budget."""
+        lines, used = [], 0
+        chosen = [key for key in pinned if key in self._items]
+        chosen += [key for _, key in self.search(query, k) if key not in chosen]
+        for key in chosen:
+            line, tokens = self._items[key][:2]
+            if used + tokens > token_budget:
+                continue
+            lines.append(f"- {line}")
+            used += tokens
+        if not lines:
+            return ""
+        return "Here's what I remember about the user:\n" + "\n".join(lines) + "\n"
+
+
+def sentence_embedder(model_name="all-MiniLM-L6-v2", cache_entries=50000):
+    """Returns an embed(texts) function backed by sentence-transformers (optional dependency).
+
+    Vectors are kept in a process-wide LRU keyed by text, so a user who logs in
+    again (or another session) doesn't re-embed the same journal entries.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name)
+    cache = OrderedDict()
+    lock = threading.Lock()
+
+    def embed(texts):
+        with lock:
+            vectors = [cache.get(text) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            encoded = model.encode([texts[i] for i in missing], normalize_embeddings=True)
+            for i, vector in zip(missing, encoded):
+                vectors[i] = vector
+        with lock:
+            for text, vector in zip(texts, vectors):
+                cache[text] = vector
+                cache.move_to_end(text)
+            while len(cache) > cache_entries:
+                cache.popitem(last=False)
+        return vectors
+
+    return embed
@@ -0,0 +1,179 @@
+# Picks the Gemini model for each chat turn.
+#
+# Short, low-risk turns ("hi", "thanks, that helped") go to a fast, cheaper
+# model; long messages and ones that sound distressed go to the stronger
+# model. (Crisis messages never reach a model: they are answered locally.)
+#
+# A turn that fails on its model with a timeout, connection error, 429 or 5xx
+# before the first token is retried once on the other model. With hedging on,
+# a second request to the other model is also started if the first hasn't
+# produced a token after that model's recent p95 time to first token, and
+# whichever answers first is used; the other request is closed. Errors after
+# the first token are not retried, since the user has already seen the reply
+# start.
+#
+# Time to first token is kept per model, both for the hedge delay and so the
+# routing can be judged in the performance panel.
+import queue
+import threading
+import time
+
+import requests
+
+from http_client import CircuitOpenError
+from sentiment import NEUTRAL
+from telemetry import Histogram
+
+FAST = "fast"
+STRONG = "strong"
+
+
+def should_fall_back(error):
+    """True for failures another model may not have: timeouts, connection errors, 429 and 5xx."""
+    if isinstance(error, requests.exceptions.HTTPError):
+        status = error.response.status_code if error.response is not None else None
+        return status is not None and (status == 429 or status >= 500)
+    # CircuitOpenError: the model's breaker is open after repeated failures
+    return isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError, CircuitOpenError))
+
+
+class ModelRouter:
+    """Routes turns between a fast and a strong model, with fallback and optional hedging.
+
+    Safe to share between threads. `stats` counts routing decisions,
+    fallbacks and hedges; latency() gives recent per-model percentiles.
+    """
+
+    def __init__(self, fast_model, strong_model, short_words=12, short_chars=80, hedge=False,
+                 hedge_default_seconds=2.0, hedge_min_seconds=0.25, hedge_max_seconds=8.0, min_samples=20):
+        self.fast_model = fast_model
+        self.strong_model = strong_model
+        self.short_words = short_words
+        self.short_chars = short_chars
+        self.hedge = hedge
+        self.hedge_default_seconds = hedge_default_seconds
+        self.hedge_min_seconds = hedge_min_seconds
+        self.hedge_max_seconds = hedge_max_seconds
+        self.min_samples = min_samples
+        self._latency = {}  # model -> Histogram of seconds to first token
+        self._lock = threading.Lock()
+        self.stats = {"fast": 0, "strong": 0, "fallbacks": 0, "hedged": 0, "hedge_wins": 0, "failed": 0}
+
+    def route(self, prompt, sentiment):
+        """Returns {"model", "alternate", "tier", "reason"} for a prompt and its sentiment label."""
+        if sentiment != NEUTRAL:
+            tier, reason = STRONG, "distress"
+        # Character count too, for scripts written without spaces between words
+        elif len(prompt.split()) > self.short_words or len(prompt) > self.short_chars:
+            tier, reason = STRONG, "long"
+        else:
+            tier, reason = FAST, "short"
+        model, other = ((self.fast_model, self.strong_model) if tier == FAST
+                        else (self.strong_model, self.fast_model))
+        with self._lock:
+            self.stats[tier] += 1
+        return {"model": model, "alternate": other if other != model else None, "tier": tier, "reason": reason}
+
+    def record(self, model, seconds):
+        """Records a model's time to first token."""
+        with self._lock:
+            histogram = self._latency.get(model)
+            if histogram is None:
+                histogram = self._latency[model] = Histogram(recent=256)
+            histogram.add(seconds * 1000)
+
+    def hedge_delay(self, model):
+        """Seconds to wait for a first token before hedging: the model's recent p95, clamped."""
+        with self._lock:
+            histogram = self._latency.get(model)
+            if histogram is None or histogram.count < self.min_samples:
+                return self.hedge_default_seconds
+            p95 = histogram.percentile(95) / 1000
+        return min(self.hedge_max_seconds, max(self.hedge_min_seconds, p95))
+
+    def latency(self):
+        """Recent time-to-first-token percentiles (ms) per model."""
+        with self._lock:
+            return {
+                model: {"count": h.count, "p50_ms": h.percentile(50), "p95_ms": h.percentile(95), "max_ms": h.max}
+                for model, h in sorted(self._latency.items())
+            }
+
+    def start(self, route, open_reply, hedge=None):
+        """Starts the reply on the routed model and waits for its first chunk.
+
+        open_reply(model) must return an iterator of reply chunks that sends
+        its request on the first next() (a generator, so close() cancels it).
+        Returns (model, chunks, info): `chunks` yields the whole reply,
+        starting with the chunk already received, and `info` says whether the
+        turn fell back or was hedged. Raises the last error if every model
+        failed.
+        """
+        hedge = self.hedge if hedge is None else hedge
+        alternate = route["alternate"]
+        info = {"model": None, "fallback": False, "hedged": False}
+        results = queue.Queue()
+        winner = []  # the first model to produce a chunk, set under the lock
+
+        def attempt(model):
+            started = time.perf_counter()
+            chunks = open_reply(model)
+            try:
+                first = next(chunks, "")
+            except Exception as e:  # reported to the waiting thread, which decides what to do
+                results.put((model, None, e))
+                return
+            self.record(model, time.perf_counter() - started)
+            with self._lock:
+                won = not winner
+                if won:
+                    winner.append(model)
+            if won:
+                results.put((model, (first, chunks), None))
+            else:
+                chunks.close()
+
+        def launch(model):
+            threading.Thread(target=attempt, args=(model,), name="model-attempt", daemon=True).start()
+
+        launch(route["model"])
+        running, alternate_started = 1, False
+        hedge_at = time.perf_counter() + self.hedge_delay(route["model"]) if hedge and alternate else None
+        while True:
+            timeout = None
+            if hedge_at is not None and not alternate_started:
+                timeout = max(0.0, hedge_at - time.perf_counter())
+            try:
+                model, reply, error = results.get(timeout=timeout)
+            except queue.Empty:
+                # Still waiting for a first token after the usual p95: race the other model
+                launch(alternate)
+                running, alternate_started = running + 1, True
+                info["hedged"] = True
+                with self._lock:
+                    self.stats["hedged"] += 1
+                continue
+            if reply is not None:
+                info["model"] = model
+                if info["hedged"] and model == alternate:
+                    with self._lock:
+                        self.stats["hedge_wins"] += 1
+                first, chunks = reply
+                return model, self._chain(first, chunks), info
+            running -= 1
+            if alternate and not alternate_started and should_fall_back(error):
+                launch(alternate)
+                running, alternate_started = running + 1, True
+                info["fallback"] = True
+                with self._lock:
+                    self.stats["fallbacks"] += 1
+            elif running == 0:
+                with self._lock:
+                    self.stats["failed"] += 1
+                raise error
+
+    @staticmethod
+    def _chain(first, chunks):
+        if first:
+            yield first
+        yield from chunks
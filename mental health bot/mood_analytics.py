@@ -0,0 +1,105 @@
+# Mood history kept as columns, with rollups and a compact Plotly figure.
+#
+# Ratings are appended to flat arrays instead of a list of dicts, so charting
+# never has to rebuild a DataFrame row by row. Long histories are rolled up
+# into daily or weekly mean/min/max bands, and the emoji markers go out as one
+# text trace rather than one annotation per point.
+#
+# pandas and plotly are imported inside the functions that need them, so the
+# app only pays for them when the mood chart is shown.
+from array import array
+from datetime import datetime, timedelta
+
+# Ratings 1-5 and the emoji the mood buttons use for them.
+MOOD_EMOJI = {1: "😢", 2: "😞", 3: "😐", 4: "😊", 5: "😁"}
+
+# Seconds are counted from a naive epoch so timestamps stay in local wall time.
+EPOCH = datetime(1970, 1, 1)
+
+# Above this many ratings the chart shows rollups instead of every point.
+MAX_POINTS = 400
+
+
+class MoodSeries:
+    """Append-only mood ratings stored column-wise."""
+
+    def __init__(self):
+        self.seconds = array("d")
+        self.ratings = array("b")
+        self.emojis = []
+
+    @classmethod
+    def from_records(cls, records):
+        """Builds a series from dicts with "timestamp", "rating" and "emoji"."""
+        series = cls()
+        for record in records:
+            series.append(record["timestamp"], record["rating"], record["emoji"])
+        return series
+
+    def append(self, timestamp, rating, emoji):
+        self.seconds.append((timestamp - EPOCH).total_seconds())
+        self.ratings.append(rating)
+        self.emojis.append(emoji)
+
+    def drop_oldest(self, count):
+        del self.seconds[:count]
+        del self.ratings[:count]
+        del self.emojis[:count]
+
+    def clear(self):
+        self.drop_oldest(len(self))
+
+    def __len__(self):
+        return len(self.ratings)
+
+    def __iter__(self):
+        """Yields the ratings as dicts, oldest first."""
+        for seconds, rating, emoji in zip(self.seconds, self.ratings, self.emojis):
+            timestamp = EPOCH + timedelta(seconds=seconds)
+            yield {"timestamp": timestamp, "rating": rating, "emoji": emoji, "date": timestamp.date()}
+
+    def frame(self):
+        """Returns a DataFrame indexed by timestamp with a "rating" column."""
+        import numpy as np
+        import pandas as pd
+
+        index = pd.to_datetime(np.frombuffer(self.seconds, dtype=np.float64), unit="s")
+        return pd.DataFrame({"rating": np.frombuffer(self.ratings, dtype=np.int8)}, index=index)
+
+
+def rollup(series, freq="D"):
+    """Mean, min, max and count of ratings per day ("D") or week ("W")."""
+    stats = series.frame()["rating"].resample(freq).agg(["mean", "min", "max", "count"])
+    return stats[stats["count"] > 0]
+
+
+def build_mood_figure(series, max_points=MAX_POINTS):
+    """Returns the mood-over-time figure, downsampled to at most about `max_points` x values."""
+    import numpy as np
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    if len(series) <= max_points:
+        frame = series.frame()
+        x, y = frame.index, frame["rating"].to_numpy()
+        emojis = series.emojis
+        fig.add_trace(go.Scatter(x=x, y=y, mode="lines+markers", name="Mood"))
+    else:
+        stats = rollup(series, "D")
+        if len(stats) > max_points:
+            stats = rollup(series, "W")
+        x, y = stats.index, stats["mean"].round(2).to_numpy()
+        emojis = [MOOD_EMOJI[r] for r in np.clip(np.rint(y), 1, 5).astype(int)]
+        # Min-max band: the upper edge first, then the lower edge filled up to it.
+        fig.add_trace(go.Scatter(x=x, y=stats["max"].to_numpy(), mode="lines",
+                                 line={"width": 0}, hoverinfo="skip", showlegend=False))
+        fig.add_trace(go.Scatter(x=x, y=stats["min"].to_numpy(), mode="lines", fill="tonexty",
+                                 line={"width": 0}, name="Range"))
+        fig.add_trace(go.Scatter(x=x, y=y, mode="lines", name="Average",
+                                 customdata=stats["count"].to_numpy(),
+                                 hovertemplate="%{y} (%{customdata} ratings)<extra></extra>"))
+    fig.add_trace(go.Scatter(x=x, y=y, mode="text", text=emojis, textposition="top center",
+                             hoverinfo="skip", showlegend=False))
+    fig.update_layout(title="Your Mood Over Time", xaxis_title="Date", yaxis_title="Mood Rating",
+                      yaxis_range=[0.5, 5.8], showlegend=False)
+    return fig
@@ -0,0 +1,135 @@
+# Admission control for chat turns, before anything is sent to the model.
+#
+# Token buckets cap how fast one session, and the process as a whole, can
+# start model calls: each bucket holds up to `burst` tokens and refills at
+# `per_minute` tokens a minute, and a turn needs one token from both. A
+# DuplicateFilter drops a prompt submitted again by the same session within a
+# short window (a chat_input callback and a rerun, or a double voice submit),
+# keyed by a hash of the session and the normalized prompt.
+#
+# Identical requests already in flight are coalesced by ChatJobExecutor
+# (chat_jobs.py) when they are submitted under the same key.
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """Allows bursts of up to `burst` operations, refilled at `per_minute` a minute."""
+
+    def __init__(self, per_minute, burst, clock=time.monotonic):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_seconds(self, now):
+        """Seconds until a token is available (0 if one is now)."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def take(self):
+        self.tokens -= 1
+
+    def full(self, now):
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+class RateLimiter:
+    """One token bucket per session plus one shared by the whole process.
+
+    Not thread-bound: sessions' script threads and workers can share it. Idle
+    session buckets (refilled to full, so indistinguishable from new ones)
+    are dropped once more than `max_sessions` are tracked.
+    """
+
+    def __init__(self, session_per_minute=10, session_burst=5, process_per_minute=300, process_burst=30,
+                 max_sessions=10000, clock=time.monotonic):
+        self.session_per_minute = session_per_minute
+        self.session_burst = session_burst
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self._process = TokenBucket(process_per_minute, process_burst, clock)
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.stats = {"allowed": 0, "limited_session": 0, "limited_process": 0}
+
+    def acquire(self, session_id):
+        """Takes a token for the session. Returns 0 if the turn may go ahead, else seconds to wait."""
+        with self._lock:
+            now = self.clock()
+            bucket = self._sessions.get(session_id)
+            if bucket is None:
+                if len(self._sessions) >= self.max_sessions:
+                    self._prune(now)
+                bucket = self._sessions[session_id] = TokenBucket(self.session_per_minute, self.session_burst,
+                                                                  self.clock)
+            wait = bucket.wait_seconds(now)
+            if wait:
+                self.stats["limited_session"] += 1
+                return wait
+            wait = self._process.wait_seconds(now)
+            if wait:
+                self.stats["limited_process"] += 1
+                return wait
+            bucket.take()
+            self._process.take()
+            self.stats["allowed"] += 1
+            return 0.0
+
+    def _prune(self, now):
+        for session_id in [key for key, bucket in self._sessions.items() if bucket.full(now)]:
+            del self._sessions[session_id]
+
+    def sessions(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+def idempotency_key(session_id, prompt):
+    """Same key for the same prompt from the same session, ignoring case and spacing."""
+    normalized = " ".join(prompt.split()).casefold()
+    return hashlib.sha256(f"{session_id}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+class DuplicateFilter:
+    """Remembers idempotency keys for `window_seconds` to drop repeated submits."""
+
+    def __init__(self, window_seconds=10.0, max_keys=10000, clock=time.monotonic):
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self.clock = clock
+        self._seen = OrderedDict()  # key -> time claimed, oldest first
+        self._lock = threading.Lock()
+        self.stats = {"claimed": 0, "duplicates": 0}
+
+    def claim(self, key):
+        """Returns True the first time a key is seen within the window, False for a duplicate."""
+        with self._lock:
+            now = self.clock()
+            while self._seen and (len(self._seen) >= self.max_keys
+                                  or now - next(iter(self._seen.values())) > self.window_seconds):
+                self._seen.popitem(last=False)
+            claimed_at = self._seen.get(key)
+            if claimed_at is not None and now - claimed_at <= self.window_seconds:
+                self.stats["duplicates"] += 1
+                return False
+            self._seen[key] = now
+            self._seen.move_to_end(key)
+            self.stats["claimed"] += 1
+            return True
+
+    def release(self, key):
+        """Forgets a claimed key, e.g. when the turn was refused and may be retried."""
+        with self._lock:
+            if self._seen.pop(key, None) is not None:
+                self.stats["claimed"] -= 1
@@ -0,0 +1,210 @@
+# Local crisis / negative-mood detection for English, Hindi and Bengali.
+#
+# All keywords (native script and common romanized spellings) are compiled once
+# into an Aho-Corasick automaton, so a message is classified in a single pass
+# over its normalized text no matter how many keywords there are. It needs no
+# network, so crisis routing never waits on translation or the model API.
+import re
+import unicodedata
+from collections import deque
+
+CRISIS = "crisis"
+NEGATIVE = "negative"
+NEUTRAL = "neutral"
+
+# Higher wins when a message matches more than one label.
+SEVERITY = {NEUTRAL: 0, NEGATIVE: 1, CRISIS: 2}
+
+# A trailing "*" matches any word ending ("suicid*" -> suicide, suicidal).
+# Otherwise a keyword only matches whole words.
+#
+# Negative keywords are grouped by the emotion they express, so the verse shown
+# for a message (verses.py) follows from the keyword that matched.
+NEGATIVE_KEYWORDS = {
+    "sadness": {
+        "en": ["sad", "sadness", "feeling low", "feel low", "so low", "miserable", "upset", "heartbroken", "cry*"],
+        "hi": ["उदास", "दुखी", "दुःखी", "रोना", "रो रहा", "रो रही"],
+        "hi-latn": ["udaas", "udas", "dukhi", "rona aa"],
+        "bn": ["দুঃখ*", "মন খারাপ", "কান্না", "কাঁদ*"],
+        "bn-latn": ["mon kharap", "mon kharaap", "dukkho", "kanna pacche"],
+    },
+    "loneliness": {
+        "en": ["lonel*", "alone"],
+        "hi": ["अकेला", "अकेली", "अकेलापन"],
+        "hi-latn": ["akela", "akeli", "akelapan"],
+        "bn": ["একা", "একাকী*"],
+    },
+    "anxiety": {
+        "en": ["stress*", "anxi*", "overwhelmed"],
+        "hi": ["तनाव", "परेशान", "चिंता", "घबराहट"],
+        "hi-latn": ["tanav", "tension", "pareshan", "chinta", "ghabrahat"],
+        "bn": ["উদ্বিগ্ন", "দুশ্চিন্তা"],
+        "bn-latn": ["dushchinta"],
+    },
+    "anger": {
+        "en": ["angry", "anger"],
+        "hi": ["गुस्सा"],
+        "hi-latn": ["gussa"],
+        "bn": ["রাগ"],
+    },
+    "hopelessness": {
+        "en": ["hopeless", "worthless", "depress*", "tired of everything"],
+        "hi": ["निराश*", "डिप्रेशन"],
+        "hi-latn": ["nirash*"],
+        "bn": ["হতাশ*", "বিষণ্ণ", "বিষন্ন"],
+        "bn-latn": ["hotash", "bishonno"],
+    },
+}
+
+
+def by_language(keywords_by_emotion):
+    """Merges {emotion: {language: keywords}} into {language: keywords}."""
+    merged = {}
+    for keywords in keywords_by_emotion.values():
+        for language, words in keywords.items():
+            merged.setdefault(language, []).extend(words)
+    return merged
+
+
+KEYWORDS = {
+    CRISIS: {
+        "en": [
+            "crisis", "emergency", "suicid*", "point anymore", "kill myself", "killing myself",
+            "end my life", "end it all", "want to die", "wanna die", "better off dead",
+            "no reason to live", "self harm", "hurt myself", "cut myself",
+            # Apostrophes are stripped before matching, so "dont" also covers "don't"
+            "dont want to live", "do not want to live", "dont want to be alive", "do not want to be alive",
+            "cant go on", "cannot go on", "can not go on", "wish i was dead", "wish i were dead",
+            "better off without me", "take my own life", "taking my own life", "take my life",
+            "not worth living", "isnt worth living", "no reason to keep living", "point in living", "no point living",
+            "cutting myself", "harm myself", "harming myself", "hurting myself",
+        ],
+        "hi": [
+            "आत्महत्या*", "खुदकुशी*", "मरना चाह*", "मर जाना चाह*", "जीना नहीं चाह*",
+            "जान दे दूं*", "खुद को खत्म", "जिंदगी खत्म", "मरना है", "मर जाना है", "मर जाऊं", "मर जाऊँ",
+            "नहीं जीना", "जीना नहीं है", "जीने का मन नहीं", "अपनी जान ले*", "खुद को मार*",
+        ],
+        "hi-latn": [
+            "aatmahatya*", "atmahatya*", "khudkushi*", "khudkhushi*", "marna chah*", "mar jana chah*",
+            "jeena nahi chah*", "jina nahi chah*", "khud ko khatam", "zindagi khatam", "jindagi khatam",
+            "marna hai", "mar jana hai", "mar jaana hai", "mar jaana chah*", "mar jaun", "jeena nahi hai",
+            "jina nahi hai", "jeene ka mann nahi", "jeene ka man nahi", "jine ka man nahi", "jaan de du*",
+            "apni jaan le*", "khud ko maar*",
+        ],
+        "bn": [
+            "আত্মহত্যা*", "মরে যেতে চাই", "মরতে চাই", "বাঁচতে চাই না", "বাঁচার ইচ্ছে নেই",
+            "নিজেকে শেষ করে*", "জীবন শেষ করে*", "মরে যেতে ইচ্ছে", "মরতে ইচ্ছে", "নিজেকে মেরে ফেল*",
+        ],
+        "bn-latn": [
+            "attohotta*", "atmohotya*", "atmohatya*", "more jete chai", "morte chai", "bachte chai na",
+            "banchte chai na", "nijeke shesh kore*", "more jete ichhe", "more jete ichche", "morte ichhe",
+            "nijeke mere fel*",
+        ],
+    },
+    NEGATIVE: by_language(NEGATIVE_KEYWORDS),
+}
+EMOTION_OF_KEYWORD = {
+    word: emotion for emotion, keywords in NEGATIVE_KEYWORDS.items() for words in keywords.values() for word in words
+}
+
+# Dropped before matching: nukta signs (ख़ -> ख) and zero-width joiners, which
+# vary between keyboards and input methods.
+IGNORED_CHARS = {"\u093c", "\u09bc", "\u200c", "\u200d"}
+
+ASCII_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+
+def _is_word_char(ch):
+    # Indic vowel signs and viramas are combining marks but belong to the word.
+    return ch.isalnum() or unicodedata.category(ch).startswith("M")
+
+
+def normalize(text):
+    """Casefolds text, strips Latin diacritics and nuktas, and collapses punctuation to spaces."""
+    if text.isascii():
+        # Most messages are plain English or romanized Hindi/Bengali.
+        return ASCII_NON_WORD_RE.sub(" ", text.lower().replace("'", "")).strip()
+    out = []
+    for ch in unicodedata.normalize("NFKC", text).casefold():
+        if ch in IGNORED_CHARS:
+            continue
+        if ch.isascii() or not ch.isalpha():
+            out.append(ch if _is_word_char(ch) or ch == "'" else " ")
+            continue
+        if unicodedata.name(ch, "").startswith("LATIN"):
+            # "udās" -> "udas": romanized text is typed with and without diacritics.
+            ch = "".join(c for c in unicodedata.normalize("NFKD", ch) if not unicodedata.combining(c))
+        out.append(ch)
+    return " ".join("".join(out).replace("'", "").split())
+
+
+class SentimentDetector:
+    """Classifies text as crisis, negative or neutral with one automaton scan."""
+
+    def __init__(self, keywords=KEYWORDS):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]  # per state: (length, label, keyword, whole_word)
+        for label, by_language in keywords.items():
+            for words in by_language.values():
+                for word in words:
+                    self._add(word, label)
+        self._build_failure_links()
+
+    def _add(self, word, label):
+        whole_word = not word.endswith("*")
+        key = normalize(word.rstrip("*"))
+        state = 0
+        for ch in key:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(key), label, word, whole_word))
+
+    def _build_failure_links(self):
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for ch, nxt in self._goto[state].items():
+                pending.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                # Inherit shorter keywords ending here, so outputs never need chasing at match time.
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _scan(self, text):
+        """Yields (label, keyword) for every keyword match on word boundaries."""
+        text = normalize(text)
+        state = 0
+        for end, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length, label, word, whole_word in self._out[state]:
+                start = end - length + 1
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if whole_word and end + 1 < len(text) and _is_word_char(text[end + 1]):
+                    continue
+                yield label, word
+
+    def matches(self, text):
+        """Returns every (label, keyword) found in text."""
+        return list(self._scan(text))
+
+    def classify(self, text):
+        """Returns CRISIS, NEGATIVE or NEUTRAL, stopping at the first crisis match."""
+        result = NEUTRAL
+        for label, _ in self._scan(text):
+            if label == CRISIS:
+                return CRISIS
+            if SEVERITY[label] > SEVERITY[result]:
+                result = label
+        return result
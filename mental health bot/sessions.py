@@ -0,0 +1,84 @@
+# Per-session memory limits for serving many users from one process.
+#
+# Everything a session accumulates (chat log, journal, moods) is already
+# written through to storage, so the in-memory copies can be capped: the
+# oldest items are dropped and stay available from the database ("spilled").
+# Sessions that sit idle have their in-memory history released entirely and
+# reloaded from storage when the user comes back.
+import threading
+import time
+
+
+def trim_oldest(items, cap, drop=None):
+    """Drops the oldest entries of a list-like once it exceeds `cap` by a quarter.
+
+    Trimming in batches keeps appends amortized O(1). `drop(count)` is called
+    instead of slicing when the container needs its own bookkeeping. Returns
+    the number of entries removed.
+    """
+    extra = len(items) - cap
+    if extra <= cap // 4:
+        return 0
+    if drop is not None:
+        drop(extra)
+    else:
+        del items[:extra]
+    return extra
+
+
+class SessionRegistry:
+    """Tracks when each session last ran and releases the memory of idle ones.
+
+    Sessions register a `release` callback on every full script run with
+    touch(). Sweeps run opportunistically from touch(), at most once every
+    `sweep_interval` seconds. The callback must quickly empty the session's
+    containers in place, since the registry has no access to another
+    session's st.session_state.
+    """
+
+    def __init__(self, idle_seconds=1800, sweep_interval=60, clock=time.monotonic):
+        self.idle_seconds = idle_seconds
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self._sessions = {}  # session_id -> (last_active, release)
+        self._released = {}  # session_id -> released_at, until the session returns
+        self._next_sweep = clock() + sweep_interval
+        self._lock = threading.Lock()
+        self.stats = {"active": 0, "released": 0, "restored": 0}
+
+    def touch(self, session_id, release):
+        """Marks a session active. Returns True if its history was released and must be reloaded."""
+        with self._lock:
+            now = self.clock()
+            self._sessions[session_id] = (now, release)
+            was_released = self._released.pop(session_id, None) is not None
+            if was_released:
+                self.stats["restored"] += 1
+            due = now >= self._next_sweep
+            if due:
+                self._next_sweep = now + self.sweep_interval
+        if due:
+            self.sweep()
+        return was_released
+
+    def sweep(self):
+        """Releases every session idle for longer than `idle_seconds`."""
+        with self._lock:
+            now = self.clock()
+            idle = [
+                (session_id, release)
+                for session_id, (last_active, release) in self._sessions.items()
+                if now - last_active > self.idle_seconds
+            ]
+            for session_id, release in idle:
+                del self._sessions[session_id]
+                self._released[session_id] = now
+                # Under the lock, so a session returning right now reloads only after the release.
+                release()
+            # Sessions that never come back (closed tabs) are forgotten after a day.
+            for session_id, released_at in list(self._released.items()):
+                if now - released_at > 86400:
+                    del self._released[session_id]
+            self.stats["active"] = len(self._sessions)
+            self.stats["released"] += len(idle)
+        return len(idle)
@@ -0,0 +1,504 @@
+# Durable storage for FeelEase users: chat messages, moods, journal, goals and memory.
+#
+# SQLite in WAL mode, so readers never block the writer and each append is a
+# short transaction instead of a rewrite of the whole session. Every table is
+# indexed by user and time so a returning user loads only a recent window.
+#
+# There are no accounts: a user's rows are keyed by a hash of their name and a
+# passphrase they choose (see user_key), never by the name alone, so knowing
+# someone's name is not enough to open their history.
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import string
+import threading
+from datetime import datetime, timedelta
+
+from text_utils import WORD_RE, stem
+
+DEFAULT_DB_PATH = os.getenv(
+    "FEELEASE_DB", os.path.join(os.path.expanduser("~"), ".feelease", "feelease.sqlite3")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    age INTEGER,
+    faith TEXT,
+    last_seen_date TEXT,
+    streak INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_user_ts ON messages (user_id, ts);
+CREATE TABLE IF NOT EXISTS moods (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    day TEXT NOT NULL,
+    rating INTEGER NOT NULL,
+    emoji TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_moods_user_day ON moods (user_id, day);
+CREATE TABLE IF NOT EXISTS journal (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    day TEXT NOT NULL,
+    prompt TEXT NOT NULL DEFAULT '',
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_journal_user_ts ON journal (user_id, ts);
+CREATE TABLE IF NOT EXISTS goals (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    goal TEXT NOT NULL,
+    category TEXT NOT NULL,
+    created REAL NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    completed_ts REAL
+);
+CREATE INDEX IF NOT EXISTS idx_goals_user ON goals (user_id, created);
+CREATE TABLE IF NOT EXISTS memory (
+    user_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    ts REAL NOT NULL,
+    PRIMARY KEY (user_id, key)
+);
+CREATE TABLE IF NOT EXISTS verse_rotation (
+    user_id TEXT NOT NULL,
+    verse_group TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (user_id, verse_group)
+);
+"""
+
+# Full-text index over journal entries, kept in step with the journal table by
+# triggers. It stores no text of its own (content='journal'). user_id is
+# indexed too, so a query only walks the searching user's postings. Words are
+# stemmed (porter), so "exams" finds "exam", and the tokenizer keeps combining
+# marks (M*) inside words, or Hindi and Bengali words would be split at every
+# vowel sign.
+JOURNAL_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS journal_fts USING fts5(
+    entry, user_id, content='journal', content_rowid='id',
+    tokenize="porter unicode61 remove_diacritics 2 categories 'L* N* Co M*'"
+);
+CREATE TRIGGER IF NOT EXISTS journal_fts_insert AFTER INSERT ON journal BEGIN
+    INSERT INTO journal_fts (rowid, entry, user_id) VALUES (new.id, new.entry, new.user_id);
+END;
+CREATE TRIGGER IF NOT EXISTS journal_fts_delete AFTER DELETE ON journal BEGIN
+    INSERT INTO journal_fts (journal_fts, rowid, entry, user_id) VALUES ('delete', old.id, old.entry, old.user_id);
+END;
+CREATE TRIGGER IF NOT EXISTS journal_fts_update AFTER UPDATE ON journal BEGIN
+    INSERT INTO journal_fts (journal_fts, rowid, entry, user_id) VALUES ('delete', old.id, old.entry, old.user_id);
+    INSERT INTO journal_fts (rowid, entry, user_id) VALUES (new.id, new.entry, new.user_id);
+END;
+"""
+# Search ranks at most this many of the newest matching entries, in Python.
+# FTS5's own bm25() and snippet() read every posting of every query term, which
+# takes over 100 ms for a word that appears in most of a long journal.
+SEARCH_CANDIDATES = 300
+# A date filter first looks up the id range of (at most) this many of the
+# newest entries in those dates, so the index walk can skip everything else.
+SEARCH_DATE_WINDOW = 20000
+MAX_ROWID = 2 ** 63 - 1
+# PBKDF2 rounds for user_key: ~50 ms once per login, slow enough to make
+# guessing passphrases for a known name expensive.
+USER_KEY_ITERATIONS = 100_000
+_WORD_BREAKS = str.maketrans({c: " " for c in string.punctuation + "\t\n\r‘’“”–—…।"})
+
+
+def user_key(name, passphrase):
+    """Derives a user id from a display name and a passphrase.
+
+    PBKDF2 with the normalized name as salt, so two people with the same name
+    get different ids and guessing an id means guessing the passphrase.
+    """
+    salt = ("feelease:" + " ".join(name.lower().split())).encode("utf-8")
+    return hashlib.pbkdf2_hmac("sha256", passphrase.encode("utf-8"), salt, USER_KEY_ITERATIONS).hex()
+
+
+def _ts(value):
+    return value.timestamp() if isinstance(value, datetime) else float(value)
+
+
+def _phrase(text):
+    """Quotes text as an FTS5 phrase, so operators and punctuation in it are just words."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _words(text):
+    """Lowercased text with punctuation as spaces and a space at each end, so " word " finds whole words."""
+    return f" {text.lower().translate(_WORD_BREAKS)} "
+
+
+def _rank_bm25(rows, terms, k1=1.2, b=0.75):
+    """Orders (id, ts, prompt, entry) rows by BM25 over just these rows, newest first on ties.
+
+    A term is counted wherever a word starts with its stem, and lengths are
+    in characters: matching words with regexes took longer than the query.
+    """
+    if not rows:
+        return []
+    needles = [f" {stem(term)}" for term in terms]
+    texts = [_words(row[3]) for row in rows]
+    lengths = [len(text) for text in texts]
+    average_length = sum(lengths) / len(rows)
+    scores = [0.0] * len(rows)
+    for needle in needles:
+        counts = [text.count(needle) for text in texts]
+        matching = sum(1 for count in counts if count)
+        idf = math.log(1 + (len(rows) - matching + 0.5) / (matching + 0.5))
+        for i, tf in enumerate(counts):
+            if tf:
+                scores[i] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[i] / average_length))
+    order = sorted(range(len(rows)), key=lambda i: (scores[i], rows[i][1], rows[i][0]), reverse=True)
+    return [rows[i] for i in order]
+
+
+def _snippet(text, terms, words=16):
+    """Up to `words` words of text from around the first match, with the matching words in **bold**."""
+    tokens = text.split()
+    stems = tuple(stem(term) for term in terms)
+
+    def matches(token):
+        return any(word.startswith(stems) for word in _words(token).split())
+
+    hits = {i for i, token in enumerate(tokens) if matches(token)}
+    start = max(0, min(min(hits, default=0) - words // 4, len(tokens) - words))
+    shown = [f"**{token}**" if i in hits else token for i, token in enumerate(tokens[start:start + words], start)]
+    return ("… " if start else "") + " ".join(shown) + (" …" if start + words < len(tokens) else "")
+
+
+class Storage:
+    """Thread-safe access to the FeelEase SQLite database.
+
+    Each thread gets its own connection; WAL lets them read concurrently
+    while one of them writes.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+            self.full_text = self._create_journal_fts(conn)
+
+    @staticmethod
+    def _create_journal_fts(conn):
+        """Creates the journal search index, filling it from existing entries. False without FTS5."""
+        existed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'journal_fts'").fetchone()
+        try:
+            conn.executescript(JOURNAL_FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: search falls back to scanning the user's entries
+            return False
+        if not existed:
+            conn.execute("INSERT INTO journal_fts (journal_fts) VALUES ('rebuild')")
+        return True
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # NORMAL is durable across app crashes in WAL mode and avoids an fsync per commit.
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _iter_rows(self, query, params, batch_size):
+        """Yields rows of a query in batches, so long histories are never loaded at once."""
+        cursor = self._conn().execute(query, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cursor.close()
+
+    # === Users and streaks ===
+    def upsert_user(self, user_id, name, age=None, faith=None):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO users (user_id, name, age, faith) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(user_id) DO UPDATE SET name = excluded.name,"
+                " age = excluded.age, faith = excluded.faith",
+                (user_id, name, age, faith),
+            )
+
+    def touch_streak(self, user_id, today):
+        """Records a visit on `today` and returns the updated daily streak."""
+        with self._conn() as conn:
+            row = conn.execute(
+                "SELECT last_seen_date, streak FROM users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if row is None:
+                return 0
+            last_seen, streak = row
+            if last_seen == today.isoformat():
+                return streak
+            if last_seen == (today - timedelta(days=1)).isoformat():
+                streak += 1
+            else:
+                streak = 1
+            conn.execute(
+                "UPDATE users SET last_seen_date = ?, streak = ? WHERE user_id = ?",
+                (today.isoformat(), streak, user_id),
+            )
+            return streak
+
+    # === Messages ===
+    def append_message(self, user_id, role, content, ts):
+        self.append_messages(user_id, [(role, content, ts)])
+
+    def append_messages(self, user_id, rows):
+        """Appends (role, content, ts) rows in a single transaction."""
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT INTO messages (user_id, ts, role, content) VALUES (?, ?, ?, ?)",
+                [(user_id, _ts(ts), role, content) for role, content, ts in rows],
+            )
+
+    def recent_messages(self, user_id, limit=200):
+        """Returns the last `limit` messages, oldest first."""
+        rows = self._conn().execute(
+            "SELECT role, content, ts FROM messages WHERE user_id = ?"
+            " ORDER BY ts DESC, id DESC LIMIT ?",
+            (user_id, limit),
+        ).fetchall()
+        return [
+            {"role": role, "content": content, "timestamp": datetime.fromtimestamp(ts)}
+            for role, content, ts in reversed(rows)
+        ]
+
+    def iter_messages(self, user_id, batch_size=1000):
+        """Yields every message, oldest first."""
+        rows = self._iter_rows(
+            "SELECT role, content, ts FROM messages WHERE user_id = ? ORDER BY ts, id",
+            (user_id,), batch_size,
+        )
+        for role, content, ts in rows:
+            yield {"role": role, "content": content, "timestamp": datetime.fromtimestamp(ts)}
+
+    # === Mood ===
+    def add_mood(self, user_id, rating, emoji, ts):
+        self.add_moods(user_id, [(rating, emoji, ts)])
+
+    def add_moods(self, user_id, rows):
+        """Appends (rating, emoji, ts) rows in a single transaction."""
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT INTO moods (user_id, ts, day, rating, emoji) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (user_id, _ts(ts), datetime.fromtimestamp(_ts(ts)).date().isoformat(), rating, emoji)
+                    for rating, emoji, ts in rows
+                ],
+            )
+
+    def moods_since(self, user_id, since_date):
+        """Returns mood ratings on or after `since_date`, oldest first."""
+        rows = self._conn().execute(
+            "SELECT ts, rating, emoji FROM moods WHERE user_id = ? AND day >= ? ORDER BY day, ts",
+            (user_id, since_date.isoformat()),
+        ).fetchall()
+        result = []
+        for ts, rating, emoji in rows:
+            timestamp = datetime.fromtimestamp(ts)
+            result.append({"timestamp": timestamp, "rating": rating, "emoji": emoji, "date": timestamp.date()})
+        return result
+
+    def iter_moods(self, user_id, batch_size=1000):
+        """Yields every mood rating, oldest first."""
+        rows = self._iter_rows(
+            "SELECT ts, rating, emoji FROM moods WHERE user_id = ? ORDER BY ts, id",
+            (user_id,), batch_size,
+        )
+        for ts, rating, emoji in rows:
+            yield {"timestamp": datetime.fromtimestamp(ts), "rating": rating, "emoji": emoji}
+
+    # === Journal ===
+    def add_journal_entry(self, user_id, entry, prompt, ts):
+        with self._conn() as conn:
+            cur = conn.execute(
+                "INSERT INTO journal (user_id, ts, day, prompt, entry) VALUES (?, ?, ?, ?, ?)",
+                (user_id, _ts(ts), datetime.fromtimestamp(_ts(ts)).date().isoformat(), prompt, entry),
+            )
+            return cur.lastrowid
+
+    def add_journal_entries(self, user_id, rows):
+        """Appends (entry, prompt, ts) rows in a single transaction."""
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT INTO journal (user_id, ts, day, prompt, entry) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (user_id, _ts(ts), datetime.fromtimestamp(_ts(ts)).date().isoformat(), prompt, entry)
+                    for entry, prompt, ts in rows
+                ],
+            )
+
+    def recent_journal(self, user_id, limit=50):
+        """Returns the last `limit` journal entries, oldest first."""
+        rows = self._conn().execute(
+            "SELECT id, ts, entry, prompt FROM journal WHERE user_id = ?"
+            " ORDER BY ts DESC, id DESC LIMIT ?",
+            (user_id, limit),
+        ).fetchall()
+        return [
+            {"id": id_, "timestamp": datetime.fromtimestamp(ts), "entry": entry, "prompt": prompt}
+            for id_, ts, entry, prompt in reversed(rows)
+        ]
+
+    def iter_journal(self, user_id, batch_size=1000):
+        """Yields every journal entry, oldest first."""
+        rows = self._iter_rows(
+            "SELECT id, ts, entry, prompt FROM journal WHERE user_id = ? ORDER BY ts, id",
+            (user_id,), batch_size,
+        )
+        for id_, ts, entry, prompt in rows:
+            yield {"id": id_, "timestamp": datetime.fromtimestamp(ts), "entry": entry, "prompt": prompt}
+
+    def search_journal(self, user_id, query, prompt=None, since=None, until=None, page=0, page_size=10):
+        """Journal entries matching every word of `query`, best first, one page at a time.
+
+        Words match in any form ("exams" finds "exam"). prompt filters on the journal
+        prompt ("" for entries written without one); since/until are
+        inclusive dates. Returns (results, has_more). Each result is an entry
+        dict with a "snippet" that has the matched words in **bold**.
+        """
+        terms = WORD_RE.findall(query.lower())[:8]
+        if not terms:
+            return [], False
+        filters, params = "", []
+        if prompt is not None:
+            filters += " AND j.prompt = ?"
+            params.append(prompt)
+        dated = since is not None or until is not None
+        if dated:
+            low = datetime.combine(since, datetime.min.time()).timestamp() if since else 0.0
+            high = datetime.combine(until + timedelta(days=1), datetime.min.time()).timestamp() if until else math.inf
+            filters += " AND j.ts >= ? AND j.ts < ?"
+            params += [low, high]
+        match = " ".join(_phrase(term) for term in terms)
+        if self.full_text:
+            user_clause = f"user_id : ^{_phrase(user_id)} AND " if WORD_RE.search(user_id) else ""
+
+            def candidates(lowest_id, highest_id):
+                return self._conn().execute(
+                    "SELECT j.id, j.ts, j.prompt, j.entry FROM journal_fts f JOIN journal j ON j.id = f.rowid"
+                    " WHERE journal_fts MATCH ? AND f.rowid BETWEEN ? AND ?"
+                    f" AND j.user_id = ?{filters} ORDER BY f.rowid DESC LIMIT ?",
+                    (f"{user_clause}({match})", lowest_id, highest_id, user_id, *params, SEARCH_CANDIDATES),
+                ).fetchall()
+
+            if dated:
+                lowest_id, highest_id, complete = self._journal_ids_between(user_id, low, high)
+                rows = candidates(lowest_id, highest_id)
+                if not complete and len(rows) < SEARCH_CANDIDATES:
+                    rows = candidates(0, MAX_ROWID)  # Few matches in the newest part of a long date range
+            else:
+                rows = candidates(0, MAX_ROWID)
+        else:
+            rows = self._conn().execute(
+                "SELECT j.id, j.ts, j.prompt, j.entry FROM journal j WHERE j.user_id = ?"
+                + " AND j.entry LIKE ?" * len(terms) + f"{filters} ORDER BY j.ts DESC LIMIT ?",
+                (user_id, *(f"%{stem(term)}%" for term in terms), *params, SEARCH_CANDIDATES),
+            ).fetchall()
+        ranked = _rank_bm25(rows, terms)
+        start = page * page_size
+        rows = ranked[start:start + page_size]
+        results = [
+            {"id": id_, "timestamp": datetime.fromtimestamp(ts), "prompt": entry_prompt, "entry": entry,
+             "snippet": _snippet(entry, terms)}
+            for id_, ts, entry_prompt, entry in rows
+        ]
+        return results, len(ranked) > start + page_size
+
+    def _journal_ids_between(self, user_id, low, high):
+        """Lowest and highest id of the user's newest entries with low <= ts < high, and whether that was all of them."""
+        lowest_id, highest_id, count = self._conn().execute(
+            "SELECT min(id), max(id), count(*) FROM (SELECT id FROM journal WHERE user_id = ? AND ts >= ? AND ts < ?"
+            " ORDER BY ts DESC LIMIT ?)",
+            (user_id, low, high, SEARCH_DATE_WINDOW),
+        ).fetchone()
+        return lowest_id or 0, highest_id or 0, count < SEARCH_DATE_WINDOW
+
+    # === Goals ===
+    def add_goal(self, user_id, goal, category, created):
+        with self._conn() as conn:
+            cur = conn.execute(
+                "INSERT INTO goals (user_id, goal, category, created) VALUES (?, ?, ?, ?)",
+                (user_id, goal, category, _ts(created)),
+            )
+            return cur.lastrowid
+
+    def set_goal_completed(self, goal_id, completed, completed_ts=None):
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE goals SET completed = ?, completed_ts = ? WHERE id = ?",
+                (int(completed), _ts(completed_ts) if completed_ts else None, goal_id),
+            )
+
+    def goals(self, user_id, limit=100):
+        """Returns the user's most recent goals, oldest first."""
+        rows = self._conn().execute(
+            "SELECT id, goal, category, created, completed, completed_ts FROM goals"
+            " WHERE user_id = ? ORDER BY created DESC LIMIT ?",
+            (user_id, limit),
+        ).fetchall()
+        return [
+            {
+                "id": id_,
+                "goal": goal,
+                "category": category,
+                "created": datetime.fromtimestamp(created),
+                "completed": bool(completed),
+                "completed_date": datetime.fromtimestamp(completed_ts) if completed_ts else None,
+            }
+            for id_, goal, category, created, completed, completed_ts in reversed(rows)
+        ]
+
+    # === Memory ===
+    def set_memory(self, user_id, key, value, ts):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO memory (user_id, key, value, ts) VALUES (?, ?, ?, ?)",
+                (user_id, key, json.dumps(value), _ts(ts)),
+            )
+
+    def memory(self, user_id):
+        rows = self._conn().execute(
+            "SELECT key, value, ts FROM memory WHERE user_id = ? ORDER BY ts", (user_id,)
+        ).fetchall()
+        return {
+            key: {"value": json.loads(value), "timestamp": datetime.fromtimestamp(ts)}
+            for key, value, ts in rows
+        }
+
+    # === Verse rotation ===
+    def set_verse_position(self, user_id, group, position):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO verse_rotation (user_id, verse_group, position) VALUES (?, ?, ?)",
+                (user_id, group, position),
+            )
+
+    def verse_positions(self, user_id):
+        """How far the user has got through each verse group."""
+        return dict(self._conn().execute(
+            "SELECT verse_group, position FROM verse_rotation WHERE user_id = ?", (user_id,)
+        ).fetchall())
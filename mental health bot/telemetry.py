@@ -0,0 +1,239 @@
+# Timing spans for the app's hot paths.
+#
+# Spans are aggregated per process: each name gets a fixed-bucket histogram
+# (constant memory however long the process runs) plus a window of recent
+# durations for percentiles. Finished spans can also be appended to a local
+# file, one JSON object per line, in one of two formats:
+#   "jsonl"  a flat record per span
+#   "otlp"   OTLP/JSON ExportTraceServiceRequest lines, as written by the
+#            OpenTelemetry Collector's file exporter, so the file can be
+#            loaded into any OTel backend (e.g. its otlpjsonfile receiver)
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+# Upper bucket bounds in milliseconds; the last bucket counts everything slower.
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+FORMATS = ("jsonl", "otlp")
+
+
+class Histogram:
+    """Durations (ms) in fixed buckets, plus the most recent ones for percentiles."""
+
+    def __init__(self, recent=1024):
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=recent)
+
+    def add(self, ms):
+        self.buckets[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        self.recent.append(ms)
+
+    def percentile(self, pct):
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Span:
+    """One timed operation. Attributes (and the name) can be set until end()."""
+
+    def __init__(self, telemetry, name, attrs, parent=None):
+        self.telemetry = telemetry
+        self.name = name
+        self.attrs = attrs
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.previous = parent  # the thread's current span again once this one ends
+        self.start_ns = time.time_ns()
+        self.seconds = None
+        self._started = time.perf_counter()
+
+    def end(self):
+        if self.seconds is None:
+            self.seconds = time.perf_counter() - self._started
+            if getattr(self.telemetry._local, "current", None) is self:
+                self.telemetry._local.current = self.previous
+            self.telemetry._finish(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Streamlit's st.rerun()/st.stop() are BaseExceptions, not failures
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self.attrs["error"] = exc_type.__name__
+        self.end()
+
+
+class Telemetry:
+    """Collects spans and counters for one process; safe to share between threads.
+
+    span() nests: a span opened while another is open on the same thread
+    becomes its child. start() opens a root span (such as a script run) that
+    stays the parent of that thread's spans until it ends.
+    """
+
+    def __init__(self, exporter=None, recent=1024):
+        self.exporter = exporter
+        self.recent = recent
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def span(self, name, **attrs):
+        """Times a `with` block."""
+        parent = getattr(self._local, "current", None)
+        span = Span(self, name, attrs, parent)
+        self._local.current = span
+        return span
+
+    def start(self, name, **attrs):
+        """Opens a root span; call end() on it when the operation is over."""
+        span = Span(self, name, attrs)
+        self._local.current = span
+        return span
+
+    def record(self, name, seconds, **attrs):
+        """Records an operation that was timed elsewhere and has just finished."""
+        span = Span(self, name, attrs, getattr(self._local, "current", None))
+        span.start_ns -= int(seconds * 1e9)
+        span.seconds = seconds
+        self._finish(span)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def _finish(self, span):
+        with self._lock:
+            histogram = self._histograms.get(span.name)
+            if histogram is None:
+                histogram = self._histograms[span.name] = Histogram(self.recent)
+            histogram.add(span.seconds * 1000)
+            if "error" in span.attrs:
+                self._counters[f"{span.name}.errors"] = self._counters.get(f"{span.name}.errors", 0) + 1
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+    def snapshot(self):
+        """Per-span count, mean and recent percentiles (ms), and the counters."""
+        with self._lock:
+            spans = [
+                {
+                    "span": name,
+                    "count": h.count,
+                    "mean_ms": h.total / h.count,
+                    "p50_ms": h.percentile(50),
+                    "p95_ms": h.percentile(95),
+                    "p99_ms": h.percentile(99),
+                    "max_ms": h.max,
+                }
+                for name, h in sorted(self._histograms.items())
+            ]
+            return {"spans": spans, "counters": dict(sorted(self._counters.items()))}
+
+    def histograms(self):
+        """Bucket counts per span name, keyed by upper bound in ms ("inf" for the last)."""
+        with self._lock:
+            return {
+                name: dict(zip([*map(str, BUCKETS_MS), "inf"], h.buckets))
+                for name, h in self._histograms.items()
+            }
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}  # int64 is a string in proto3 JSON
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class SpanFileExporter:
+    """Appends finished spans to a local file in batches, so most spans cost no I/O."""
+
+    def __init__(self, path, fmt="jsonl", service_name="feelease", batch_size=64, flush_seconds=5.0):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown span format {fmt!r}; expected one of {FORMATS}")
+        self.path = path
+        self.fmt = fmt
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def export(self, span):
+        with self._lock:
+            self._pending.append(span)
+            due = (len(self._pending) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_seconds)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            spans, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+            if not spans:
+                return
+            if self.fmt == "otlp":
+                lines = [json.dumps(self._otlp(spans))]
+            else:
+                lines = [json.dumps(self._record(span), default=str) for span in spans]
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            except OSError:
+                # Telemetry must never break the app; the aggregates are still kept in memory
+                pass
+
+    def _record(self, span):
+        return {
+            "name": span.name,
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "start": span.start_ns / 1e9,
+            "duration_ms": span.seconds * 1000,
+            "attributes": span.attrs,
+        }
+
+    def _otlp(self, spans):
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": "feelease.telemetry"},
+                "spans": [
+                    {
+                        "traceId": span.trace_id,
+                        "spanId": span.span_id,
+                        **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                        "name": span.name,
+                        "kind": 1,  # SPAN_KIND_INTERNAL
+                        "startTimeUnixNano": str(span.start_ns),
+                        "endTimeUnixNano": str(span.start_ns + int(span.seconds * 1e9)),
+                        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attrs.items()],
+                        **({"status": {"code": 2, "message": span.attrs["error"]}} if "error" in span.attrs else {}),
+                    }
+                    for span in spans
+                ],
+            }],
+        }]}
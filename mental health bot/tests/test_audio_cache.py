@@ -0,0 +1,23 @@
+import os
+
+from audio_cache import AudioCache
+
+
+def test_get_is_a_miss_when_the_file_is_gone(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    source = tmp_path / "render.wav"
+    source.write_bytes(b"RIFF")
+    path = cache.put("k", str(source))
+    assert cache.get("k") == path
+    os.remove(path)  # as an eviction on another thread would
+    assert cache.get("k") is None
+    assert cache.stats == {"hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_unwritable_directory_falls_back_to_a_temp_dir(tmp_path):
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    cache = AudioCache(str(blocker / "audio"))
+    assert os.path.isdir(cache.directory)
+    assert not cache.directory.startswith(str(blocker))
+
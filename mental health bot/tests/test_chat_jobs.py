@@ -0,0 +1,73 @@
+import threading
+
+import pytest
+
+from chat_jobs import ChatJobExecutor, JobQueueFull, request_key
+
+
+def test_identical_keys_in_flight_share_one_call():
+    executor = ChatJobExecutor(max_concurrent=2)
+    release = threading.Event()
+    calls = []
+
+    def fetch(job, body):
+        calls.append(body)
+        release.wait(5)
+        return body.upper()
+
+    first = executor.submit("k", fetch, "hi")
+    second = executor.submit("k", fetch, "hi")
+    release.set()
+    assert second is first
+    assert first.result() == second.result() == "HI"
+    assert calls == ["hi"]
+    assert executor.stats["coalesced"] == 1
+
+
+def test_error_reaches_every_coalesced_caller():
+    executor = ChatJobExecutor(max_concurrent=1)
+    release = threading.Event()
+
+    def fail(job):
+        release.wait(5)
+        raise ValueError("bad response")
+
+    jobs = [executor.submit("k", fail) for _ in range(3)]
+    release.set()
+    for job in jobs:
+        with pytest.raises(ValueError, match="bad response"):
+            job.result()
+        assert isinstance(job.exception(), ValueError)
+    assert executor.pending() == 0
+
+
+def test_key_is_free_again_after_a_failure():
+    executor = ChatJobExecutor(max_concurrent=1)
+
+    def fail(job):
+        raise RuntimeError("boom")
+
+    failed = executor.submit("k", fail)
+    with pytest.raises(RuntimeError):
+        failed.result()
+    retried = executor.submit("k", lambda job: "ok")
+    assert retried is not failed
+    assert retried.result() == "ok"
+    assert retried.exception() is None
+
+
+def test_submits_beyond_max_pending_are_refused():
+    executor = ChatJobExecutor(max_concurrent=1, max_pending=2)
+    release = threading.Event()
+    jobs = [executor.submit(f"k{i}", lambda job: release.wait(5)) for i in range(2)]
+    with pytest.raises(JobQueueFull):
+        executor.submit("k2", lambda job: None)
+    release.set()
+    for job in jobs:
+        job.result()
+    assert executor.stats["rejected"] == 1
+
+
+def test_request_key_separates_parts():
+    assert request_key("ab", "c") != request_key("a", "bc")
+    assert request_key("body", "Hindi") == request_key("body", "Hindi")
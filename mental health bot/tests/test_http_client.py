@@ -0,0 +1,125 @@
+import pytest
+import requests
+
+from http_client import CircuitBreaker, CircuitOpenError, HttpClient, parse_retry_after
+
+
+def open_breaker(clock, threshold=2, cooldown=10.0):
+    breaker = CircuitBreaker(failure_threshold=threshold, cooldown_seconds=cooldown, clock=clock)
+    for _ in range(threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+    return breaker
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=10, clock=clock)
+    breaker.record_failure()
+    breaker.record_success()  # resets the run of failures
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.times_opened == 1
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = open_breaker(clock)
+    clock.now = 10.0
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()  # a second caller while the trial is in flight
+
+
+def test_half_open_trial_success_closes(clock):
+    breaker = open_breaker(clock)
+    clock.now = 10.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_half_open_trial_failure_reopens_for_another_cooldown(clock):
+    breaker = open_breaker(clock)
+    clock.now = 10.0
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now = 19.0
+    assert not breaker.allow()
+    clock.now = 20.0
+    assert breaker.allow()
+
+
+def test_released_trial_frees_the_slot(clock):
+    breaker = open_breaker(clock)
+    clock.now = 10.0
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+
+
+def half_open_client(clock, name):
+    """A client whose breaker for `name` is half-open at the clock's current time."""
+    client = HttpClient(max_retries=0, breaker_threshold=1, breaker_cooldown=10, sleep=lambda seconds: None)
+    client._breakers[name] = open_breaker(clock, threshold=1)
+    clock.now = 10.0
+    return client
+
+
+def test_call_trial_with_unexpected_error_does_not_wedge_breaker(clock):
+    client = half_open_client(clock, "translate")
+
+    def reject(text):
+        raise ValueError("text too long")
+
+    with pytest.raises(ValueError):
+        client.call("translate", reject, "x" * 6000)
+    assert client.call("translate", str.upper, "ok") == "OK"
+    assert client.breaker("translate").state == "closed"
+
+
+def test_request_trial_with_unexpected_error_does_not_wedge_breaker(clock, monkeypatch):
+    client = half_open_client(clock, "example.test")
+
+    def invalid(*args, **kwargs):
+        raise requests.exceptions.InvalidURL("bad url")
+
+    monkeypatch.setattr(client.session, "request", invalid)
+    with pytest.raises(requests.exceptions.InvalidURL):
+        client.get("http://example.test/")
+    assert client.breaker("example.test")._trial_in_flight is False
+
+
+def test_open_circuit_short_circuits_without_calling(clock):
+    client = half_open_client(clock, "translate")
+    clock.now = 5.0  # back inside the cooldown
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        client.call("translate", calls.append, "x")
+    assert calls == []
+    assert client.stats()["short_circuited"] == 1
+
+
+def test_call_retries_transient_errors_then_succeeds():
+    client = HttpClient(max_retries=2, sleep=lambda seconds: None)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise requests.exceptions.ConnectionError("reset")
+        return "done"
+
+    assert client.call("upstream", flaky) == "done"
+    assert client.stats()["retries"] == 2
+
+
+@pytest.mark.parametrize("value, expected", [("5", 5.0), ("", None), ("soon", None),
+                                             ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0)])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
@@ -0,0 +1,27 @@
+import pytest
+
+from memory_index import extract_memories
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("My name is asha", [("name", "Asha")]),
+    ("I'm called Ravi at work", [("name", "Ravi")]),
+    ("मेरा नाम प्रिया है", [("name", "प्रिया")]),
+    ("I live in Pune, near my parents", [("location", "Pune")]),
+    ("I'm from a small town in Bengal", [("location", "a small town in Bengal")]),
+])
+def test_extracts_stated_facts(text, expected):
+    assert extract_memories(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "My mom did not call me yesterday",
+    "Can you call me back later?",
+    "Please call me Sam",  # only "my name is" states a name
+    "My name is not important",
+    "I live in fear that I will fail",
+    "I live in constant dread of exams",
+    "I live in my head most days",
+])
+def test_ignores_false_positives(text):
+    assert [key for key, _ in extract_memories(text) if key in ("name", "location")] == []
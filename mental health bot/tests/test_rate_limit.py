@@ -0,0 +1,81 @@
+import pytest
+
+from rate_limit import DuplicateFilter, RateLimiter, TokenBucket, idempotency_key
+
+
+def test_bucket_allows_a_burst_then_waits_for_refill(clock):
+    bucket = TokenBucket(per_minute=60, burst=3, clock=clock)
+    for _ in range(3):
+        assert bucket.wait_seconds(clock()) == 0
+        bucket.take()
+    assert bucket.wait_seconds(clock()) == pytest.approx(1.0)
+    clock.now = 0.5
+    assert bucket.wait_seconds(clock()) == pytest.approx(0.5)
+    clock.now = 1.0
+    assert bucket.wait_seconds(clock()) == 0
+
+
+def test_bucket_refill_is_capped_at_burst(clock):
+    bucket = TokenBucket(per_minute=60, burst=2, clock=clock)
+    bucket.take()
+    clock.now = 3600.0
+    assert bucket.full(clock())
+    assert bucket.tokens == 2
+
+
+def test_zero_rate_bucket_never_refills(clock):
+    bucket = TokenBucket(per_minute=0, burst=1, clock=clock)
+    bucket.take()
+    clock.now = 1e6
+    assert bucket.wait_seconds(clock()) == float("inf")
+
+
+def test_session_limit_is_per_session(clock):
+    limiter = RateLimiter(session_per_minute=6, session_burst=2, process_per_minute=600, process_burst=100,
+                          clock=clock)
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") == pytest.approx(10.0)
+    assert limiter.acquire("b") == 0
+    assert limiter.stats == {"allowed": 3, "limited_session": 1, "limited_process": 0}
+
+
+def test_process_limit_does_not_spend_session_tokens(clock):
+    limiter = RateLimiter(session_per_minute=60, session_burst=5, process_per_minute=60, process_burst=1,
+                          clock=clock)
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("b") == pytest.approx(1.0)
+    clock.now = 1.0
+    # b's refused turn didn't cost it a token
+    assert limiter.acquire("b") == 0
+    assert limiter.stats["limited_process"] == 1
+
+
+def test_idle_sessions_are_pruned_once_over_the_cap(clock):
+    limiter = RateLimiter(session_per_minute=60, session_burst=1, max_sessions=2, clock=clock)
+    limiter.acquire("a")
+    limiter.acquire("b")
+    clock.now = 60.0  # both refilled to full
+    limiter.acquire("c")
+    assert limiter.sessions() == 1
+
+
+def test_duplicate_within_window_is_dropped(clock):
+    duplicates = DuplicateFilter(window_seconds=3, clock=clock)
+    key = idempotency_key("session", "I feel anxious")
+    assert duplicates.claim(key)
+    assert not duplicates.claim(idempotency_key("session", "  i FEEL   anxious "))
+    clock.now = 3.5
+    assert duplicates.claim(key)
+    assert duplicates.stats == {"claimed": 2, "duplicates": 1}
+
+
+def test_released_key_can_be_claimed_again(clock):
+    duplicates = DuplicateFilter(clock=clock)
+    assert duplicates.claim("k")
+    duplicates.release("k")
+    assert duplicates.claim("k")
+
+
+def test_idempotency_key_separates_sessions():
+    assert idempotency_key("a", "hello") != idempotency_key("b", "hello")
@@ -0,0 +1,52 @@
+import pytest
+
+from sentiment import CRISIS, EMOTION_OF_KEYWORD, KEYWORDS, NEGATIVE, NEUTRAL, SentimentDetector, normalize
+from verses import detect_emotion
+
+
+@pytest.fixture(scope="module")
+def detector():
+    return SentimentDetector()
+
+
+@pytest.mark.parametrize("text, label", [
+    ("I want to die", CRISIS),
+    ("I've been having suicidal thoughts", CRISIS),  # prefix keyword "suicid*"
+    ("मैं आत्महत्या के बारे में सोच रहा हूँ", CRISIS),
+    ("ami morte chai", CRISIS),
+    ("मुझे मरना है", CRISIS),
+    ("mujhe marna hai", CRISIS),
+    ("I dont want to live anymore", CRISIS),  # typed without the apostrophe
+    ("I don't want to live anymore", CRISIS),
+    ("I cant go on", CRISIS),
+    ("I feel so lonely", NEGATIVE),
+    ("I'm sad and I want to die", CRISIS),  # the most severe label wins
+    ("मैं बहुत उदास हूँ", NEGATIVE),
+    ("mon kharap lagche", NEGATIVE),
+    ("Let's grab a sandwich", NEUTRAL),  # "sad" inside a word doesn't match
+    ("", NEUTRAL),
+])
+def test_classify(detector, text, label):
+    assert detector.classify(text) == label
+
+
+def test_whole_word_keywords_need_word_boundaries(detector):
+    assert detector.matches("saddle") == []
+    assert detector.matches("so sad.") == [(NEGATIVE, "sad")]
+
+
+def test_normalize_strips_diacritics_nuktas_and_punctuation():
+    assert normalize("Udās!!  Really?") == "udas really"
+    assert normalize("ख़ुदकुशी") == normalize("खुदकुशी")
+
+
+def test_every_negative_keyword_has_an_emotion():
+    for words in KEYWORDS[NEGATIVE].values():
+        for word in words:
+            assert word in EMOTION_OF_KEYWORD
+
+
+def test_emotion_follows_the_first_negative_match(detector):
+    assert detect_emotion(detector.matches("I'm so stressed and lonely")) == "anxiety"
+    assert detect_emotion(detector.matches("मैं बहुत अकेला महसूस कर रहा हूँ")) == "loneliness"
+    assert detect_emotion(detector.matches("hello there")) is None
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from translation_cache import PerThreadTranslators, TranslationCache
+
+
+class StatefulTranslator:
+    """Keeps the text on the instance while "sending" it, like deep_translator's GoogleTranslator."""
+
+    def __init__(self, source, target):
+        self.target = target
+        self._text = None
+
+    def translate(self, text):
+        self._text = text
+        time.sleep(0.001)
+        return f"[{self.target}] {self._text}"
+
+
+def translate_concurrently(get_translator, threads=8, calls=50):
+    """Each thread translates its own texts; returns the (text, translation) pairs that don't match."""
+    wrong = []
+    barrier = threading.Barrier(threads)
+
+    def run(t):
+        barrier.wait()
+        for i in range(calls):
+            text = f"thread {t} text {i}"
+            translated = get_translator().translate(text)
+            if translated != f"[hi] {text}":
+                wrong.append((text, translated))
+
+    workers = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return wrong
+
+
+def test_shared_instance_mixes_up_callers():
+    # The failure PerThreadTranslators exists for
+    shared = StatefulTranslator("en", "hi")
+    assert translate_concurrently(lambda: shared)
+
+
+def test_per_thread_translators_keep_callers_apart():
+    translators = PerThreadTranslators(StatefulTranslator)
+    assert translate_concurrently(lambda: translators.get("en", "hi")) == []
+
+
+def test_per_thread_translators_reuse_instances_within_a_thread():
+    translators = PerThreadTranslators(StatefulTranslator)
+    assert translators.get("en", "hi") is translators.get("en", "hi")
+    assert translators.get("en", "hi") is not translators.get("en", "bn")
+    other = []
+    thread = threading.Thread(target=lambda: other.append(translators.get("en", "hi")))
+    thread.start()
+    thread.join()
+    assert other[0] is not translators.get("en", "hi")
+
+
+def test_concurrent_misses_cache_each_callers_own_translation():
+    cache = TranslationCache(db_path="")
+    translators = PerThreadTranslators(StatefulTranslator)
+    texts = [f"reply {i}" for i in range(200)]
+    barrier = threading.Barrier(8)
+
+    def run(t):
+        barrier.wait()
+        for text in texts[t::8]:
+            cache.get_or_translate(text, "en", "hi", translators.get("en", "hi").translate)
+
+    workers = [threading.Thread(target=run, args=(t,)) for t in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert all(cache.get(text, "en", "hi") == f"[hi] {text}" for text in texts)
@@ -0,0 +1,98 @@
+import ctypes
+import threading
+
+from tts import TTSWorker
+
+
+class FakeEngine:
+    """Records the pyttsx3 calls the worker makes; save_to_file writes the text out."""
+
+    def __init__(self, fail_with=None):
+        self.fail_with = fail_with
+        self.calls = []
+        self.pending = []
+        self.saved = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def getProperty(self, name):
+        return []
+
+    def setProperty(self, name, value):
+        self.calls.append((name, value))
+
+    def connect(self, topic, callback):
+        pass
+
+    def say(self, text):
+        self.pending.append(("say", text))
+
+    def save_to_file(self, text, path):
+        self.pending.append(("save", text, path))
+
+    def runAndWait(self):
+        self.calls.append("runAndWait")
+        pending, self.pending = self.pending, []
+        for item in pending:
+            if self.fail_with is not None:
+                raise self.fail_with
+            if item[0] == "save":
+                self.gate.wait(5)
+                self.saved.append(item[1])
+                with open(item[2], "w") as f:
+                    f.write(item[1])
+
+
+def make_worker(engine, pitches=None):
+    setter = None if pitches is None else pitches.append
+    return TTSWorker(engine_factory=lambda: engine, pitch_setter_factory=lambda: setter)
+
+
+def test_pitch_is_set_after_the_voice_change_is_flushed(tmp_path):
+    engine, pitches = FakeEngine(), []
+    worker = make_worker(engine, pitches)
+    assert worker.supports_pitch
+    assert worker.render_to_file("hello", str(tmp_path / "a.wav"), pitch=160)
+    assert pitches == [80]
+    assert ("pitch", 80) not in engine.calls  # pyttsx3 would swallow a KeyError for it
+    assert engine.calls.index("runAndWait") > engine.calls.index(("rate", 130))
+
+
+def test_no_pitch_support_without_espeak(tmp_path):
+    worker = make_worker(FakeEngine())
+    assert not worker.supports_pitch
+    assert worker.render_to_file("hello", str(tmp_path / "a.wav"))
+
+
+def test_driver_error_fails_only_that_job(tmp_path):
+    engine = FakeEngine(fail_with=ctypes.ArgumentError("bad argument"))
+    worker = make_worker(engine)
+    assert worker.render_to_file("hello", str(tmp_path / "a.wav"), timeout=5) is False
+    assert worker.stats["failed"] == 1
+
+    engine.fail_with = None
+    assert worker.render_to_file("hello again", str(tmp_path / "b.wav"), timeout=5)
+    assert (tmp_path / "b.wav").read_text() == "hello again"
+
+
+def test_interactive_render_goes_before_queued_background_renders(tmp_path):
+    engine = FakeEngine()
+    worker = make_worker(engine)
+    engine.gate.clear()  # hold the worker on the first background render
+    background = [
+        threading.Thread(target=worker.render_to_file, args=(f"bg{i}", str(tmp_path / f"bg{i}.wav")),
+                         kwargs={"background": True})
+        for i in range(4)
+    ]
+    for thread in background:
+        thread.start()
+    while worker._queue.qsize() > 3:
+        threading.Event().wait(0.005)
+    interactive = threading.Thread(target=worker.render_to_file, args=("reply", str(tmp_path / "reply.wav")))
+    interactive.start()
+    while worker._queue.qsize() < 4:
+        threading.Event().wait(0.005)
+    engine.gate.set()
+    for thread in background + [interactive]:
+        thread.join(5)
+    assert engine.saved.index("reply") == 1  # only the render already in progress went first
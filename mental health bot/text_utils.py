@@ -0,0 +1,30 @@
+# Word splitting shared by memory retrieval (memory_index.py) and journal
+# search (storage.py), so a query matches the same words in both.
+import re
+
+# Latin words plus Devanagari and Bengali runs, whose vowel signs \w alone would
+# split on (the danda sentence marks excluded).
+WORD_RE = re.compile(r"[\w\u0900-\u0963\u0966-\u097F\u0980-\u09FF]+")
+STOPWORDS = frozenset("""
+a about after again all also am an and any are as at be been but by can could did do does
+doing don dont for from had has have having he her him his how i if im in into is it its
+just me more most my myself no not now of off on once only or other our out over really
+she should so some such than that the their them then there these they this to too very
+was we were what when where which while who why will with would you your
+""".split())
+
+
+def stem(word):
+    """Strips a few English suffixes so "exams"/"exam" and "stressed"/"stress" match."""
+    if not word.isascii():
+        return word
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and not word.endswith("ss") and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    """Stemmed words of a text, without stopwords."""
+    # Single letters are mostly contraction leftovers ("I'm" -> "i", "m")
+    return [stem(word) for word in WORD_RE.findall(text.lower()) if len(word) > 1 and word not in STOPWORDS]
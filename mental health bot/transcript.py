@@ -0,0 +1,30 @@
+# Chat transcript rendering in a bounded window.
+#
+# Only the newest `window` messages are turned into Streamlit elements on each
+# rerun, so a rerun costs the same at 50 messages as at 5,000. Older turns are
+# paged in on demand with a "load earlier messages" button.
+import streamlit as st
+
+# Messages shown by default, and added per "load earlier" click.
+PAGE_SIZE = 30
+
+
+def window_start(total, window):
+    """Index of the first message inside the window."""
+    return max(0, total - window)
+
+
+def render_transcript(messages, window, load_earlier_label=None, on_load_earlier=None):
+    """Renders the last `window` messages; returns how many older ones are hidden.
+
+    The load-earlier button is shown only when `load_earlier_label` is given and
+    there is something hidden; `on_load_earlier` runs as its on_click callback.
+    """
+    start = window_start(len(messages), window)
+    if start and load_earlier_label:
+        st.button(load_earlier_label, key="load_earlier_messages", on_click=on_load_earlier)
+    for index in range(start, len(messages)):
+        message = messages[index]
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+    return start
@@ -0,0 +1,237 @@
+# Two-tier cache for machine translations used by FeelEase.
+#
+# Tier 1 is an in-process LRU shared by every Streamlit session on the server.
+# Tier 2 is a small SQLite file on disk so translations survive restarts.
+# Entries are keyed on (text, source, target).
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# =========================================================================
+# === Configuration ===
+# =========================================================================
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "FEELEASE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "feelease")
+)
+DEFAULT_MEMORY_ENTRIES = 2048
+DEFAULT_DISK_ENTRIES = 50000
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60  # 30 days
+
+
+def make_key(text, source, target):
+    """Builds a stable cache key for a (text, source, target) triple."""
+    raw = f"{source}\x00{target}\x00{text}".encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+
+class PerThreadTranslators:
+    """One translator instance per (thread, source, target), built by factory(source, target).
+
+    deep_translator's GoogleTranslator writes the text it is translating into
+    the instance (self._url_params) before sending the request, so an
+    instance shared between threads can return another caller's translation
+    (which the cache would then store under the wrong key).
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._local = threading.local()
+
+    def get(self, source, target):
+        translators = getattr(self._local, "translators", None)
+        if translators is None:
+            translators = self._local.translators = {}
+        translator = translators.get((source, target))
+        if translator is None:
+            translator = translators[(source, target)] = self.factory(source, target)
+        return translator
+
+
+class TranslationCache:
+    """In-memory LRU in front of an on-disk store with TTL and size eviction."""
+
+    def __init__(self, db_path=None, max_memory_entries=DEFAULT_MEMORY_ENTRIES,
+                 max_disk_entries=DEFAULT_DISK_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "errors": 0,
+            "hit_seconds": 0.0,
+            "miss_seconds": 0.0,
+        }
+
+        self._db = None
+        self._disk_count = 0  # Rows on disk, kept up to date instead of counted on every put
+        if db_path is None:
+            db_path = os.path.join(DEFAULT_CACHE_DIR, "translations.sqlite3")
+        if db_path:
+            try:
+                os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS translations ("
+                    " key TEXT PRIMARY KEY,"
+                    " translated TEXT NOT NULL,"
+                    " created REAL NOT NULL,"
+                    " last_used REAL NOT NULL)"
+                )
+                self._db.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_translations_last_used"
+                    " ON translations (last_used)"
+                )
+                self._db.commit()
+                self._disk_count = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            except (OSError, sqlite3.Error):
+                # An unwritable cache dir or broken disk cache should never stop the app, we just run memory-only.
+                self._db = None
+
+    # === Memory tier ===
+    def _memory_get(self, key):
+        value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
+        return value
+
+    def _memory_put(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    # === Disk tier ===
+    def _disk_get(self, key):
+        if self._db is None:
+            return None
+        now = time.time()
+        try:
+            row = self._db.execute(
+                "SELECT translated, created FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            translated, created = row
+            if now - created > self.ttl_seconds:
+                self._disk_count -= self._db.execute("DELETE FROM translations WHERE key = ?", (key,)).rowcount
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE translations SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            return translated
+        except sqlite3.Error:
+            return None
+
+    def _disk_put(self, key, value):
+        if self._db is None:
+            return
+        now = time.time()
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO translations (key, translated, created, last_used)"
+                " VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            # Puts follow a miss, so this is almost always a new row; a rare replace
+            # only makes the count high, which at worst prunes a little early.
+            self._disk_count += 1
+            if self._disk_count > self.max_disk_entries:
+                # Drop expired rows first, then the least recently used overflow plus
+                # 10% headroom, so the next few thousand puts don't each prune a row.
+                self._disk_count -= self._db.execute(
+                    "DELETE FROM translations WHERE created < ?", (now - self.ttl_seconds,)
+                ).rowcount
+                self._disk_count -= self._db.execute(
+                    "DELETE FROM translations WHERE key IN ("
+                    " SELECT key FROM translations ORDER BY last_used ASC LIMIT ?)",
+                    (max(0, self._disk_count - self.max_disk_entries + self.max_disk_entries // 10),),
+                ).rowcount
+                self._disk_count = max(0, self._disk_count)
+            self._db.commit()
+        except sqlite3.Error:
+            pass
+
+    # === Public API ===
+    def get(self, text, source, target):
+        """Returns a cached translation or None."""
+        key = make_key(text, source, target)
+        with self._lock:
+            value = self._memory_get(key)
+            if value is not None:
+                self._counters["memory_hits"] += 1
+                return value
+            value = self._disk_get(key)
+            if value is not None:
+                self._counters["disk_hits"] += 1
+                self._memory_put(key, value)
+            return value
+
+    def put(self, text, source, target, translated):
+        """Stores a translation in both tiers."""
+        key = make_key(text, source, target)
+        with self._lock:
+            self._memory_put(key, translated)
+            self._disk_put(key, translated)
+
+    def get_or_translate(self, text, source, target, translate_fn):
+        """Returns a cached translation, calling translate_fn(text) only on a miss."""
+        started = time.perf_counter()
+        cached = self.get(text, source, target)
+        if cached is not None:
+            with self._lock:
+                self._counters["hit_seconds"] += time.perf_counter() - started
+            return cached
+
+        try:
+            translated = translate_fn(text)
+        except Exception:
+            with self._lock:
+                self._counters["errors"] += 1
+            raise
+
+        with self._lock:
+            self._counters["misses"] += 1
+            self._counters["miss_seconds"] += time.perf_counter() - started
+        # Translators occasionally return None for empty input, don't cache that.
+        if translated is not None:
+            self.put(text, source, target, translated)
+        return translated
+
+    def stats(self):
+        """Returns hit/miss counters, hit ratio and mean latencies."""
+        with self._lock:
+            counters = dict(self._counters)
+            memory_size = len(self._memory)
+            disk_size = self._disk_count if self._db is not None else None
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        lookups = hits + counters["misses"]
+        counters["memory_entries"] = memory_size
+        counters["disk_entries"] = disk_size
+        counters["hit_ratio"] = hits / lookups if lookups else 0.0
+        counters["mean_hit_ms"] = 1000 * counters["hit_seconds"] / hits if hits else 0.0
+        counters["mean_miss_ms"] = (
+            1000 * counters["miss_seconds"] / counters["misses"] if counters["misses"] else 0.0
+        )
+        return counters
+
+    def clear(self):
+        """Empties both tiers and resets the counters."""
+        with self._lock:
+            self._memory.clear()
+            for name in self._counters:
+                self._counters[name] = 0 if isinstance(self._counters[name], int) else 0.0
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM translations")
+                    self._db.commit()
+                    self._disk_count = 0
+                except sqlite3.Error:
+                    pass
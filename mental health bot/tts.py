@@ -0,0 +1,219 @@
+# Long-lived text-to-speech worker.
+#
+# pyttsx3 engines must be driven from the thread that created them, so one
+# daemon thread owns a single engine and plays jobs from a queue. Replies are
+# spoken sentence by sentence: audio starts as soon as the first sentence is
+# synthesized, and cancellation takes effect at the next word.
+import itertools
+import queue
+import re
+import threading
+import time
+
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?।])\s+|\n+")
+
+# Queue order: speech and renders a user is waiting on go before background
+# pre-renders; the shutdown sentinel goes after everything already queued.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+PRIORITY_SHUTDOWN = 2
+
+# Slider values are 50-200 with 100 as "normal"; espeak's pitch is 0-99 with 50 as normal.
+PITCH_SCALE = 0.5
+
+
+def split_sentences(text):
+    """Splits text into sentences to be spoken one at a time."""
+    return [s.strip() for s in SENTENCE_SPLIT_RE.split(text) if s and s.strip()]
+
+
+def default_engine_factory():
+    import pyttsx3
+
+    return pyttsx3.init()
+
+
+def espeak_pitch_setter():
+    """Returns a function setting espeak's base pitch, or None if espeak isn't the backend.
+
+    pyttsx3 has no pitch property: engine.setProperty('pitch') is queued, raises
+    KeyError inside runAndWait and is swallowed there, so it never takes effect.
+    """
+    try:
+        from pyttsx3.drivers import _espeak
+    except (ImportError, OSError):  # SAPI5/NSSS hosts, or libespeak missing
+        return None
+    return lambda value: _espeak.SetParameter(_espeak.PITCH, value, 0)
+
+
+class TTSJob:
+    def __init__(self, text, voice_type, rate, pitch, generation, output_path=None):
+        # File jobs render the whole text at once; there is no playback to start early.
+        self.sentences = [text] if output_path else split_sentences(text)
+        self.output_path = output_path
+        self.voice_type = voice_type
+        self.rate = rate
+        self.pitch = pitch
+        self.generation = generation
+        self.enqueued_at = time.perf_counter()
+        self.first_audio_at = None
+        self.succeeded = False
+        self.done = threading.Event()
+
+
+class TTSWorker:
+    """Speaks queued jobs on one persistent engine thread.
+
+    speak() interrupts whatever is playing by default, so rapid clicks never
+    pile up overlapping audio. stop() cancels the current job and everything
+    queued behind it.
+    """
+
+    def __init__(self, engine_factory=default_engine_factory, pitch_setter_factory=espeak_pitch_setter,
+                 ready_timeout=5.0):
+        self.engine_factory = engine_factory
+        self.pitch_setter_factory = pitch_setter_factory
+        self.ready_timeout = ready_timeout
+        self.error = None
+        self.male_voice = None
+        self.female_voice = None
+        self._engine = None
+        self._set_pitch = None
+        self._current = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()  # FIFO within a priority
+        self._ready = threading.Event()
+        self.stats = {
+            "jobs": 0,
+            "sentences": 0,
+            "cancelled": 0,
+            "failed": 0,
+            "last_time_to_first_audio": None,
+        }
+        self._thread = threading.Thread(target=self._run, name="tts-worker", daemon=True)
+        self._thread.start()
+
+    # === Public API ===
+    @property
+    def available(self):
+        self._ready.wait(self.ready_timeout)
+        return self._ready.is_set() and self.error is None
+
+    @property
+    def supports_pitch(self):
+        return self.available and self._set_pitch is not None
+
+    def speak(self, text, voice_type="Female", rate=130, pitch=100, interrupt=True):
+        """Queues text to be spoken. Returns False if no TTS engine is available."""
+        if not self.available:
+            return False
+        if interrupt:
+            self.stop()
+        with self._lock:
+            job = TTSJob(text, voice_type, rate, pitch, self._generation)
+        self._put(PRIORITY_INTERACTIVE, job)
+        return True
+
+    def render_to_file(self, text, path, voice_type="Female", rate=130, pitch=100, timeout=60, background=False):
+        """Synthesizes text into an audio file on the worker thread. Returns True on success.
+
+        File jobs are not affected by stop(). Background jobs wait behind all
+        interactive ones, so pre-rendering never delays a render a user asked for.
+        """
+        if not self.available:
+            return False
+        job = TTSJob(text, voice_type, rate, pitch, None, output_path=path)
+        self._put(PRIORITY_BACKGROUND if background else PRIORITY_INTERACTIVE, job)
+        return job.done.wait(timeout) and job.succeeded
+
+    def stop(self):
+        """Cancels the current job and any queued ones."""
+        with self._lock:
+            self._generation += 1
+
+    def shutdown(self):
+        self.stop()
+        self._put(PRIORITY_SHUTDOWN, None)
+
+    def is_speaking(self):
+        return self._current is not None
+
+    def _put(self, priority, job):
+        self._queue.put((priority, next(self._sequence), job))
+
+    # === Worker thread ===
+    def _cancelled(self, job):
+        return job.output_path is None and job.generation != self._generation
+
+    def _on_started_utterance(self, name):
+        job = self._current
+        if job is not None and job.first_audio_at is None:
+            job.first_audio_at = time.perf_counter()
+            self.stats["last_time_to_first_audio"] = job.first_audio_at - job.enqueued_at
+
+    def _on_started_word(self, name, location, length):
+        # Callbacks run inside runAndWait on this thread, so stop() here is safe.
+        job = self._current
+        if job is not None and self._cancelled(job):
+            self._engine.stop()
+
+    def _apply_settings(self, job):
+        engine = self._engine
+        if job.voice_type == "Male" and self.male_voice:
+            engine.setProperty('voice', self.male_voice)
+        elif job.voice_type == "Female" and self.female_voice:
+            engine.setProperty('voice', self.female_voice)
+        engine.setProperty('rate', job.rate)
+        if self._set_pitch is not None:
+            # Flush the queued voice change first: loading a voice resets espeak's pitch.
+            engine.runAndWait()
+            self._set_pitch(min(99, max(0, round(job.pitch * PITCH_SCALE))))
+
+    def _run(self):
+        try:
+            self._engine = self.engine_factory()
+            voices = self._engine.getProperty('voices') or []
+            self.male_voice = next((v.id for v in voices if 'male' in v.name.lower() and 'female' not in v.name.lower()), None)
+            self.female_voice = next((v.id for v in voices if 'female' in v.name.lower()), None)
+            self._engine.connect('started-utterance', self._on_started_utterance)
+            self._engine.connect('started-word', self._on_started_word)
+            self._set_pitch = self.pitch_setter_factory()
+        except Exception as e:  # No TTS backend on this host (e.g. libespeak missing)
+            self.error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                return
+            if self._cancelled(job):
+                self.stats["cancelled"] += 1
+                continue
+            self._current = job
+            self.stats["jobs"] += 1
+            try:
+                self._apply_settings(job)
+                if job.output_path:
+                    self._engine.save_to_file(job.sentences[0], job.output_path)
+                    self._engine.runAndWait()
+                    job.succeeded = True
+                    continue
+                for sentence in job.sentences:
+                    if self._cancelled(job):
+                        break
+                    self._engine.say(sentence)
+                    self._engine.runAndWait()
+                    self.stats["sentences"] += 1
+                if self._cancelled(job):
+                    self.stats["cancelled"] += 1
+            except Exception:
+                # A misbehaving driver ("run loop already started", ctypes errors) fails
+                # only this job; done is still set, so a waiting render_to_file returns False.
+                self.stats["failed"] += 1
+            finally:
+                self._current = None
+                job.done.set()
@@ -0,0 +1,82 @@
+# Curated verses of comfort from the user's own tradition.
+#
+# When a message sounds sad, lonely, anxious, angry or hopeless and the user
+# has told us their faith, a verse from locales/verses.json is shown next to
+# the model's reply. The model is no longer asked to quote scripture, so it
+# spends no tokens on it and the verse is always one the team has checked.
+#
+# The corpus is loaded once per process and indexed by (faith, emotion), so
+# picking a verse is a couple of dict lookups. Each user goes through a
+# (faith, emotion) group in their own shuffled order, and sees no verse twice
+# until they have seen every verse in that group.
+import json
+import os
+import random
+from functools import lru_cache
+
+from sentiment import EMOTION_OF_KEYWORD, NEGATIVE, NEGATIVE_KEYWORDS
+
+VERSES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales", "verses.json")
+
+EMOTIONS = tuple(NEGATIVE_KEYWORDS)
+DEFAULT_EMOTION = "sadness"
+# Smaller (faith, emotion) groups rotate through all of the faith's verses instead,
+# so a user isn't shown the same one or two verses over and over.
+MIN_GROUP_SIZE = 3
+
+
+def detect_emotion(matches):
+    """The emotion of the first negative keyword in SentimentDetector.matches() output, or None."""
+    for label, keyword in matches:
+        if label == NEGATIVE:
+            # A detector built with other keywords may match one with no emotion
+            return EMOTION_OF_KEYWORD.get(keyword, DEFAULT_EMOTION)
+    return None
+
+
+class VerseLibrary:
+    """Verses grouped by faith and emotion.
+
+    A verse is a dict with "id", "faith", "source", "emotions", "text"
+    ({language code: text}, always with "en") and optionally "original"
+    (the verse in its original language and script).
+    """
+
+    def __init__(self, verses):
+        self.verses = {verse["id"]: verse for verse in verses}
+        self.faiths = {verse["faith"] for verse in verses}
+        self._groups = {}
+        for verse in verses:
+            self._groups.setdefault(verse["faith"], []).append(verse["id"])
+            for emotion in verse["emotions"]:
+                self._groups.setdefault(f"{verse['faith']}/{emotion}", []).append(verse["id"])
+        self._order = lru_cache(maxsize=4096)(self._shuffled)
+
+    def group(self, faith, emotion):
+        """The rotation group for a faith and emotion: "Hinduism/anxiety", or just the faith."""
+        group = f"{faith}/{emotion}"
+        return group if len(self._groups.get(group, ())) >= MIN_GROUP_SIZE else faith
+
+    def _shuffled(self, user_id, group):
+        ids = self._groups[group]
+        return tuple(random.Random(f"{user_id}/{group}").sample(ids, len(ids)))
+
+    def pick(self, user_id, group, position):
+        """The verse at `position` in this user's order of the group (a permutation seeded by both)."""
+        order = self._order(user_id, group)
+        return self.verses[order[position % len(order)]]
+
+    @staticmethod
+    def text(verse, lang_code):
+        """(text, whether it still needs translating) for a language code such as "hi"."""
+        if lang_code in verse["text"]:
+            return verse["text"][lang_code], False
+        return verse["text"]["en"], lang_code != "en"
+
+
+def load_verses(path=VERSES_PATH):
+    """Loads the verse library from disk. A missing file yields an empty library."""
+    if not os.path.exists(path):
+        return VerseLibrary([])
+    with open(path, encoding="utf-8") as f:
+        return VerseLibrary(json.load(f)["verses"])
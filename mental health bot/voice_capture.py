@@ -0,0 +1,111 @@
+# Microphone capture and speech recognition off the Streamlit script thread.
+#
+# Ambient-noise calibration runs once per process and the energy threshold is
+# reused for every press. Phrases end on silence (energy-based voice activity
+# detection) instead of a fixed 5-second cut, and the recognizer backend is
+# pluggable: Google's web API, an offline engine, or a stub in tests.
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def recognize_google(recognizer, audio, language):
+    return recognizer.recognize_google(audio, language=language)
+
+
+def recognize_sphinx(recognizer, audio, language):
+    # Offline (pocketsphinx); only ships English models by default.
+    return recognizer.recognize_sphinx(audio, language=language.replace("-IN", "-US"))
+
+
+def recognize_whisper(recognizer, audio, language):
+    # Offline (openai-whisper); takes a bare language name or code.
+    return recognizer.recognize_whisper(audio, language=language.split("-")[0])
+
+
+RECOGNIZERS = {
+    "google": recognize_google,
+    "sphinx": recognize_sphinx,
+    "whisper": recognize_whisper,
+}
+
+
+def default_microphone():
+    import speech_recognition as sr
+
+    return sr.Microphone()
+
+
+class VoiceCapture:
+    """Listens and recognizes on a small thread pool; submit() returns a Future.
+
+    The Future resolves to a dict with "text", "error" and the time spent
+    listening and recognizing, so the UI never blocks on the microphone.
+    """
+
+    def __init__(self, engine="google", recognize=None, microphone_factory=default_microphone,
+                 pause_threshold=0.8, max_phrase_seconds=30, listen_timeout=8,
+                 calibration_seconds=1.0, max_workers=2):
+        self.recognize = recognize or RECOGNIZERS[engine]
+        self.microphone_factory = microphone_factory
+        self.pause_threshold = pause_threshold
+        self.max_phrase_seconds = max_phrase_seconds
+        self.listen_timeout = listen_timeout
+        self.calibration_seconds = calibration_seconds
+        self.energy_threshold = None
+        self._calibration_lock = threading.Lock()
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="voice")
+
+    def _recognizer(self):
+        """One Recognizer per pool thread, reused across captures."""
+        recognizer = getattr(self._local, "recognizer", None)
+        if recognizer is None:
+            import speech_recognition as sr
+
+            recognizer = sr.Recognizer()
+            recognizer.pause_threshold = self.pause_threshold
+            recognizer.non_speaking_duration = min(0.5, self.pause_threshold)
+            self._local.recognizer = recognizer
+        return recognizer
+
+    def calibrate(self, source, recognizer):
+        """Measures ambient noise once; later captures reuse the stored threshold."""
+        with self._calibration_lock:
+            if self.energy_threshold is None:
+                recognizer.adjust_for_ambient_noise(source, duration=self.calibration_seconds)
+                self.energy_threshold = recognizer.energy_threshold
+        recognizer.energy_threshold = self.energy_threshold
+        # Keep tracking slow changes in room noise without re-running calibration.
+        recognizer.dynamic_energy_threshold = True
+
+    def capture(self, language="en-IN"):
+        """Listens for one phrase and recognizes it (blocking; runs on the pool)."""
+        import speech_recognition as sr
+
+        result = {"text": "", "error": None, "listen_seconds": 0.0, "recognize_seconds": 0.0}
+        recognizer = self._recognizer()
+        try:
+            with self.microphone_factory() as source:
+                self.calibrate(source, recognizer)
+                started = time.perf_counter()
+                audio = recognizer.listen(source, timeout=self.listen_timeout,
+                                          phrase_time_limit=self.max_phrase_seconds)
+                result["listen_seconds"] = time.perf_counter() - started
+            started = time.perf_counter()
+            result["text"] = self.recognize(recognizer, audio, language) or ""
+            result["recognize_seconds"] = time.perf_counter() - started
+        except sr.WaitTimeoutError:
+            result["error"] = "No speech detected."
+        except sr.UnknownValueError:
+            result["error"] = "Sorry, I could not understand what you said."
+        except sr.RequestError as e:
+            result["error"] = f"Could not request results from the speech recognition service; {e}"
+        except (OSError, AttributeError) as e:
+            # No microphone (or no PyAudio) on this host
+            result["error"] = f"Microphone is not available: {e}"
+        return result
+
+    def submit(self, language="en-IN"):
+        """Starts a capture in the background and returns its Future."""
+        return self._executor.submit(self.capture, language)